@@ -10,7 +10,16 @@ The file is a collection of methods used to interact with the DTP.
 For more information, contact the author(s) listed above.
 """
 import argparse
+import collections
+import itertools
 import logging
+import math
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 import requests
 import validators
@@ -24,6 +33,7 @@ except ModuleNotFoundError:
     sys.path.append('DTP_API')
     from DTP_config import DTPConfig
 
+from dtp_apis.batch_DTP_API import BatchAPI
 from dtp_apis.count_DTP_API import CountAPI
 from dtp_apis.create_DTP_API import CreateAPI
 from dtp_apis.fetch_DTP_API import FetchAPI
@@ -31,10 +41,17 @@ from dtp_apis.link_DTP_API import LinkAPI
 from dtp_apis.revert_DTP_API import RevertAPI
 from dtp_apis.send_DTP_API import SendAPI
 from dtp_apis.update_DTP_API import UpdateAPI
-from helpers import logger_global, get_info_from_log
+from helpers import logger_global, get_info_from_log, get_page_url_builder, pretty_http_request_to_string, \
+    LazyHTTPRequest, add_profile_argument, profiling
+from iri_cache import IRICache
+from json_codec import get_json_codec
+from metrics import MetricsRegistry
+from multiprocessing_logging import BatchingFileHandler, start_queue_logging
+from tracing import NULL_SPAN
+from transport import create_pooled_session, send_with_retry, RetryPolicy, CircuitBreaker
 
 
-class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateAPI):
+class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateAPI, BatchAPI):
     """
     Base API class for mixin classes.
 
@@ -44,6 +61,43 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         if True then no changes to the database are performed.
     DTP_CONFIG : class
         an instance of DTP_Config
+    session_log_listener : QueueLogListener
+        the background writer of the session log created by init_logger, None otherwise
+    session : requests.Session
+        the connection-pooled session shared by all the requests of the instance
+    iri_cache : IRICache
+        the IRI to UUID cache used by get_uuid_for_iri, invalidated by
+        the nodes created and deleted through the instance
+    node_batch : NodeBatchWriter
+        the active batch writer of the create_* methods, None if the nodes are sent one by one
+    link_batch : LinkBatcher
+        the active link batcher of the link_node_* methods, None if the edges are sent one by one
+    retry_policy : RetryPolicy
+        the policy of the retries of the failed requests, see transport.RetryPolicy
+    circuit_breaker : CircuitBreaker
+        the breaker shared by the requests of the instance, see transport.CircuitBreaker
+    rate_limiter : RateLimiter
+        the limiter of the requests per endpoint class, None if the requests are not limited
+    concurrency_controller : AdaptiveConcurrencyController
+        the controller of the number of requests in flight, None if it is not adapted
+    metrics : MetricsRegistry
+        latency histograms, bytes, status codes and retries of the requests by API name
+    mirror : GraphMirror
+        the local snapshot of the domain answering the find queries of the fetch_* methods it covers,
+        invalidated by the nodes written through the instance, None if all the queries are sent to the platform
+    tracer : Tracer
+        the tracer recording the spans of the public methods and of the requests, None if tracing is disabled
+    node_index : NodeIndex
+        the on-disk index of the nodes consulted by get_uuid_for_iri, fetch_element_nodes and the count methods,
+        invalidated by the nodes written through the instance, None if all the lookups are sent to the platform
+    json_codec : class
+        the codec of the payloads and the responses, see json_codec.get_json_codec
+    request_log_mode : str
+        'full', 'summary' or 'off', see __init__
+    request_log_body_limit : int
+        the maximum number of characters of a request body written to the log, None for the full body
+    request_log_sample_rate : float
+        the fraction of the requests logged with their headers and body in the full mode
 
     Methods
     -------
@@ -60,11 +114,34 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         returns dictionary created from JSON
     put_guarded_request(payload, url, headers)
         returns dictionary created from JSON
+    send_prepared_request(prepared)
+        returns the response of the platform
     pretty_http_request_to_string(req)
         returns request string
+    log_http_request(req)
+        None
+    trace_span(name, **attributes)
+        returns a context manager yielding a Span, or a no-op span if tracing is disabled
+    iter_pages(fetch_function, *fetch_function_arg, read_ahead)
+        yields dictionaries created from JSON, one per page
+    iter_items(fetch_function, *fetch_function_arg, read_ahead)
+        yields nodes of all the pages
+    query_all_pages(fetch_function, *fetch_function_arg, read_ahead)
+        returns dictionary created from JSON
+    iter_pages_parallel(fetch_function, *fetch_function_arg, max_workers, count_function)
+        yields dictionaries created from JSON, one per page
+    query_all_pages_parallel(fetch_function, *fetch_function_arg, max_workers, count_function)
+        returns dictionary created from JSON
+    close()
+        None
     """
 
-    def __init__(self, dtp_config, simulation_mode=False):
+    def __init__(self, dtp_config, simulation_mode=False, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, page_read_ahead=1, iri_cache_size=10000, iri_cache_ttl=3600, request_log_mode='full',
+                 request_log_body_limit=2048, request_log_sample_rate=1.0, json_backend='auto', max_retries=5,
+                 retry_backoff=0.5, circuit_breaker_threshold=10, circuit_breaker_timeout=30.0, rate_limiter=None,
+                 concurrency_controller=None, metrics=None, tracer=None, mirror=None,
+                 node_index=None):
         """
         Parameters
         ----------
@@ -73,11 +150,102 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         simulation_mode : bool, optional
             if set to True then method changing
             the database are not send.
+        pool_connections : int, optional
+            the number of per-host connection pools kept by the session
+        pool_maxsize : int, optional
+            the maximum number of connections kept open to a single host,
+            it should not be lower than the number of threads sharing the instance;
+            it is also the default number of workers of the parallel page methods
+        pool_block : bool, optional
+            if set to True then pool_maxsize is a hard per-host limit and
+            requests wait for a free connection
+        keep_alive : bool, optional
+            if set to False then connections are closed after every request
+        page_read_ahead : int, optional
+            the default number of pages fetched in the background by iter_pages,
+            iter_items and query_all_pages while the caller processes the current page,
+            0 disables prefetching
+        iri_cache_size : int, optional
+            the maximum number of IRI to UUID entries cached, 0 disables the cache
+        iri_cache_ttl : float, optional
+            the number of seconds a cached UUID stays valid, None for no expiry
+        request_log_mode : str, optional
+            'full' logs every request with its headers and body at the DEBUG level and a summary line with
+            the method, URL, status and timing at the INFO level, 'summary' logs only the summary line
+            and 'off' logs neither
+        request_log_body_limit : int, optional
+            the maximum number of characters of a request body written to the log, None for the full body
+        request_log_sample_rate : float, optional
+            the fraction, between 0 and 1, of the requests logged with their headers and body in the full mode
+        json_backend : str, optional
+            the library encoding the payloads and decoding the responses: 'orjson', 'json' or 'auto'
+            for orjson if it is installed and the json module otherwise
+        max_retries : int, optional
+            the maximum number of retries of a request failed with a transient error, 0 disables the retries;
+            the requests creating nodes are retried only if the platform did not process them (429)
+        retry_backoff : float, optional
+            the base delay between the retries in seconds, it doubles at every retry,
+            a Retry-After header sent by the platform takes precedence
+        circuit_breaker_threshold : int, optional
+            the number of consecutive failures after which the requests wait for the platform to recover,
+            0 disables the circuit breaker
+        circuit_breaker_timeout : float, optional
+            the number of seconds the requests wait before a probe request is sent to the platform
+        rate_limiter : RateLimiter, optional
+            the token-bucket limiter of the requests per endpoint class, see rate_limiter.RateLimiter;
+            it can be shared by many instances, also in different processes, None disables the limit
+        concurrency_controller : AdaptiveConcurrencyController, optional
+            the AIMD controller of the number of requests in flight, see concurrency.AdaptiveConcurrencyController;
+            the threads sharing the instance, e.g. the workers of query_all_pages_parallel, wait for its window
+        metrics : MetricsRegistry, optional
+            the registry of the request metrics, see metrics.MetricsRegistry, a new one if not provided
+        tracer : Tracer, optional
+            the tracer of the operations, see tracing.Tracer; the fetch_*, create_*, link_*, update_*, revert_*,
+            query_all_pages* and query_path methods are recorded as spans with a child span per HTTP round-trip,
+            None disables tracing
+        mirror : GraphMirror, optional
+            the local snapshot of the domain, see graph_mirror.GraphMirror; the fetch_* methods whose query
+            classes have been mirrored are answered from it without a request, except fetch_node_with_iri;
+            the nodes written through the instance are dropped from it until its next sync
+        node_index : NodeIndex, optional
+            the SQLite index of the nodes, see node_index.NodeIndex; it can be shared by the processes of a pool,
+            None disables it
         """
 
+        if request_log_mode not in ('full', 'summary', 'off'):
+            raise Exception("Sorry, the request log mode has to be: full, summary or off.")
+
         self.simulation_mode = simulation_mode
         self.DTP_CONFIG = dtp_config
         self.session_logger = None
+        self.session_log_listener = None
+        self.session = create_pooled_session(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                             pool_block=pool_block, keep_alive=keep_alive)
+        self.page_read_ahead = page_read_ahead
+        self.parallel_requests = pool_maxsize
+        self.iri_cache = IRICache(maxsize=iri_cache_size, ttl=iri_cache_ttl)
+        self.node_batch = None
+        self.link_batch = None
+        self.request_log_mode = request_log_mode
+        self.request_log_body_limit = request_log_body_limit
+        self.request_log_sample_rate = request_log_sample_rate
+        self.json_codec = get_json_codec(json_backend)
+        self.retry_policy = RetryPolicy(max_retries=max_retries, backoff_factor=retry_backoff)
+        self.circuit_breaker = CircuitBreaker(failure_threshold=circuit_breaker_threshold,
+                                              recovery_timeout=circuit_breaker_timeout)
+        self.rate_limiter = rate_limiter
+        self.concurrency_controller = concurrency_controller
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.metrics.register_gauge('circuit_open', lambda: int(self.circuit_breaker.state != 'closed'),
+                                    'Whether the requests wait for the platform to recover.')
+        if concurrency_controller is not None:
+            self.metrics.register_gauge('concurrency_window', lambda: concurrency_controller.window,
+                                        'The number of requests allowed in flight.')
+        self.mirror = mirror
+        self.node_index = node_index
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.instrument(self)
 
         self.log_markers_node_classes = {
             'new_element': 'NEW_ELEMENT_IRI',
@@ -115,12 +283,12 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         if len(session_file.strip()) != 0:
             print(f"Session log file at {session_file}")
             formatter = logging.Formatter('%(asctime)s : %(message)s', datefmt='%d-%b-%y %H:%M:%S')
-            handler = logging.FileHandler(session_file)
+            handler = BatchingFileHandler(session_file)
             handler.setFormatter(formatter)
 
             self.session_logger = logging.getLogger('session_DTP')
             self.session_logger.setLevel(logging.INFO)
-            self.session_logger.addHandler(handler)
+            self.session_log_listener = start_queue_logging(self.session_logger, handler)
 
     def init_external_logger(self, session_logger):
         """
@@ -134,6 +302,83 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
 
         self.session_logger = session_logger
 
+    def close(self):
+        """
+        The method closes all the pooled connections of the instance.
+        """
+
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def send_prepared_request(self, prepared):
+        """
+        The method sends a prepared request over the pooled session of the instance.
+        All the requests sent to the platform go through this method. The request is retried on
+        transient errors according to retry_policy, waits while circuit_breaker is open and
+        waits for rate_limiter and for a slot of concurrency_controller.
+
+        Parameters
+        ----------
+        prepared : requests.PreparedRequest, obligatory
+            the request to be sent
+
+        Returns
+        ------
+        requests.Response
+            the response of the platform
+        """
+
+        start = time.perf_counter()
+        api_name = self.DTP_CONFIG.get_api_name(prepared.url)
+        send = self.session.send if self.tracer is None else self.__traced_send(api_name)
+        response = send_with_retry(send, prepared, api_name=api_name,
+                                   retry_policy=self.retry_policy, circuit_breaker=self.circuit_breaker,
+                                   rate_limiter=self.rate_limiter,
+                                   concurrency_controller=self.concurrency_controller, metrics=self.metrics)
+        if self.request_log_mode != 'off':
+            logger_global.info('%s %s - Response code: %d in %.1f ms', prepared.method, prepared.url,
+                               response.status_code, (time.perf_counter() - start) * 1000)
+        return response
+
+    def __traced_send(self, api_name):
+        attempts = itertools.count()
+
+        def send(prepared):
+            # one span per round-trip, the waits for the retries and the limiters are left out
+            with self.tracer.span('http', method=prepared.method, url=prepared.url, api=api_name,
+                                  attempt=next(attempts), request_bytes=len(prepared.body or b'')) as span:
+                response = self.session.send(prepared)
+                span.set_attribute('status_code', response.status_code)
+                span.set_attribute('response_bytes', len(response.content or b''))
+                return response
+        return send
+
+    def trace_span(self, name, **attributes):
+        """
+        The method records the code run in its context as a child span of the current operation.
+
+        Parameters
+        ----------
+        name : str, obligatory
+            the name of the span, e.g. dump_write
+        attributes : dict, optional
+            the attributes of the span, e.g. the page number or the batch size
+
+        Returns
+        ------
+        context manager
+            yields the Span, or a span ignoring its attributes if tracing is disabled
+        """
+
+        if self.tracer is None:
+            return nullcontext(NULL_SPAN)
+        return self.tracer.span(name, **attributes)
+
     def post_general_request(self, payload, url=' ', headers=None):
         """
         The method allows for sending POST requests to the DTP. This version does not respect the simulation mode.
@@ -156,18 +401,15 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
                 'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
             }
 
-        session = requests.Session()
-
         if not validators.url(url):
             raise Exception("Sorry, the URL is not a valid URL: " + url)
         req = requests.Request("POST", url, headers=headers, data=payload)
 
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
-        response = session.send(prepared)
-        logger_global.info('Response code: ' + str(response.status_code))
+        response = self.send_prepared_request(prepared)
 
         if response.ok:
             return response
@@ -208,17 +450,38 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         if req_type_fix != 'PUT' or req_type_fix != 'POST':
             Exception("Request type has to be: PUT or POST!")
 
-        session = requests.Session()
         req = requests.Request(req_type_fix, url, headers=headers, data=payload)
         prepared = req.prepare()
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
+            if self.node_index is not None or self.mirror is not None:
+                self.__invalidate_written_nodes(payload)
             return response
         return None
 
+    def __invalidate_written_nodes(self, payload):
+        # the written nodes are dropped from the index and the mirror even if the request failed,
+        # it could be partly applied
+        try:
+            written = self.json_codec.loads(payload)
+        except ValueError:
+            return
+        for node in written if isinstance(written, list) else [written]:
+            if not isinstance(node, dict):
+                continue
+            if '_iri' in node:
+                if self.node_index is not None:
+                    self.node_index.invalidate(node['_iri'], node.get('_classes', ()))
+                if self.mirror is not None:
+                    self.mirror.invalidate(node['_iri'], node.get('_classes', ()))
+            elif '_uuid' in node:
+                if self.node_index is not None:
+                    self.node_index.invalidate_uuid(node['_uuid'])
+                if self.mirror is not None:
+                    self.mirror.invalidate_uuid(node['_uuid'])
+
     def post_guarded_request(self, payload, url=' ', headers=None):
         return self.general_guarded_request('POST', payload, url, headers)
 
@@ -242,15 +505,24 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
             the pre-prepared request
         """
 
-        request_str = '{}\n{}\r\n{}\r\n\r\n{}\n{}'.format(
-            '-----------START-----------',
-            req.method + ' ' + req.url,
-            '\r\n'.join('{}: {}'.format(k, v) for k, v in req.headers.items()),
-            req.body,
-            '-----------END-----------'
-        )
+        return pretty_http_request_to_string(req, self.request_log_body_limit)
 
-        return request_str
+    def log_http_request(self, req):
+        """
+        The method logs a pre-prepared HTTP request at the DEBUG level. The request is formatted only if the record
+        is emitted, and it is not logged at all in the summary and off modes or when it is not sampled.
+
+        Parameters
+        ----------
+        req : Request, obligatory
+            the pre-prepared request
+        """
+
+        if self.request_log_mode != 'full' or not logger_global.isEnabledFor(logging.DEBUG):
+            return
+        if self.request_log_sample_rate < 1.0 and random.random() >= self.request_log_sample_rate:
+            return
+        logger_global.debug('HTTP request: \n%s', LazyHTTPRequest(req, self.request_log_body_limit))
 
     def revert_last_session(self, session_file):
         """
@@ -263,6 +535,19 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
         """
 
         counter = 0
+        if self.session_log_listener is not None:
+            self.session_log_listener.flush()
+
+        # the UUIDs of the created nodes are resolved upfront with a few bulk queries,
+        # the nodes missing from the result are looked up one by one below to report the error
+        with FileReadBackwards(session_file, encoding="utf-8") as frb:
+            created_node_iris = [iri for iri in map(self.__created_node_iri_from_log, frb)
+                                 if iri is not None and validators.url(iri)]
+        try:
+            node_uuids, _ = self.get_uuids_for_iris(created_node_iris)
+        except Exception as e:
+            logger_global.error('Bulk UUID resolution failed, the message: ' + str(e) + '.')
+            node_uuids = {}
 
         with FileReadBackwards(session_file, encoding="utf-8") as frb:
             for line in tqdm(frb):
@@ -297,15 +582,11 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
                     self.delete_param_in_node(node_iri, field, is_revert_session=True)
                     counter += 1
                 else:
-                    try:
-                        node_class = next(
-                            substring for substring in self.log_markers_node_classes.values() if substring in line)
-                    except StopIteration as E:
+                    node_iri = self.__created_node_iri_from_log(line)
+                    if node_iri is None:
                         continue
-                    index = line.find(node_class)
-                    node_iri = line[index + len(node_class) + 1:].strip()
                     try:
-                        node_uuid = self.get_uuid_for_iri(node_iri)
+                        node_uuid = node_uuids[node_iri] if node_iri in node_uuids else self.get_uuid_for_iri(node_iri)
                     except Exception as e:
                         if hasattr(e, 'message'):
                             e_msg = e.message
@@ -320,31 +601,263 @@ class DTPApi(FetchAPI, CountAPI, CreateAPI, LinkAPI, RevertAPI, SendAPI, UpdateA
 
         logger_global.info('The session started at: ' + msg_date + ', has been reverted.')
 
-    def query_all_pages(self, fetch_function, *fetch_function_arg):
+    def __created_node_iri_from_log(self, line):
+        try:
+            node_class = next(substring for substring in self.log_markers_node_classes.values() if substring in line)
+        except StopIteration:
+            return None
+        index = line.find(node_class)
+        return line[index + len(node_class) + 1:].strip()
+
+    def __walk_pages(self, fetch_function, *fetch_function_arg):
+        with self.trace_span('page', page=0):
+            page = fetch_function(*fetch_function_arg)
+        yield page
+
+        page_number = 0
+        while 'next' in page.keys() and page['size'] != 0:
+            page_number += 1
+            with self.trace_span('page', page=page_number):
+                page = fetch_function(*fetch_function_arg, url=page['next'])
+            if page['size'] <= 0:
+                break
+            yield page
+
+    @staticmethod
+    def __put_until_stopped(buffer, item, stop):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __prefetch_pages(self, pages, read_ahead):
+        buffer = queue.Queue(maxsize=read_ahead)
+        stop = threading.Event()
+        end_of_pages = object()
+
+        def producer():
+            try:
+                for fetched_page in pages:
+                    if not self.__put_until_stopped(buffer, fetched_page, stop):
+                        return
+                last = end_of_pages
+            except BaseException as e:  # re-raised in the consumer thread
+                last = e
+            self.__put_until_stopped(buffer, last, stop)
+
+        if self.tracer is not None:
+            producer = self.tracer.bind(producer)
+        worker = threading.Thread(target=producer, name='DTPApi-page-prefetch', daemon=True)
+        worker.start()
+        try:
+            while True:
+                page = buffer.get()
+                if page is end_of_pages:
+                    return
+                if isinstance(page, BaseException):
+                    raise page
+                yield page
+        finally:
+            stop.set()
+
+    def iter_pages(self, fetch_function, *fetch_function_arg, read_ahead=None):
+        """
+        The method yields the pages of a query one by one, following the 'next' links.
+        Only the page being processed and the prefetched pages are kept in memory.
+
+        Parameters
+        ----------
+        fetch_function : method, obligatory
+            a fetch method accepting the keyword argument url, e.g. fetch_element_nodes
+        fetch_function_arg : tuple, optional
+            arguments to fetch_function
+        read_ahead : int, optional
+            the number of pages fetched by a background worker while the caller processes
+            the current page, if not provided page_read_ahead is used, 0 fetches on demand
+
+        Returns
+        ------
+        generator
+            dictionaries created from JSON, one per page
+        """
+
+        if read_ahead is None:
+            read_ahead = self.page_read_ahead
+
+        pages = self.__walk_pages(fetch_function, *fetch_function_arg)
+        if read_ahead <= 0:
+            return pages
+        return self.__prefetch_pages(pages, read_ahead)
+
+    def iter_items(self, fetch_function, *fetch_function_arg, read_ahead=None):
+        """
+        The method yields the items of all the pages of a query, see iter_pages.
+
+        Parameters
+        ----------
+        fetch_function : method, obligatory
+            a fetch method accepting the keyword argument url, e.g. fetch_element_nodes
+        fetch_function_arg : tuple, optional
+            arguments to fetch_function
+        read_ahead : int, optional
+            the number of prefetched pages, see iter_pages
+
+        Returns
+        ------
+        generator
+            nodes as dictionaries created from JSON
+        """
+
+        for page in self.iter_pages(fetch_function, *fetch_function_arg, read_ahead=read_ahead):
+            yield from page['items']
+
+    def query_all_pages(self, fetch_function, *fetch_function_arg, read_ahead=None):
         """
-        The method will query all pages for a query
+        The method will query all pages for a query and merge them into a single response.
+        The next page is fetched in the background while the current one is merged.
+        For large queries prefer iter_pages or iter_items, which do not accumulate the items.
 
         Args:
             fetch_function: function used to query DTP
             fetch_function_arg: arguments to fetch_function
+            read_ahead: number of prefetched pages, if not provided page_read_ahead is used
 
         Returns:
-
+            dictionary with the items and the size of all pages
         """
-        query_response_all_pages = fetch_function(*fetch_function_arg)
-        elements = query_response_all_pages
+        query_response_all_pages = None
 
-        while 'next' in elements.keys() and elements['size'] != 0:
-            if len(fetch_function_arg) > 1:
-                elements = fetch_function(*fetch_function_arg, url=elements['next'])
+        for page in self.iter_pages(fetch_function, *fetch_function_arg, read_ahead=read_ahead):
+            if query_response_all_pages is None:
+                query_response_all_pages = page
             else:
-                elements = fetch_function(url=elements['next'])
+                query_response_all_pages['items'] += page['items']
+                query_response_all_pages['size'] += page['size']
 
-            if elements['size'] <= 0:
-                break
+        return query_response_all_pages
+
+    def iter_pages_parallel(self, fetch_function, *fetch_function_arg, max_workers=None, count_function=None):
+        """
+        The method yields the pages of a query in order, fetching them concurrently.
+        The number of items is given by count_function and the page URLs are derived from the 'next' link
+        of the first page. If the link does not expose a page parameter, the method falls back to iter_pages.
 
-            query_response_all_pages['items'] += elements['items']
-            query_response_all_pages['size'] += elements['size']
+        Parameters
+        ----------
+        fetch_function : method, obligatory
+            a fetch method accepting the keyword argument url, e.g. fetch_element_nodes
+        fetch_function_arg : tuple, optional
+            arguments to fetch_function
+        max_workers : int, optional
+            the number of pages fetched at the same time, if not provided parallel_requests is used
+        count_function : function, optional
+            a function returning the number of items of the query given fetch_function_arg, e.g. count_path
+            for fetch_path; if not provided, the query of fetch_function is sent to the count endpoint
+            with the url argument, which is valid for the fetch_* methods of FetchAPI only
+
+        Raises
+        ------
+        It raises an exception if the number of items is not an integer.
+
+        Returns
+        ------
+        generator
+            dictionaries created from JSON, one per page, in the order of the 'next' chain
+        """
+
+        with self.trace_span('page', page=0):
+            first_page = fetch_function(*fetch_function_arg)
+        page_size = first_page['size']
+        if 'next' not in first_page.keys() or page_size <= 0:
+            yield first_page
+            return
+
+        page_url = get_page_url_builder(first_page['next'], page_size)
+        if page_url is None:
+            logger_global.warning(
+                'Unknown pagination scheme in: ' + first_page['next'] + ', pages are fetched one by one.')
+            yield from self.iter_pages(fetch_function, *fetch_function_arg)
+            return
+
+        def fetch_page(page_index):
+            with self.trace_span('page', page=page_index):
+                return fetch_function(*fetch_function_arg, url=page_url(page_index))
+
+        if count_function is not None:
+            nb_items = count_function(*fetch_function_arg)
+        else:
+            # the count endpoint accepts the queries of the fetch_* methods of FetchAPI
+            count = fetch_function(*fetch_function_arg, url=self.DTP_CONFIG.get_api_url('count_nodes'))
+            nb_items = count.get('total_items') if isinstance(count, dict) else None
+        try:
+            nb_items = int(nb_items) if not isinstance(nb_items, bool) else None
+        except (TypeError, ValueError):
+            nb_items = None
+        if nb_items is None:
+            raise Exception("Sorry, the number of items of the query is not an integer, "
+                            "pass a count_function matching the fetch function.")
+        nb_pages = math.ceil(nb_items / page_size)
+        yield first_page
+
+        if max_workers is None:
+            max_workers = self.parallel_requests
+        if self.tracer is not None:
+            fetch_page = self.tracer.bind(fetch_page)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='DTPApi-page-fan-out') as executor:
+            pending = collections.deque()
+            page_indexes = iter(range(1, nb_pages))
+            try:
+                # keeping a bounded window of pages in flight limits the memory used by out of order pages
+                for page_index in page_indexes:
+                    pending.append(executor.submit(fetch_page, page_index))
+                    if len(pending) >= 2 * max_workers:
+                        break
+                while pending:
+                    page = pending.popleft().result()
+                    page_index = next(page_indexes, None)
+                    if page_index is not None:
+                        pending.append(executor.submit(fetch_page, page_index))
+                    if page['size'] > 0:
+                        yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def query_all_pages_parallel(self, fetch_function, *fetch_function_arg, max_workers=None, count_function=None):
+        """
+        The method queries all pages of a query concurrently and merges them into a single response,
+        see iter_pages_parallel.
+
+        Parameters
+        ----------
+        fetch_function : method, obligatory
+            a fetch method accepting the keyword argument url, e.g. fetch_element_nodes
+        fetch_function_arg : tuple, optional
+            arguments to fetch_function
+        max_workers : int, optional
+            the number of pages fetched at the same time
+        count_function : function, optional
+            a function returning the number of items of the query, see iter_pages_parallel
+
+        Returns
+        ------
+        dictionary
+            the items and the size of all pages, in the order of the 'next' chain
+        """
+
+        query_response_all_pages = None
+
+        for page in self.iter_pages_parallel(fetch_function, *fetch_function_arg, max_workers=max_workers,
+                                             count_function=count_function):
+            if query_response_all_pages is None:
+                query_response_all_pages = page
+            else:
+                query_response_all_pages['items'] += page['items']
+                query_response_all_pages['size'] += page['size']
 
         return query_response_all_pages
 
@@ -358,6 +871,7 @@ def parse_args():
     parser = argparse.ArgumentParser(description='Prepare DTP graph')
     parser.add_argument('--xml_path', '-x', type=str, help='path to config xml file', required=True)
     parser.add_argument('--simulation', '-s', default=False, action='store_true')
+    add_profile_argument(parser)
 
     return parser.parse_args()
 
@@ -366,5 +880,6 @@ if __name__ == "__main__":
     args = parse_args()
     dtp_config = DTPConfig(args.xml_path)
     dtp_api = DTPApi(dtp_config, simulation_mode=args.simulation)
-    response = dtp_api.activity_count_connected_task_nodes("http://bim2twin.eu/mislata_wp3/activity91217940_2")
+    with profiling(args.profile):
+        response = dtp_api.activity_count_connected_task_nodes("http://bim2twin.eu/mislata_wp3/activity91217940_2")
     print('Response:\n', response)
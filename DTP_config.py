@@ -6,7 +6,9 @@
 #  This file cannot be used without a written permission from the author(s).
 
 import os
+import re
 import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
 
 import validators
 
@@ -25,6 +27,8 @@ class DTPConfig:
         a domain URL
     api_uris : dictionary
         a map of the API uris
+    api_names : dictionary
+        a map from the API uris without an ID to their type
     ontology_uris : dictionary
         a map of the ontology uris        
 
@@ -33,6 +37,9 @@ class DTPConfig:
     get_api_uri(api_type, ID = ' ')
         if the type is a valid type from the XML configuration, then it returns the link,
         if the ID is provided, then the returned link will contain it
+    get_api_name(url)
+        returns the API type of a request URL, e.g. get_find_elements for a next page link,
+        None if the URL is not one of the API URLs
     get_ontology_uri(ontology_type)
         if the type is a valid type from the XML configuration, then it returns
         the corresponding ontology URI
@@ -74,6 +81,17 @@ class DTPConfig:
         for uri in uris:
             self.api_uris[uri.attrib['function'].strip(' \t\n\r')] = uri.text.strip(' \t\n\r')
 
+        # reverse map used to name the requests, the URLs with an ID are matched after the exact ones
+        self.api_names = {}
+        self.api_name_patterns = []
+        for api_type, url in self.api_uris.items():
+            url = url.split('?')[0].rstrip('/')
+            if '_ID_' in url:
+                pattern = re.compile(re.escape(url).replace('_ID_', '[^/]+'))
+                self.api_name_patterns.append((pattern, api_type))
+            else:
+                self.api_names.setdefault(url, api_type)
+
     def __map_ontology_uris(self, uris):
         for uri in uris:
             self.ontology_uris[uri.attrib['function'].strip(' \t\n\r')] = uri.text.strip(' \t\n\r')
@@ -112,6 +130,8 @@ class DTPConfig:
             self.kpi_domain = self.kpi_domain + '/'
 
         self.api_uris = {}
+        self.api_names = {}
+        self.api_name_patterns = []
         uris = config.find('API_URLS')
         if not uris is None:
             self.__map_api_urls(uris)
@@ -138,6 +158,33 @@ class DTPConfig:
         else:
             return self.api_uris[api_type].replace('_ID_', id)
 
+    def get_api_name(self, url):
+        """
+        The method finds the API type of a request URL. The query string is ignored and the URLs containing
+        an ID, e.g. delete_avatar, are matched against the URL patterns of the configuration.
+
+        Parameters
+        ----------
+        url : str, obligatory
+            the URL of a request, e.g. a next page link
+
+        Returns
+        ------
+        str
+            the API type from the XML configuration, e.g. get_find_elements,
+            None if the URL is not one of the API URLs
+        """
+
+        parts = urlsplit(url)
+        url = parts.scheme + '://' + parts.netloc + parts.path.rstrip('/')
+        api_type = self.api_names.get(url)
+        if api_type is not None:
+            return api_type
+        for pattern, api_type in self.api_name_patterns:
+            if pattern.fullmatch(url):
+                return api_type
+        return None
+
     def get_ontology_uri(self, ontology_type):
         return self.ontology_uris[ontology_type]
 
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def path_steps(dtp_config, *steps):
+    """
+    The function converts the steps of a path written with the ontology types of DTP_config.xml,
+    e.g. '->hasActivity' or '<-intentStatusRelation', to the steps accepted by AdjacencyGraph.walk.
+
+    Parameters
+    ----------
+    dtp_config : DTPConfig, obligatory
+        the configuration resolving the ontology types of the edges
+    steps : str, obligatory
+        the steps, the direction followed by the ontology type of the edges
+
+    Returns
+    ------
+    list
+        the (direction, edge URI) tuples
+    """
+
+    resolved = []
+    for step in steps:
+        direction, label = step[:2], step[2:]
+        if direction not in ('->', '<-'):
+            raise Exception("Sorry, a step has to start with -> or <-: " + step)
+        resolved.append((direction, dtp_config.get_ontology_uri(label)))
+    return resolved
+
+
+class _CSR:
+    """
+    Compressed sparse rows of the edges of a label: the neighbours of the node i are
+    indices[indptr[i]:indptr[i + 1]]. NumPy arrays if NumPy is installed, arrays of the standard library otherwise.
+    """
+
+    __slots__ = ('indptr', 'indices')
+
+    def __init__(self, sources, targets, nb_nodes):
+        if numpy is not None:
+            sources = numpy.frombuffer(sources, dtype=numpy.int64)
+            targets = numpy.frombuffer(targets, dtype=numpy.int64)
+            order = numpy.argsort(sources, kind='stable')
+            self.indices = targets[order]
+            self.indptr = numpy.zeros(nb_nodes + 1, dtype=numpy.int64)
+            numpy.cumsum(numpy.bincount(sources, minlength=nb_nodes), out=self.indptr[1:])
+        else:
+            counts = [0] * (nb_nodes + 1)
+            for source in sources:
+                counts[source + 1] += 1
+            for i in range(nb_nodes):
+                counts[i + 1] += counts[i]
+            self.indptr = array('q', counts)
+            self.indices = array('q', bytes(8 * len(targets)))
+            position = list(counts[:-1])
+            for source, target in zip(sources, targets):
+                self.indices[position[source]] = target
+                position[source] += 1
+
+    def neighbours(self, frontier):
+        if numpy is not None:
+            starts = self.indptr[frontier]
+            lengths = self.indptr[frontier + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                return numpy.empty(0, dtype=numpy.int64)
+            # the positions of all the neighbours in indices, without a loop over the frontier
+            offsets = numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths)
+            return numpy.unique(self.indices[offsets + numpy.arange(total)])
+        found = set()
+        for node_id in frontier:
+            found.update(self.indices[self.indptr[node_id]:self.indptr[node_id + 1]])
+        return sorted(found)
+
+
+class AdjacencyGraph:
+    """
+    The class keeps the edges of fetched DTP nodes as integer arrays, one CSR structure per edge label and
+    direction, and answers the multi-hop questions, e.g. all the as-built elements under a work package,
+    with a walk over whole frontiers of nodes instead of a fetch_* call per node and hop. NumPy is optional,
+    without it the arrays of the standard library are used and every hop is a loop over the frontier.
+
+    The graph is a snapshot of the given nodes, it does not follow the changes made on the platform.
+
+    Usage
+    -----
+    mirror = GraphMirror.crawl(dtp_api)  # or any list of nodes with their out edges, see from_nodes
+    adjacency = AdjacencyGraph.from_graph(mirror)
+    asbuilt_iris = adjacency.walk([wp_iri], path_steps(dtp_config, '->hasActivity', '->hasTask', '->hasTarget',
+                                                       '<-intentStatusRelation'))
+
+    Attributes
+    ----------
+    iris : list
+        the IRIs of the nodes, the position of an IRI is the integer identifier of the node
+    ids : dictionary
+        map from the IRIs to the identifiers
+    labels : list
+        the URIs of the edge labels
+
+    Methods
+    -------
+    from_nodes(nodes, labels)
+        returns AdjacencyGraph
+    from_graph(graph, labels)
+        returns AdjacencyGraph
+    walk(start_iris, steps, class_uri)
+        returns list, the IRIs of the nodes reached by the last step
+    walk_ids(start_ids, steps, class_uri)
+        returns the identifiers of the nodes reached by the last step
+    nb_edges(label)
+        returns int
+    """
+
+    def __init__(self):
+        self.iris = []
+        self.ids = {}
+        self.labels = []
+        self.__edges = {}  # label -> (source identifiers, target identifiers)
+        self.__members = {}  # class URI -> identifiers of its nodes
+        self.__out = {}  # label -> _CSR
+        self.__in = {}  # label -> _CSR
+        self.__masks = {}  # class URI -> boolean mask of the identifiers, NumPy only
+
+    def __id(self, iri):
+        node_id = self.ids.get(iri)
+        if node_id is None:
+            node_id = self.ids[iri] = len(self.iris)
+            self.iris.append(iri)
+        return node_id
+
+    def __add(self, node, classes, labels):
+        source = self.__id(node['_iri'])
+        for class_uri in classes:
+            self.__members.setdefault(class_uri, array('q')).append(source)
+        for edge in node.get('_outE', ()):
+            if labels is not None and edge['_label'] not in labels:
+                continue
+            sources, targets = self.__edges.setdefault(edge['_label'], (array('q'), array('q')))
+            sources.append(source)
+            targets.append(self.__id(edge['_targetIRI']))
+
+    def __build(self):
+        nb_nodes = len(self.iris)
+        self.labels = list(self.__edges)
+        for label, (sources, targets) in self.__edges.items():
+            self.__out[label] = _CSR(sources, targets, nb_nodes)
+            self.__in[label] = _CSR(targets, sources, nb_nodes)
+        if numpy is not None:
+            for class_uri, members in self.__members.items():
+                mask = numpy.zeros(nb_nodes, dtype=bool)
+                mask[numpy.frombuffer(members, dtype=numpy.int64)] = True
+                self.__masks[class_uri] = mask
+        else:
+            self.__members = {class_uri: set(members) for class_uri, members in self.__members.items()}
+        self.__edges = {}
+        return self
+
+    @classmethod
+    def from_nodes(cls, nodes, labels=None):
+        """
+        The method builds the arrays from nodes sent by the platform, e.g. the items of query_all_pages.
+        The targets of the edges do not need to be among the nodes, they get identifiers too.
+
+        Parameters
+        ----------
+        nodes : iterable, obligatory
+            the nodes with their classes and out edges
+        labels : iterable, optional
+            the URIs of the edge labels to be kept, all the labels if not provided
+
+        Returns
+        ------
+        AdjacencyGraph
+            the arrays of the nodes
+        """
+
+        graph = cls()
+        labels = set(labels) if labels is not None else None
+        for node in nodes:
+            graph.__add(node, node.get('_classes', ()), labels)
+        return graph.__build()
+
+    @classmethod
+    def from_graph(cls, graph, labels=None):
+        """
+        The method builds the arrays from the nodes of an InMemoryGraph, e.g. a GraphMirror. The nodes
+        are members of the classes they have been mirrored with, e.g. classElement for a Wall.
+
+        Parameters
+        ----------
+        graph : InMemoryGraph, obligatory
+            the graph, see in_memory_graph.InMemoryGraph
+        labels : iterable, optional
+            the URIs of the edge labels to be kept, all the labels if not provided
+
+        Returns
+        ------
+        AdjacencyGraph
+            the arrays of the nodes
+        """
+
+        adjacency = cls()
+        labels = set(labels) if labels is not None else None
+        for node_uuid, node in list(graph.nodes.items()):
+            adjacency.__add(node, graph.classes_of(node_uuid), labels)
+        return adjacency.__build()
+
+    def nb_edges(self, label):
+        csr = self.__out.get(label)
+        return len(csr.indices) if csr is not None else 0
+
+    def walk_ids(self, start_ids, steps, class_uri=None):
+        """
+        The method follows the steps of a path from a set of nodes, every hop visits the whole frontier at once.
+
+        Parameters
+        ----------
+        start_ids : iterable, obligatory
+            the identifiers of the start nodes
+        steps : list, obligatory
+            the (direction, edge URI) tuples, the direction is '->' or '<-', see path_steps
+        class_uri : str, optional
+            the URI of the class the reached nodes have to be members of
+
+        Returns
+        ------
+        numpy.ndarray or list
+            the sorted identifiers of the nodes reached by the last step, a list without NumPy
+        """
+
+        if numpy is not None:
+            frontier = numpy.unique(numpy.fromiter(start_ids, dtype=numpy.int64))
+        else:
+            frontier = sorted(set(start_ids))
+        for direction, label in steps:
+            if direction not in ('->', '<-'):
+                raise Exception("Sorry, the direction of a step has to be -> or <-.")
+            csr = (self.__out if direction == '->' else self.__in).get(label)
+            if csr is None or len(frontier) == 0:
+                return numpy.empty(0, dtype=numpy.int64) if numpy is not None else []
+            frontier = csr.neighbours(frontier)
+
+        if class_uri is not None:
+            if numpy is not None:
+                mask = self.__masks.get(class_uri)
+                return frontier[mask[frontier]] if mask is not None else numpy.empty(0, dtype=numpy.int64)
+            members = self.__members.get(class_uri, set())
+            return [node_id for node_id in frontier if node_id in members]
+        return frontier
+
+    def walk(self, start_iris, steps, class_uri=None):
+        """
+        The method follows the steps of a path from nodes given by their IRIs, see walk_ids.
+
+        Parameters
+        ----------
+        start_iris : iterable, obligatory
+            the IRIs of the start nodes, the unknown IRIs are ignored
+        steps : list, obligatory
+            the (direction, edge URI) tuples, the direction is '->' or '<-', see path_steps
+        class_uri : str, optional
+            the URI of the class the reached nodes have to be members of
+
+        Returns
+        ------
+        list
+            the IRIs of the nodes reached by the last step
+        """
+
+        start_ids = [self.ids[iri] for iri in start_iris if iri in self.ids]
+        return [self.iris[node_id] for node_id in self.walk_ids(start_ids, steps, class_uri)]
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+
+"""
+The file contains an asyncio client for the DTP built on top of DTPApi.
+For more information, contact the author(s) listed above.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from DTP_API import DTPApi
+
+
+class AsyncDTPApi:
+    """
+    Asyncio counterpart of DTPApi. Every public method of the DTPApi mixins (fetch_*, count, create_*, link_*,
+    update_*, revert and send methods) is available as a coroutine with the same name and arguments.
+
+    The blocking HTTP round-trips are run on a pool of worker threads sharing the connection pool of a single
+    DTPApi instance, so the event loop is never blocked and at most max_concurrency requests are in flight.
+
+    Usage
+    -----
+    async with AsyncDTPApi(dtp_config, max_concurrency=64) as dtp_api:
+        uuids = await dtp_api.gather('get_uuid_for_iri', [(iri,) for iri in iris])
+
+    Attributes
+    ----------
+    dtp_api : DTPApi
+        the underlying blocking client
+    max_concurrency : int
+        the maximum number of requests in flight
+
+    Methods
+    -------
+    run(method_name, *args, **kwargs)
+        returns the result of the DTPApi method
+    gather(method_name, args_list)
+        returns list, results in the order of args_list
+    aclose()
+        None
+    """
+
+    def __init__(self, dtp_config, simulation_mode=False, max_concurrency=32, **transport_kwargs):
+        """
+        Parameters
+        ----------
+        dtp_config : DTP_Config, obligatory
+            an instance of DTP_Config
+        simulation_mode : bool, optional
+            if set to True then method changing
+            the database are not send.
+        max_concurrency : int, optional
+            the maximum number of requests in flight, it also sizes the connection pool
+        transport_kwargs : dict, optional
+            additional arguments passed to DTPApi, e.g. pool_block or keep_alive
+        """
+
+        if max_concurrency < 1:
+            raise Exception("Sorry, max_concurrency has to be a positive number.")
+
+        transport_kwargs.setdefault('pool_maxsize', max_concurrency)
+        self.dtp_api = DTPApi(dtp_config, simulation_mode=simulation_mode, **transport_kwargs)
+        self.max_concurrency = max_concurrency
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='AsyncDTPApi')
+        self.__semaphore = None
+
+    def __getattr__(self, name):
+        if name == 'dtp_api':
+            raise AttributeError(name)
+        attr = getattr(self.dtp_api, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(name, *args, **kwargs)
+
+        method.sync_method = attr
+        return method
+
+    def __get_semaphore(self):
+        # created lazily, so it is bound to the loop that actually runs the coroutines
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.__semaphore
+
+    async def run(self, method_name, *args, **kwargs):
+        """
+        The method runs a DTPApi method without blocking the event loop.
+
+        Parameters
+        ----------
+        method_name : str, obligatory
+            the name of a DTPApi method, e.g. fetch_element_nodes
+        args : tuple, optional
+            positional arguments of the method; coroutine methods of this class,
+            e.g. a fetch function passed to query_all_pages, are replaced by their blocking version
+        kwargs : dict, optional
+            keyword arguments of the method
+
+        Returns
+        ------
+        object
+            the value returned by the DTPApi method
+        """
+
+        func = getattr(self.dtp_api, method_name)
+        args = [getattr(arg, 'sync_method', arg) for arg in args]
+        async with self.__get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, functools.partial(func, *args, **kwargs))
+
+    async def gather(self, method_name, args_list):
+        """
+        The method runs a DTPApi method concurrently for each set of arguments.
+
+        Parameters
+        ----------
+        method_name : str, obligatory
+            the name of a DTPApi method, e.g. create_asbuilt_node
+        args_list : iterable, obligatory
+            an iterable of argument tuples, one per call
+
+        Returns
+        ------
+        list
+            the results in the order of args_list, exceptions are raised as in asyncio.gather
+        """
+
+        return await asyncio.gather(*(self.run(method_name, *args) for args in args_list))
+
+    async def aclose(self):
+        """
+        The method waits for the worker threads and closes the pooled connections.
+        """
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.__executor.shutdown)
+        self.dtp_api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
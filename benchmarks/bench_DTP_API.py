@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+
+"""
+The file benchmarks DTPApi against the local stand-in of the DTP. For every data size, the throughput
+and the latency percentiles of the HTTP requests are measured for query_all_pages, get_uuid_for_iri,
+the create_* methods, the link_* methods and revert_last_session, and the results are written as JSON.
+
+Usage
+-----
+python bench_DTP_API.py --sizes 1000 10000 --ops 500 --output bench_results.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from DTP_API import DTPApi
+from DTP_config import DTPConfig
+from helpers import get_timestamp_dtp_format
+from local_DTP_server import LocalDTPServer
+
+
+class TimedDTPApi(DTPApi):
+    """
+    DTPApi recording the duration of every HTTP round-trip.
+
+    Attributes
+    ----------
+    latencies : list
+        the durations of the requests sent since the last reset, in seconds
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def send_prepared_request(self, prepared):
+        start = time.perf_counter()
+        response = super().send_prepared_request(prepared)
+        self.latencies.append(time.perf_counter() - start)
+        return response
+
+
+def percentile(sorted_values, fraction):
+    """
+    The function returns the nearest-rank percentile of sorted values.
+
+    Parameters
+    ----------
+    sorted_values : list, obligatory
+        the values in ascending order
+    fraction : float, obligatory
+        the percentile between 0 and 1, e.g. 0.95
+
+    Returns
+    ------
+    float
+        the percentile or None if there are no values
+    """
+
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(dtp_api, operation, size, workload):
+    """
+    The function runs a workload and summarises its HTTP requests.
+
+    Parameters
+    ----------
+    dtp_api : TimedDTPApi, obligatory
+        the instance used by the workload
+    operation : str, obligatory
+        the name of the measured operation
+    size : int, obligatory
+        the number of nodes on the server
+    workload : function, obligatory
+        the function to run, it returns the number of API calls made
+
+    Returns
+    ------
+    dictionary
+        the result of the benchmark
+    """
+
+    dtp_api.latencies = []
+    start = time.perf_counter()
+    nb_calls = workload()
+    seconds = time.perf_counter() - start
+    latencies = sorted(dtp_api.latencies)
+
+    def to_ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    result = {
+        'size': size,
+        'operation': operation,
+        'nb_calls': nb_calls,
+        'nb_requests': len(latencies),
+        'seconds': round(seconds, 4),
+        'calls_per_second': round(nb_calls / seconds, 2) if seconds > 0 else None,
+        'requests_per_second': round(len(latencies) / seconds, 2) if seconds > 0 else None,
+        'latency_ms': {
+            'mean': to_ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': to_ms(percentile(latencies, 0.50)),
+            'p95': to_ms(percentile(latencies, 0.95)),
+            'p99': to_ms(percentile(latencies, 0.99)),
+            'max': to_ms(latencies[-1]) if latencies else None
+        }
+    }
+    print(f"{size:>8} {operation:<22} {result['nb_requests']:>7} requests {result['seconds']:>9.3f} s "
+          f"{result['requests_per_second'] or 0:>9.1f} req/s  p50 {result['latency_ms']['p50']} ms  "
+          f"p95 {result['latency_ms']['p95']} ms  p99 {result['latency_ms']['p99']} ms")
+    return result
+
+
+# the shape of the as-planned graph loaded on the server
+ELEMENTS_PER_TASK = 10
+TASKS_PER_ACTIVITY = 10
+
+
+def add_asplanned_nodes(graph, dtp_config, nb_elements):
+    """
+    The function loads the as-planned graph linked by the as-performed nodes of the benchmark:
+    activity -hasTask-> task -hasTarget-> As-Designed element, as the fetch_* and link_* methods expect.
+
+    Parameters
+    ----------
+    graph : InMemoryGraph, obligatory
+        the graph of the local server
+    dtp_config : DTPConfig, obligatory
+        the configuration of the server
+    nb_elements : int, obligatory
+        the number of As-Designed elements
+
+    Returns
+    ------
+    list, list, list
+        the IRIs of the As-Designed elements, of the tasks and of the activities
+    """
+
+    domain = dtp_config.get_domain()
+    element_class = dtp_config.get_object_type_conversion_map()['IfcWall']
+    asdesigned_iris = [domain + f'bench_asdesigned_{i}' for i in range(nb_elements)]
+    task_iris = [domain + f'bench_task_{i}' for i in range(math.ceil(nb_elements / ELEMENTS_PER_TASK))]
+    activity_iris = [domain + f'bench_activity_{i}' for i in range(math.ceil(len(task_iris) / TASKS_PER_ACTIVITY))]
+
+    def node(iri, classes, edge_type, targets, **fields):
+        return {'_domain': domain, '_iri': iri, '_classes': classes, **fields,
+                '_outE': [{'_label': dtp_config.get_ontology_uri(edge_type), '_targetIRI': target}
+                          for target in targets]}
+
+    nodes = [node(iri, [element_class, dtp_config.get_ontology_uri('classElement')], 'hasTarget', [],
+                  **{dtp_config.get_ontology_uri('isAsDesigned'): True,
+                     dtp_config.get_ontology_uri('hasElementType'): element_class, 'ifc:Class': 'IfcWall'})
+             for iri in asdesigned_iris]
+    nodes += [node(iri, [dtp_config.get_ontology_uri('task')], 'hasTarget',
+                   asdesigned_iris[i * ELEMENTS_PER_TASK: (i + 1) * ELEMENTS_PER_TASK])
+              for i, iri in enumerate(task_iris)]
+    nodes += [node(iri, [dtp_config.get_ontology_uri('activity')], 'hasTask',
+                   task_iris[i * TASKS_PER_ACTIVITY: (i + 1) * TASKS_PER_ACTIVITY])
+              for i, iri in enumerate(activity_iris)]
+    graph.add_nodes(nodes)
+    return asdesigned_iris, task_iris, activity_iris
+
+
+def create_session_logger(name, session_file):
+    formatter = logging.Formatter('%(asctime)s : %(message)s', datefmt='%d-%b-%y %H:%M:%S')
+    handler = logging.FileHandler(session_file)
+    handler.setFormatter(formatter)
+    session_logger = logging.getLogger(name)
+    session_logger.setLevel(logging.INFO)
+    session_logger.propagate = False
+    session_logger.addHandler(handler)
+    return session_logger, handler
+
+
+def run_size(size, nb_ops, args, work_dir):
+    """
+    The function benchmarks all the operations against a fresh server holding size As-Built nodes
+    and the as-planned graph they are linked to, see add_asplanned_nodes.
+
+    Parameters
+    ----------
+    size : int, obligatory
+        the number of As-Built nodes loaded before the measurements
+    nb_ops : int, obligatory
+        the number of calls of the per-node operations
+    args : Namespace, obligatory
+        the command line arguments
+    work_dir : str, obligatory
+        the directory for the configuration and the session log
+
+    Returns
+    ------
+    list
+        the results of the benchmarks
+    """
+
+    results = []
+    server = LocalDTPServer(latency=args.latency, jitter=args.jitter, page_size=args.page_size,
+                            max_page_size=max(args.page_size, 1000))
+    with server:
+        dtp_config = DTPConfig(server.write_config(os.path.join(work_dir, f'bench_config_{size}.xml')))
+        # the cache is disabled, so every get_uuid_for_iri call reaches the server
+        dtp_api = TimedDTPApi(dtp_config, pool_maxsize=args.workers, iri_cache_size=0)
+        domain = dtp_config.get_domain()
+        timestamp = get_timestamp_dtp_format(datetime.now())
+        element_type = dtp_config.get_object_type_conversion_map()['IfcWall']
+        defect_class = dtp_config.get_ontology_uri('GeometricDefect')
+
+        asdesigned_iris, task_iris, activity_iris = add_asplanned_nodes(server.graph, dtp_config, size)
+
+        asbuilt_iris = [domain + f'bench_asbuilt_{i}' for i in range(size)]
+        with dtp_api.batch_writer(max_nodes=1000):
+            for asbuilt_iri, asdesigned_iri in zip(asbuilt_iris, asdesigned_iris):
+                dtp_api.create_asbuilt_node(asbuilt_iri, 100, timestamp, element_type, asdesigned_iri)
+            # an operation per activity, the actions created below are linked to them
+            oper_iris = [domain + f'bench_oper_{i}' for i in range(len(activity_iris))]
+            for oper_iri, activity_iri in zip(oper_iris, activity_iris):
+                dtp_api.create_operation_node('bench', oper_iri, activity_iri, [], timestamp, timestamp)
+
+        results.append(measure(dtp_api, 'query_all_pages', size,
+                               lambda: len(dtp_api.query_all_pages(dtp_api.fetch_asbuilt_nodes)['items']) and 1))
+
+        sampled_iris = random.choices(asbuilt_iris, k=nb_ops)
+        results.append(measure(dtp_api, 'get_uuid_for_iri', size,
+                               lambda: sum(1 for iri in sampled_iris if dtp_api.get_uuid_for_iri(iri))))
+
+        session_file = os.path.join(work_dir, f'bench_session_{size}.log')
+        session_logger, handler = create_session_logger(f'bench_session_{size}', session_file)
+        dtp_api.init_external_logger(session_logger)
+
+        new_iris = [domain + f'bench_new_{i}' for i in range(nb_ops)]
+
+        def create_nodes():
+            # defects of the as-built elements and actions of the tasks targeting them
+            for i, iri in enumerate(new_iris):
+                if i % 2:
+                    dtp_api.create_defect_node(defect_class, iri, 'minor', timestamp, 'bench')
+                else:
+                    dtp_api.create_action_node('bench', iri, task_iris[(i % size) // ELEMENTS_PER_TASK],
+                                               asbuilt_iris[i % size], 'bench', timestamp, timestamp)
+            return nb_ops
+
+        results.append(measure(dtp_api, 'create_*', size, create_nodes))
+
+        def link_nodes():
+            for i, iri in enumerate(new_iris):
+                if i % 2:
+                    dtp_api.link_node_element_to_defect(asbuilt_iris[i % size], iri)
+                else:
+                    activity_index = (i % size) // (ELEMENTS_PER_TASK * TASKS_PER_ACTIVITY)
+                    dtp_api.link_node_operation_to_action(oper_iris[activity_index], iri)
+            return nb_ops
+
+        results.append(measure(dtp_api, 'link_*', size, link_nodes))
+
+        session_logger.removeHandler(handler)
+        handler.close()
+        dtp_api.init_external_logger(None)
+
+        results.append(measure(dtp_api, 'revert_last_session', size,
+                               lambda: dtp_api.revert_last_session(session_file) or 1))
+        dtp_api.close()
+    return results
+
+
+def parse_args():
+    """
+    Get parameters from user
+    """
+    parser = argparse.ArgumentParser(description='Benchmark DTPApi against a local stand-in of the DTP')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='numbers of nodes loaded on the server')
+    parser.add_argument('--ops', type=int, default=1000,
+                        help='number of calls of get_uuid_for_iri, create_* and link_* per size')
+    parser.add_argument('--page_size', type=int, default=100, help='number of items per page of the server')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay added by the server in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random extra delay in seconds')
+    parser.add_argument('--workers', type=int, default=10, help='size of the connection pool')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the sampled IRIs')
+    parser.add_argument('--output', '-o', type=str, default='bench_results.json', help='path to the JSON results')
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': []
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes:
+            report['results'].extend(run_size(size, min(args.ops, size), args, work_dir))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print('Results written to:', args.output)
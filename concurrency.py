@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import collections
+import threading
+import time
+
+from helpers import logger_global
+
+
+class AdaptiveConcurrencyController:
+    """
+    The class limits the number of requests in flight with an AIMD window, as TCP congestion control does.
+    The window grows by about one request per window of successful requests while the latency stays close
+    to the lowest recent latency, and it is multiplied by decrease_factor on a 429 or 5xx response,
+    a connection error or a latency spike. Requests above the window wait for a free slot.
+
+    The lowest recent latency is kept per API type, e.g. get_find_elements or count_nodes, so a slow endpoint
+    is compared with its own latencies and not with the fastest endpoint of a mixed workload.
+
+    Usage
+    -----
+    controller = AdaptiveConcurrencyController(max_window=32)
+    dtp_api = DTPApi(dtp_config, pool_maxsize=32, concurrency_controller=controller)
+    nodes = dtp_api.query_all_pages_parallel(dtp_api.fetch_element_nodes, max_workers=32)
+    print(controller.window)
+
+    Attributes
+    ----------
+    min_window : int
+        the lowest window
+    max_window : int
+        the highest window, it should not exceed the number of workers and pooled connections
+    decrease_factor : float
+        the factor applied to the window on a failure, between 0 and 1
+    latency_tolerance : float
+        a latency above latency_tolerance times the lowest recent latency of the same API type is a spike
+    latency_floor : float
+        the latencies below latency_floor seconds are never spikes, it filters out the jitter of fast requests
+    window : int
+        the current number of requests allowed in flight
+    in_flight : int
+        the number of requests in flight
+
+    Methods
+    -------
+    acquire()
+        None, waits for a free slot
+    release(latency, failed, api_name)
+        None
+    stats()
+        returns dictionary
+    """
+
+    def __init__(self, initial_window=4, min_window=1, max_window=64, decrease_factor=0.5, latency_tolerance=2.0,
+                 latency_floor=0.01, latency_samples=100):
+        """
+        Parameters
+        ----------
+        initial_window : int, optional
+            the number of requests allowed in flight at the start
+        min_window : int, optional
+            the lowest window
+        max_window : int, optional
+            the highest window
+        decrease_factor : float, optional
+            the factor applied to the window on a failure, between 0 and 1
+        latency_tolerance : float, optional
+            a latency above latency_tolerance times the lowest recent latency is a spike
+        latency_floor : float, optional
+            the latencies below latency_floor seconds are never spikes
+        latency_samples : int, optional
+            the number of recent latencies of an API type whose minimum is its reference latency
+        """
+
+        if not 1 <= min_window <= initial_window <= max_window:
+            raise Exception("Sorry, the windows have to satisfy: 1 <= min_window <= initial_window <= max_window.")
+        if not 0 < decrease_factor < 1:
+            raise Exception("Sorry, the decrease factor has to be between 0 and 1.")
+
+        self.min_window = min_window
+        self.max_window = max_window
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor = latency_floor
+        self.in_flight = 0
+        self.nb_increases = 0
+        self.nb_decreases = 0
+        self.__limit = float(initial_window)
+        self.latency_samples = latency_samples
+        self.__latencies = {}  # API type -> recent latencies
+        self.__last_decrease = 0.0
+        self.__condition = threading.Condition()
+
+    @property
+    def window(self):
+        return int(self.__limit)
+
+    def acquire(self):
+        """
+        The method waits until the number of requests in flight is below the window and takes a slot.
+        """
+
+        with self.__condition:
+            while self.in_flight >= int(self.__limit):
+                self.__condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, failed=False, api_name=None):
+        """
+        The method frees a slot and adapts the window to the outcome of the request.
+
+        Parameters
+        ----------
+        latency : float, obligatory
+            the duration of the request in seconds
+        failed : bool, optional
+            True if the request failed because of the load, i.e. 429, 5xx or a connection error
+        api_name : str, optional
+            the API type of the request, see DTPConfig.get_api_name, its latencies are the reference of the spikes
+        """
+
+        with self.__condition:
+            self.in_flight -= 1
+            latencies = self.__latencies.get(api_name)
+            if latencies is None:
+                latencies = self.__latencies[api_name] = collections.deque(maxlen=self.latency_samples)
+            reference = min(latencies) if latencies else latency
+            latencies.append(latency)
+            spike = latency > max(self.latency_floor, self.latency_tolerance * reference)
+
+            now = time.monotonic()
+            if failed or spike:
+                # the requests sent before the last decrease report the same congestion, they are not counted twice
+                if now - self.__last_decrease > latency:
+                    old_window = self.window
+                    self.__limit = max(float(self.min_window), self.__limit * self.decrease_factor)
+                    self.__last_decrease = now
+                    self.nb_decreases += 1
+                    if self.window != old_window:
+                        logger_global.info('Concurrency window decreased to ' + str(self.window) +
+                                           (' after a failure.' if failed else ' after a latency spike.'))
+            elif self.__limit < self.max_window:
+                old_window = self.window
+                self.__limit = min(float(self.max_window), self.__limit + 1.0 / self.__limit)
+                if self.window != old_window:
+                    self.nb_increases += 1
+            self.__condition.notify_all()
+
+    def stats(self):
+        """
+        The method returns the state of the controller.
+
+        Returns
+        ------
+        dictionary
+            window, in_flight, the reference (lowest recent) latency in seconds by API type, nb_increases
+            and nb_decreases
+        """
+
+        with self.__condition:
+            return {'window': self.window, 'in_flight': self.in_flight,
+                    'reference_latencies': {api_name: min(latencies) for api_name, latencies in
+                                            self.__latencies.items() if latencies},
+                    'nb_increases': self.nb_increases, 'nb_decreases': self.nb_decreases}
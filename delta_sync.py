@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+# the fields compared with the watermarks, ontology types of DTP_config.xml or raw field names,
+# e.g. a modification date maintained by the platform
+WATERMARK_FIELDS = ('timeStamp', 'processStart', 'processEnd')
+
+
+def _kind(value):
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return 'number'
+    return None
+
+
+def get_field_uri(dtp_config, field):
+    try:
+        return dtp_config.get_ontology_uri(field)
+    except KeyError:
+        return field
+
+
+def class_query(dtp_config, class_uri, filters=None):
+    query = {
+        "$domain": dtp_config.get_domain(),
+        "$classes": {
+            "$contains": class_uri,
+            "$inheritance": True
+        }
+    }
+    query.update(filters or {})
+    return {"query": query}
+
+
+def iter_class_pages(dtp_api, class_uri, filters=None, read_ahead=None):
+    """
+    The function yields the pages of the nodes of a class, including its subclasses, sent by the platform.
+
+    Parameters
+    ----------
+    dtp_api : DTPApi, obligatory
+        the instance used to query the platform
+    class_uri : str, obligatory
+        the URI of the class
+    filters : dictionary, optional
+        additional conditions on the fields of the nodes, e.g. {field_uri: {"$gte": watermark}}
+    read_ahead : int, optional
+        the number of prefetched pages, see DTPApi.iter_pages
+
+    Returns
+    ------
+    generator
+        dictionaries created from JSON, one per page
+    """
+
+    payload = dtp_api.json_codec.dumps(class_query(dtp_api.DTP_CONFIG, class_uri, filters))
+
+    def find_class(url=None):
+        req_url = dtp_api.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
+        return dtp_api.json_codec.loads(dtp_api.post_general_request(payload, req_url).content)
+
+    return dtp_api.iter_pages(find_class, read_ahead=read_ahead)
+
+
+def count_class_nodes(dtp_api, class_uri):
+    payload = dtp_api.json_codec.dumps(class_query(dtp_api.DTP_CONFIG, class_uri))
+    output = dtp_api.post_general_request(payload, dtp_api.DTP_CONFIG.get_api_url('count_nodes'))
+    return int(dtp_api.json_codec.loads(output.content)['total_items'])
+
+
+class DeltaSync:
+    """
+    The class keeps the sync watermarks of a local copy of DTP nodes: for every class and watermark field,
+    the highest value of the field among the nodes copied so far. The nodes changed since the last sync
+    are queried with a condition field >= watermark, so a sync costs a request per page of changed nodes
+    instead of a full crawl. The watermarks come from the copied nodes, not from the local clock.
+
+    The nodes without any watermark field are not seen by the delta queries, the owner of the copy
+    compares the number of nodes of their class to detect the additions and deletions, see count_class_nodes.
+
+    Only the changes which advance a watermark field are seen. The edges added by the link_* methods and
+    the updates of the other fields do not change the watermark fields of the nodes, so they are not seen:
+    the owner of the copy has to crawl the classes again to get them, e.g. GraphMirror.sync(full=True).
+
+    Usage
+    -----
+    delta_sync = DeltaSync()
+    for page in iter_class_pages(dtp_api, class_uri):
+        local_copy.store(page['items'])
+        delta_sync.observe(dtp_api.DTP_CONFIG, class_uri, page['items'])
+
+    # later
+    for page in delta_sync.iter_changed_pages(dtp_api, class_uri):
+        local_copy.store(page['items'])
+        delta_sync.observe(dtp_api.DTP_CONFIG, class_uri, page['items'])
+
+    Attributes
+    ----------
+    fields : tuple
+        the watermark fields, ontology types or raw field names
+    watermarks : dictionary
+        map from class URIs to maps from field URIs to the watermarks
+
+    Methods
+    -------
+    observe(dtp_config, class_uri, nodes)
+        None
+    iter_changed_pages(dtp_api, class_uri, read_ahead)
+        yields dictionaries created from JSON, one per page
+    """
+
+    def __init__(self, fields=WATERMARK_FIELDS, watermarks=None):
+        """
+        Parameters
+        ----------
+        fields : tuple, optional
+            the watermark fields, ontology types of DTP_config.xml or raw field names
+        watermarks : dictionary, optional
+            the watermarks of an earlier sync, e.g. loaded with a local copy
+        """
+
+        self.fields = tuple(fields)
+        self.watermarks = {class_uri: dict(marks) for class_uri, marks in (watermarks or {}).items()}
+
+    def observe(self, dtp_config, class_uri, nodes):
+        """
+        The method advances the watermarks of a class with nodes copied from the platform.
+
+        Parameters
+        ----------
+        dtp_config : DTPConfig, obligatory
+            the configuration resolving the ontology types of the fields
+        class_uri : str, obligatory
+            the URI of the class the nodes were queried with
+        nodes : list, obligatory
+            the copied nodes
+        """
+
+        marks = self.watermarks.setdefault(class_uri, {})
+        for field in self.fields:
+            field_uri = get_field_uri(dtp_config, field)
+            values = [node[field_uri] for node in nodes if _kind(node.get(field_uri)) is not None]
+            # the strings and the numbers cannot be compared, the values of the kind of the watermark are kept
+            kind = _kind(marks[field_uri]) if field_uri in marks else (_kind(values[0]) if values else None)
+            values = [value for value in values if _kind(value) == kind]
+            if values:
+                highest = max(values)
+                if field_uri not in marks or highest > marks[field_uri]:
+                    marks[field_uri] = highest
+
+    def iter_changed_pages(self, dtp_api, class_uri, read_ahead=None):
+        """
+        The method yields the pages of the nodes of a class whose watermark fields reached the watermarks.
+        A node changed in many fields can be sent more than once, the nodes at the watermarks are sent again.
+
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to query the platform
+        class_uri : str, obligatory
+            the URI of the class
+        read_ahead : int, optional
+            the number of prefetched pages, see DTPApi.iter_pages
+
+        Returns
+        ------
+        generator
+            dictionaries created from JSON, one per page
+        """
+
+        marks = dict(self.watermarks.get(class_uri, {}))
+        for field in self.fields:
+            field_uri = get_field_uri(dtp_api.DTP_CONFIG, field)
+            if field_uri in marks:
+                # the comparison includes the watermark, the nodes written in the same second are not missed
+                yield from iter_class_pages(dtp_api, class_uri, {field_uri: {"$gte": marks[field_uri]}}, read_ahead)
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from helpers import logger_global
+
+
+class NodeBatchWriter:
+    """
+    The class collects new nodes and sends them to the add_node endpoint, which accepts
+    a JSON array, in batches limited by the number of nodes and by the payload size.
+    A session log line is written for every created node, so the batches can be reverted.
+
+    Attributes
+    ----------
+    max_nodes : int
+        the maximum number of nodes per request
+    max_bytes : int
+        the maximum size of the JSON payload of a request in bytes
+    nb_requests : int
+        the number of requests sent so far
+    nb_created : int
+        the number of nodes created so far
+    failed_iris : list
+        the IRIs of the nodes from the batches rejected by the platform
+
+    Methods
+    -------
+    add(node, log_marker)
+        None
+    flush()
+        returns bool, True if success and False otherwise
+    """
+
+    def __init__(self, dtp_api, max_nodes=500, max_bytes=4 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to send the batches
+        max_nodes : int, optional
+            the maximum number of nodes per request
+        max_bytes : int, optional
+            the maximum size of the JSON payload of a request in bytes,
+            a single node larger than the limit is sent alone
+        """
+
+        if max_nodes < 1 or max_bytes < 1:
+            raise Exception("Sorry, the batch limits have to be positive numbers.")
+
+        self.dtp_api = dtp_api
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.nb_requests = 0
+        self.nb_created = 0
+        self.failed_iris = []
+        self.__encoded_nodes = []
+        self.__logged_nodes = []
+        self.__nb_bytes = 2  # the enclosing brackets
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.__encoded_nodes)
+
+    def add(self, node, log_marker):
+        """
+        The method queues a new node, the pending nodes are sent first if the node does not fit in the batch.
+
+        Parameters
+        ----------
+        node : dictionary, obligatory
+            the node to be created
+        log_marker : str, obligatory
+            the session log marker of the node class, e.g. NEW_ELEMENT_IRI
+        """
+
+        encoded_node = self.dtp_api.json_codec.dumps(node)
+        with self.__lock:
+            if self.__encoded_nodes and (len(self.__encoded_nodes) >= self.max_nodes or
+                                         self.__nb_bytes + len(encoded_node) + 1 > self.max_bytes):
+                self.flush()
+            self.__encoded_nodes.append(encoded_node)
+            self.__logged_nodes.append((node['_iri'], log_marker))
+            self.__nb_bytes += len(encoded_node) + 1
+
+    def flush(self):
+        """
+        The method sends all the pending nodes in a single request.
+
+        Returns
+        ------
+        bool
+            True if the nodes have been created or there was nothing to send, and False otherwise
+        """
+
+        with self.__lock:
+            if not self.__encoded_nodes:
+                return True
+
+            payload = b'[' + b','.join(self.__encoded_nodes) + b']'
+            logged_nodes = self.__logged_nodes
+            self.__encoded_nodes = []
+            self.__logged_nodes = []
+            self.__nb_bytes = 2
+
+            with self.dtp_api.trace_span('flush_nodes', batch_size=len(logged_nodes), batch_bytes=len(payload)):
+                response = self.dtp_api.post_guarded_request(payload=payload,
+                                                             url=self.dtp_api.DTP_CONFIG.get_api_url('add_node'))
+            self.nb_requests += 1
+            if self.dtp_api.simulation_mode:
+                return True
+
+            if response.ok:
+                self.nb_created += len(logged_nodes)
+                for iri, log_marker in logged_nodes:
+                    self.dtp_api.iri_cache.invalidate(iri)
+                    if self.dtp_api.session_logger is not None:
+                        self.dtp_api.session_logger.info("DTP_API - " + log_marker + ": " + iri)
+                return True
+            else:
+                self.failed_iris.extend(iri for iri, _ in logged_nodes)
+                logger_global.error("Creating a batch of " + str(len(logged_nodes)) +
+                                    " new elements failed. Response code: " + str(response.status_code))
+                return False
+
+
+class LinkBatcher:
+    """
+    The class collects new edges between nodes and sends them to the update_set endpoint in batches.
+    The pending edges are grouped by their source node into a single _outE array and many source nodes
+    are packed into one request, limited by the number of nodes and by the payload size.
+    A session log line is written for every edge, as for the edges linked one by one.
+
+    Attributes
+    ----------
+    max_nodes : int
+        the maximum number of source nodes per request
+    max_bytes : int
+        the approximate maximum size of the JSON payload of a request in bytes
+    nb_requests : int
+        the number of requests sent so far
+    nb_linked : int
+        the number of edges created so far
+    failed_links : list
+        the (source IRI, label, target IRI) tuples from the batches rejected by the platform
+
+    Methods
+    -------
+    add(label, source_iri, target_iri, log_marker)
+        None
+    flush()
+        returns bool, True if success and False otherwise
+    """
+
+    def __init__(self, dtp_api, max_nodes=500, max_bytes=4 * 1024 * 1024):
+        """
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to send the batches
+        max_nodes : int, optional
+            the maximum number of source nodes per request
+        max_bytes : int, optional
+            the approximate maximum size of the JSON payload of a request in bytes
+        """
+
+        if max_nodes < 1 or max_bytes < 1:
+            raise Exception("Sorry, the batch limits have to be positive numbers.")
+
+        self.dtp_api = dtp_api
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.nb_requests = 0
+        self.nb_linked = 0
+        self.failed_links = []
+        self.__edges = OrderedDict()  # source IRI -> list of (label, target IRI, log marker)
+        self.__nb_bytes = 2
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return sum(len(edges) for edges in self.__edges.values())
+
+    def add(self, label, source_iri, target_iri, log_marker):
+        """
+        The method queues a new edge, the pending edges are sent first if the edge does not fit in the batch.
+
+        Parameters
+        ----------
+        label : str, obligatory
+            the ontology URI of the edge
+        source_iri : str, obligatory
+            a valid IRI of the node the edge starts from
+        target_iri : str, obligatory
+            a valid IRI of the node the edge points to
+        log_marker : str, obligatory
+            the session log marker of the link, e.g. NEW_LINK_ELEMENT_DEFECT
+        """
+
+        # the field names and the JSON punctuation are included in the estimates
+        edge_bytes = len(label) + len(target_iri) + 32
+        node_bytes = len(self.dtp_api.DTP_CONFIG.get_domain()) + len(source_iri) + 48
+
+        with self.__lock:
+            is_new_node = source_iri not in self.__edges
+            nb_bytes = edge_bytes + node_bytes if is_new_node else edge_bytes
+            if self.__edges and ((is_new_node and len(self.__edges) >= self.max_nodes) or
+                                 self.__nb_bytes + nb_bytes > self.max_bytes):
+                self.flush()
+                nb_bytes = edge_bytes + node_bytes
+            self.__edges.setdefault(source_iri, []).append((label, target_iri, log_marker))
+            self.__nb_bytes += nb_bytes
+
+    def flush(self):
+        """
+        The method sends all the pending edges in a single request.
+
+        Returns
+        ------
+        bool
+            True if the edges have been created or there was nothing to send, and False otherwise
+        """
+
+        with self.__lock:
+            if not self.__edges:
+                return True
+
+            pending_edges = self.__edges
+            self.__edges = OrderedDict()
+            self.__nb_bytes = 2
+
+            payload = self.dtp_api.json_codec.dumps([{
+                "_domain": self.dtp_api.DTP_CONFIG.get_domain(),
+                "_iri": source_iri,
+                "_outE": [{
+                    "_label": label,
+                    "_targetIRI": target_iri
+                } for label, target_iri, _ in edges]
+            } for source_iri, edges in pending_edges.items()])
+
+            with self.dtp_api.trace_span('flush_links', batch_size=sum(len(edges) for edges in pending_edges.values()),
+                                         batch_bytes=len(payload)):
+                response = self.dtp_api.put_guarded_request(payload=payload,
+                                                            url=self.dtp_api.DTP_CONFIG.get_api_url('update_set'))
+            self.nb_requests += 1
+            if self.dtp_api.simulation_mode:
+                return True
+
+            if response.ok:
+                for source_iri, edges in pending_edges.items():
+                    self.nb_linked += len(edges)
+                    if self.dtp_api.session_logger is not None:
+                        for _, target_iri, log_marker in edges:
+                            self.dtp_api.session_logger.info(
+                                "DTP_API - " + log_marker + ": " + source_iri + ', ' + target_iri)
+                return True
+            else:
+                self.failed_links.extend((source_iri, label, target_iri)
+                                         for source_iri, edges in pending_edges.items()
+                                         for label, target_iri, _ in edges)
+                logger_global.error("Linking a batch of " + str(len(pending_edges)) +
+                                    " nodes failed. Response code: " + str(response.status_code))
+                return False
+
+
+class BatchAPI:
+    """
+    Mixin batch API class contains methods grouping many write operations into a few requests.
+
+    Methods
+    -------
+    batch_writer(max_nodes, max_bytes)
+        context manager, returns NodeBatchWriter
+    link_batcher(max_nodes, max_bytes)
+        context manager, returns LinkBatcher
+    """
+
+    @contextmanager
+    def batch_writer(self, max_nodes=500, max_bytes=4 * 1024 * 1024):
+        """
+        The method returns a context manager within which the create_* methods queue the new nodes
+        instead of sending them. The nodes are sent in batches, the last one when the context is left.
+
+        Usage
+        -----
+        with dtp_api.batch_writer(max_nodes=1000) as batch:
+            for element in elements:
+                dtp_api.create_asbuilt_node(...)
+        print(batch.nb_created, batch.failed_iris)
+
+        Parameters
+        ----------
+        max_nodes : int, optional
+            the maximum number of nodes per request
+        max_bytes : int, optional
+            the maximum size of the JSON payload of a request in bytes
+
+        Returns
+        ------
+        NodeBatchWriter
+            the active batch writer
+        """
+
+        if self.node_batch is not None:
+            raise Exception("Sorry, a batch writer is already active.")
+
+        self.node_batch = NodeBatchWriter(self, max_nodes=max_nodes, max_bytes=max_bytes)
+        try:
+            yield self.node_batch
+        finally:
+            batch, self.node_batch = self.node_batch, None
+            batch.flush()
+
+    @contextmanager
+    def link_batcher(self, max_nodes=500, max_bytes=4 * 1024 * 1024):
+        """
+        The method returns a context manager within which the link_node_* methods linking two nodes
+        (all of them except link_node_element_to_blob) queue the new edges instead of sending them.
+        The edges are sent in batches grouped by source node, the last batch when the context is left.
+
+        Usage
+        -----
+        with dtp_api.link_batcher() as links:
+            for oper_iri, action_iri in pairs:
+                dtp_api.link_node_operation_to_action(oper_iri, action_iri)
+        print(links.nb_linked, links.failed_links)
+
+        Parameters
+        ----------
+        max_nodes : int, optional
+            the maximum number of source nodes per request
+        max_bytes : int, optional
+            the approximate maximum size of the JSON payload of a request in bytes
+
+        Returns
+        ------
+        LinkBatcher
+            the active link batcher
+        """
+
+        if self.link_batch is not None:
+            raise Exception("Sorry, a link batcher is already active.")
+
+        self.link_batch = LinkBatcher(self, max_nodes=max_nodes, max_bytes=max_bytes)
+        try:
+            yield self.link_batch
+        finally:
+            batch, self.link_batch = self.link_batch, None
+            batch.flush()
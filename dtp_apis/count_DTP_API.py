@@ -4,12 +4,11 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
-import json
-
 
 class CountAPI:
     """
-    Mixin count API class contains all count methods.
+    Mixin count API class contains all count methods. The counts are answered by the node_index
+    of the instance if it indexed all the counted nodes, see node_index.NodeIndex.count_neighbours.
 
     Methods
     -------
@@ -21,6 +20,12 @@ class CountAPI:
         returns dictionary created from JSON
     """
 
+    def __count_indexed(self, node_iri, label, direction, class_type, fields=None):
+        if self.node_index is None:
+            return None
+        return self.node_index.count_neighbours(node_iri, self.DTP_CONFIG.get_ontology_uri(label), direction,
+                                                self.DTP_CONFIG.get_ontology_uri(class_type), fields)
+
     def activity_count_connected_task_nodes(self, activity_node_iri):
         """
         The method counts task nodes connected to a node identified by activity_node_iri
@@ -36,7 +41,11 @@ class CountAPI:
             return the number of task nodes connected to the node identified by activity_node_iri
         """
 
-        payload = json.dumps({
+        count = self.__count_indexed(activity_node_iri, 'hasTask', '->', 'task')
+        if count is not None:
+            return count
+
+        payload = self.json_codec.dumps({
             "query": [{
                 "$domain": self.DTP_CONFIG.get_domain(),
                 "$iri": activity_node_iri,
@@ -58,7 +67,7 @@ class CountAPI:
         })
 
         output = self.post_general_request(payload=payload, url=self.DTP_CONFIG.get_api_url('count_nodes'))
-        return int(output.json()['total_items'])
+        return int(self.json_codec.loads(output.content)['total_items'])
 
     def asdesigned_count_connected_asbuilt_nodes(self, node_iri):
         """
@@ -79,7 +88,12 @@ class CountAPI:
             return the number of defect nodes connected to the node identified by node_iri
         """
 
-        payload = json.dumps({
+        count = self.__count_indexed(node_iri, 'intentStatusRelation', '<-', 'classElement',
+                                     {self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False})
+        if count is not None:
+            return count
+
+        payload = self.json_codec.dumps({
             "query": [{
                 "$domain": self.DTP_CONFIG.get_domain(),
                 "$iri": node_iri,
@@ -102,7 +116,7 @@ class CountAPI:
         })
 
         output = self.post_general_request(payload=payload, url=self.DTP_CONFIG.get_api_url('count_nodes'))
-        return int(output.json()['total_items'])
+        return int(self.json_codec.loads(output.content)['total_items'])
 
     def asbuilt_count_connected_geomdefect_nodes(self, asbuilt_node_iri):
         """
@@ -123,7 +137,11 @@ class CountAPI:
             return the number of defect nodes connected to the node identified by node_iri
         """
 
-        payload = json.dumps({
+        count = self.__count_indexed(asbuilt_node_iri, 'hasGeometricDefect', '->', 'GeometricDefect')
+        if count is not None:
+            return count
+
+        payload = self.json_codec.dumps({
             "query": [{
                 "$domain": self.DTP_CONFIG.get_domain(),
                 "$iri": asbuilt_node_iri,
@@ -145,4 +163,4 @@ class CountAPI:
         })
 
         output = self.post_general_request(payload=payload, url=self.DTP_CONFIG.get_api_url('count_nodes'))
-        return int(output.json()['total_items'])
+        return int(self.json_codec.loads(output.content)['total_items'])
@@ -4,7 +4,6 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
-import json
 import secrets
 
 import validators
@@ -14,7 +13,8 @@ from helpers import logger_global
 
 class CreateAPI:
     """
-    Mixin create API class contains all create methods.
+    Mixin create API class contains all create methods. When a batch writer is active (see BatchAPI),
+    the new nodes are queued and sent in batches instead of one request per node.
 
     Methods
     -------
@@ -37,6 +37,41 @@ class CreateAPI:
         returns bool, True if success and False otherwise
     """
 
+    def __add_node(self, node, log_marker):
+        """
+        The method sends a new node to the platform or, if a batch writer is active, queues it.
+
+        Parameters
+        ----------
+        node : dictionary, obligatory
+            the node to be created
+        log_marker : str, obligatory
+            the session log marker of the node class, see log_markers_node_classes
+
+        Returns
+        ------
+        bool
+            True if the node has been created or queued, and False otherwise
+        """
+
+        if self.node_batch is not None:
+            self.node_batch.add(node, log_marker)
+            return True
+
+        payload = self.json_codec.dumps([node])
+
+        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
+        if not self.simulation_mode:
+            if response.ok:
+                self.iri_cache.invalidate(node['_iri'])
+                if self.session_logger is not None:
+                    self.session_logger.info("DTP_API - " + log_marker + ": " + node['_iri'])
+                return True
+            else:
+                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
+                return False
+        return True
+
     def create_asbuilt_node(self, element_iri_uri, progress, timestamp, element_type, target_iri):
         """
         The method creates a new As-Built element.
@@ -73,55 +108,42 @@ class CreateAPI:
             raise Exception("Sorry, the target IRI is not a valid URL.")
 
         if progress == 100:
-            payload = json.dumps([
-                {
-                    "_classes": [self.DTP_CONFIG.get_ontology_uri('classElement')],
-                    "_domain": self.DTP_CONFIG.get_domain(),
-                    "_iri": element_iri_uri,
-                    "_visibility": 0,
-                    self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False,
-                    self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
-                    self.DTP_CONFIG.get_ontology_uri('progress'): progress,
-                    self.DTP_CONFIG.get_ontology_uri('hasElementType'): element_type,
-                    self.DTP_CONFIG.get_ontology_uri('hasGeometryStatusType'): self.DTP_CONFIG.get_ontology_uri(
-                        'CompletelyDetected'),
-                    "_outE": [
-                        {
-                            "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
-                            "_targetIRI": target_iri
-                        }
-                    ]
-                }
-            ])
+            node = {
+                "_classes": [self.DTP_CONFIG.get_ontology_uri('classElement')],
+                "_domain": self.DTP_CONFIG.get_domain(),
+                "_iri": element_iri_uri,
+                "_visibility": 0,
+                self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False,
+                self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
+                self.DTP_CONFIG.get_ontology_uri('progress'): progress,
+                self.DTP_CONFIG.get_ontology_uri('hasElementType'): element_type,
+                self.DTP_CONFIG.get_ontology_uri('hasGeometryStatusType'): self.DTP_CONFIG.get_ontology_uri(
+                    'CompletelyDetected'),
+                "_outE": [
+                    {
+                        "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
+                        "_targetIRI": target_iri
+                    }
+                ]
+            }
         else:
-            payload = json.dumps([
-                {
-                    "_classes": [self.DTP_CONFIG.get_ontology_uri('classElement')],
-                    "_domain": self.DTP_CONFIG.get_domain(),
-                    "_iri": element_iri_uri,
-                    self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False,
-                    self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
-                    self.DTP_CONFIG.get_ontology_uri('progress'): progress,
-                    self.DTP_CONFIG.get_ontology_uri('hasElementType'): element_type,
-                    "_outE": [
-                        {
-                            "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
-                            "_targetIRI": target_iri
-                        }
-                    ]
-                }
-            ])
+            node = {
+                "_classes": [self.DTP_CONFIG.get_ontology_uri('classElement')],
+                "_domain": self.DTP_CONFIG.get_domain(),
+                "_iri": element_iri_uri,
+                self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False,
+                self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
+                self.DTP_CONFIG.get_ontology_uri('progress'): progress,
+                self.DTP_CONFIG.get_ontology_uri('hasElementType'): element_type,
+                "_outE": [
+                    {
+                        "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
+                        "_targetIRI": target_iri
+                    }
+                ]
+            }
 
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_ELEMENT_IRI: " + element_iri_uri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__add_node(node, self.log_markers_node_classes['new_element'])
 
     def create_defect_node(self, defect_class, defect_node_iri, defect_criticality, timestamp, defect_type):
         """
@@ -149,28 +171,17 @@ class CreateAPI:
         if not validators.url(defect_node_iri):
             raise Exception("Sorry, the IRI is not a valid URL.")
 
-        payload = json.dumps([
-            {
-                "_classes": [defect_class],
-                "_domain": self.DTP_CONFIG.get_domain(),
-                "_iri": defect_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('hasDefectType'): defect_type,
-                self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
-                self.DTP_CONFIG.get_ontology_uri('defect_criticality'): defect_criticality
-            }
-        ])
+        node = {
+            "_classes": [defect_class],
+            "_domain": self.DTP_CONFIG.get_domain(),
+            "_iri": defect_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('hasDefectType'): defect_type,
+            self.DTP_CONFIG.get_ontology_uri('timeStamp'): timestamp,
+            self.DTP_CONFIG.get_ontology_uri('defect_criticality'): defect_criticality
+        }
 
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_DEFECT_IRI: " + defect_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__add_node(node, self.log_markers_node_classes['new_defect'])
 
     def create_kpi_node_defectsperwork(self, kpi_node_iri, task_type, value, ref_quant, sampl_quant, inter_start_date,
                                     inter_end_date):
@@ -178,31 +189,20 @@ class CreateAPI:
         if not validators.url(kpi_node_iri):
             raise Exception("Sorry, the IRI is not a valid URL.")
 
-        payload = json.dumps([
-            {
-                "_classes": [self.DTP_CONFIG.get_ontology_uri('kpiNumberOfDefectsPerWork')],
-                "_domain": self.DTP_CONFIG.get_kpi_domain(),
-                "_iri": kpi_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('kpiHasTaskType'): task_type,
-                self.DTP_CONFIG.get_ontology_uri('kpiValue'): value,
-                self.DTP_CONFIG.get_ontology_uri('kpiReferenceQuantity'): ref_quant,
-                self.DTP_CONFIG.get_ontology_uri('kpiSampleQuantity'): sampl_quant,
-                self.DTP_CONFIG.get_ontology_uri('kpiIntervalStartDate'): inter_start_date,
-                self.DTP_CONFIG.get_ontology_uri('kpiIntervalEndDate'): inter_end_date,
-            }
-        ])
-
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_KPI_IRI: " + kpi_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        node = {
+            "_classes": [self.DTP_CONFIG.get_ontology_uri('kpiNumberOfDefectsPerWork')],
+            "_domain": self.DTP_CONFIG.get_kpi_domain(),
+            "_iri": kpi_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('kpiHasTaskType'): task_type,
+            self.DTP_CONFIG.get_ontology_uri('kpiValue'): value,
+            self.DTP_CONFIG.get_ontology_uri('kpiReferenceQuantity'): ref_quant,
+            self.DTP_CONFIG.get_ontology_uri('kpiSampleQuantity'): sampl_quant,
+            self.DTP_CONFIG.get_ontology_uri('kpiIntervalStartDate'): inter_start_date,
+            self.DTP_CONFIG.get_ontology_uri('kpiIntervalEndDate'): inter_end_date,
+        }
+
+        return self.__add_node(node, self.log_markers_node_classes['new_kpi'])
 
     def create_action_node(self, task_type, action_node_iri, task_iri, target_as_built_iri, contractor,
                            process_start, process_end):
@@ -239,39 +239,28 @@ class CreateAPI:
         if not validators.url(action_node_iri):
             raise Exception("Sorry, the IRI is not a valid URL.")
 
-        payload = json.dumps([
-            {
-                "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedAction')],
-                "_domain": self.DTP_CONFIG.get_domain(),
-                "_iri": action_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('hasTaskType'): task_type,
-                self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
-                self.DTP_CONFIG.get_ontology_uri('processEnd'): process_end,
-                self.DTP_CONFIG.get_ontology_uri('constructionContractor'): contractor,
-                "_outE": [
-                    {
-                        "_label": self.DTP_CONFIG.get_ontology_uri('hasTarget'),
-                        "_targetIRI": target_as_built_iri
-                    },
-                    {
-                        "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
-                        "_targetIRI": task_iri
-                    }
-                ]
-            }
-        ])
+        node = {
+            "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedAction')],
+            "_domain": self.DTP_CONFIG.get_domain(),
+            "_iri": action_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('hasTaskType'): task_type,
+            self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
+            self.DTP_CONFIG.get_ontology_uri('processEnd'): process_end,
+            self.DTP_CONFIG.get_ontology_uri('constructionContractor'): contractor,
+            "_outE": [
+                {
+                    "_label": self.DTP_CONFIG.get_ontology_uri('hasTarget'),
+                    "_targetIRI": target_as_built_iri
+                },
+                {
+                    "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
+                    "_targetIRI": task_iri
+                }
+            ]
+        }
 
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_ACTION_IRI: " + action_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__add_node(node, self.log_markers_node_classes['new_action'])
 
     def create_operation_node(self, taskType, oper_node_iri, target_activity_iri, list_of_action_iri, process_start,
                               process_end):
@@ -315,38 +304,27 @@ class CreateAPI:
             }
             out_edge_to_actions.append(out_edge_dict)
 
-        payload = json.dumps([
-            {
-                "_domain": self.DTP_CONFIG.get_domain(),
-                "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedOperation')],
-                "_iri": oper_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('hasTaskType'): taskType,
-                self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
-                # TODO: update processEnd and add latest date to updateDate.
-                #  processEnd should be only filled when all action under it is complete. For now, processEnd stores
-                #  latest update date
-                self.DTP_CONFIG.get_ontology_uri('processEnd'): process_end,
-                "_outE": [
-                    {
-                        "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
-                        "_targetIRI": target_activity_iri
-                    },
-                    *out_edge_to_actions
-                ]
-            }
-        ])
+        node = {
+            "_domain": self.DTP_CONFIG.get_domain(),
+            "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedOperation')],
+            "_iri": oper_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('hasTaskType'): taskType,
+            self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
+            # TODO: update processEnd and add latest date to updateDate.
+            #  processEnd should be only filled when all action under it is complete. For now, processEnd stores
+            #  latest update date
+            self.DTP_CONFIG.get_ontology_uri('processEnd'): process_end,
+            "_outE": [
+                {
+                    "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
+                    "_targetIRI": target_activity_iri
+                },
+                *out_edge_to_actions
+            ]
+        }
 
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_OPERATION_IRI: " + oper_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__add_node(node, self.log_markers_node_classes['new_operation'])
 
     def create_construction_node(self, productionMethodType, constr_node_iri, workpkg_node_iri, list_of_operation_iri):
         """
@@ -385,60 +363,38 @@ class CreateAPI:
             }
             out_edge_to_operation.append(out_edge_dict)
 
-        payload = json.dumps([
-            {
-                "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedConstruction')],
-                "_domain": self.DTP_CONFIG.get_domain(),
-                "_iri": constr_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('hasProductionMethodType'): productionMethodType,
-                "_outE": [
-                    {
-                        "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
-                        "_targetIRI": workpkg_node_iri
-                    },
-                    *out_edge_to_operation
-                ]
-            }
-        ])
+        node = {
+            "_classes": [self.DTP_CONFIG.get_ontology_uri('asPerformedConstruction')],
+            "_domain": self.DTP_CONFIG.get_domain(),
+            "_iri": constr_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('hasProductionMethodType'): productionMethodType,
+            "_outE": [
+                {
+                    "_label": self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'),
+                    "_targetIRI": workpkg_node_iri
+                },
+                *out_edge_to_operation
+            ]
+        }
 
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_CONSTRUCTION_IRI: " + constr_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__add_node(node, self.log_markers_node_classes['new_constr'])
 
     def create_kpi_zerodefectwork(self, kpi_node_iri, value, ref_quant, sampl_quant, inter_start_date, inter_end_date):
 
         if not validators.url(kpi_node_iri):
             raise Exception("Sorry, the IRI: " + kpi_node_iri + " is not a valid URL.")
 
-        payload = json.dumps([
-            {
-                "_classes": [self.DTP_CONFIG.get_ontology_uri('kpiZeroDefectWork')],
-                "_domain": self.DTP_CONFIG.get_kpi_domain(),
-                "_iri": kpi_node_iri,
-                "_visibility": 0,
-                self.DTP_CONFIG.get_ontology_uri('kpiValue'): value,
-                self.DTP_CONFIG.get_ontology_uri('kpiReferenceQuantity'): ref_quant,
-                self.DTP_CONFIG.get_ontology_uri('kpiSampleQuantity'): sampl_quant,
-                self.DTP_CONFIG.get_ontology_uri('kpiIntervalStartDate'): inter_start_date,
-                self.DTP_CONFIG.get_ontology_uri('kpiIntervalEndDate'): inter_end_date,
-            }
-        ])
-
-        response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('add_node'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info("DTP_API - NEW_KPI_IRI: " + kpi_node_iri)
-                return True
-            else:
-                logger_global.error("Creating new element failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        node = {
+            "_classes": [self.DTP_CONFIG.get_ontology_uri('kpiZeroDefectWork')],
+            "_domain": self.DTP_CONFIG.get_kpi_domain(),
+            "_iri": kpi_node_iri,
+            "_visibility": 0,
+            self.DTP_CONFIG.get_ontology_uri('kpiValue'): value,
+            self.DTP_CONFIG.get_ontology_uri('kpiReferenceQuantity'): ref_quant,
+            self.DTP_CONFIG.get_ontology_uri('kpiSampleQuantity'): sampl_quant,
+            self.DTP_CONFIG.get_ontology_uri('kpiIntervalStartDate'): inter_start_date,
+            self.DTP_CONFIG.get_ontology_uri('kpiIntervalEndDate'): inter_end_date,
+        }
+
+        return self.__add_node(node, self.log_markers_node_classes['new_kpi'])
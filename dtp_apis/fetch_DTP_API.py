@@ -4,13 +4,13 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
-import json
 import uuid
 
 import requests
 import validators
 
 from helpers import logger_global
+from path_query import PathQuery
 
 
 class FetchAPI:
@@ -21,6 +21,8 @@ class FetchAPI:
     -------
     get_uuid_for_iri(url)
         returns UUID
+    get_uuids_for_iris(iris, chunk_size)
+        returns dictionary mapping IRIs to UUIDs and list of missing IRIs
     fetch_node_with_iri(iri)
         returns dictionary created from JSON
     fetch_element_nodes(url)
@@ -61,15 +63,30 @@ class FetchAPI:
         returns dictionary created from JSON
     fetch_action_connected_asbuilt_nodes(action_node_iri, url)
         returns dictionary created from JSON
+    fetch_path(path, url)
+        returns dictionary created from JSON
+    count_path(path)
+        returns int
+    query_path(path, chained, chunk_size, read_ahead)
+        returns dictionary with the items and the size of all pages
     fetch_blobs_for_node(node_uuid)
         returns dictionary created from JSON
     download_blob_as_text(blob_uuid)
         returns file as a string-stream
     """
 
+    def __find(self, body, url=None):
+        # the mirror answers with a single page, so the next links always point to the platform
+        if url is None and self.mirror is not None and self.mirror.covers(body):
+            return self.mirror.find_page(body)
+
+        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
+        return self.json_codec.loads(self.post_general_request(self.json_codec.dumps(body), req_url).content)
+
     def get_uuid_for_iri(self, iri):
         """
-        The method returns UUID for a valid IRI.
+        The method returns UUID for a valid IRI. Resolved UUIDs are kept in the iri_cache of the instance,
+        the node_index of the instance is consulted before the platform.
 
         Parameters
         ----------
@@ -90,7 +107,15 @@ class FetchAPI:
         if not validators.url(iri):
             raise Exception("Sorry, the IRI is not a valid URI.")
 
-        payload = json.dumps({
+        node_uuid = self.iri_cache.get(iri)
+        if node_uuid is None and self.node_index is not None:
+            node_uuid = self.node_index.get_uuid(iri)
+            if node_uuid is not None:
+                self.iri_cache.put(iri, node_uuid)
+        if node_uuid is not None:
+            return node_uuid
+
+        payload = self.json_codec.dumps({
             "query": {
                 "$domain": self.DTP_CONFIG.get_domain(),
                 "$iri": iri
@@ -102,17 +127,23 @@ class FetchAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("POST", self.DTP_CONFIG.get_api_url('get_find_elements'), headers=headers, data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
             if response.ok:
-                return response.json()['items'][0]['_uuid']
+                items = self.json_codec.loads(response.content)['items']
+                if len(items) == 0:
+                    logger_global.error("No node found for the IRI: " + iri)
+                    raise Exception("Sorry, no node found for the IRI: " + iri)
+                node_uuid = items[0]['_uuid']
+                self.iri_cache.put(iri, node_uuid)
+                if self.node_index is not None:
+                    self.node_index.add_nodes(items[:1])
+                return node_uuid
             else:
                 logger_global.error(
                     "Something went wrong, no UUID from the give IRI. Status code: " + str(response.status_code))
@@ -121,6 +152,79 @@ class FetchAPI:
         else:
             return str(uuid.uuid4())
 
+    def get_uuids_for_iris(self, iris, chunk_size=500):
+        """
+        The method returns UUIDs for a list of valid IRIs. IRIs in the iri_cache or the node_index are not queried,
+        the others are resolved in chunks, each with a single query using an $in filter.
+
+        Parameters
+        ----------
+        iris : iterable, obligatory
+            valid IRIs for which to return the corresponding UUIDs
+        chunk_size : int, optional
+            the maximum number of IRIs per query, 1 falls back to one exact match query per IRI
+
+        Raises
+        ------
+        - it can raise an exception if a request has not been successful, or
+        - if an IRI is not a valid URI
+
+        Returns
+        ------
+        dictionary, list
+            the map from the IRIs to their UUIDs and the list of IRIs without a node on the platform
+        """
+
+        iris = list(dict.fromkeys(iris))
+        for iri in iris:
+            if not validators.url(iri):
+                raise Exception("Sorry, the IRI: " + iri + " is not a valid URI.")
+
+        uuids = {}
+        unresolved = []
+        for iri in iris:
+            node_uuid = self.iri_cache.get(iri)
+            if node_uuid is not None:
+                uuids[iri] = node_uuid
+            else:
+                unresolved.append(iri)
+
+        if self.node_index is not None and unresolved:
+            indexed = self.node_index.get_uuids(unresolved)
+            for iri, node_uuid in indexed.items():
+                self.iri_cache.put(iri, node_uuid)
+            uuids.update(indexed)
+            unresolved = [iri for iri in unresolved if iri not in indexed]
+
+        if self.simulation_mode:
+            uuids.update((iri, str(uuid.uuid4())) for iri in unresolved)
+            return uuids, []
+
+        for start in range(0, len(unresolved), chunk_size):
+            chunk = unresolved[start: start + chunk_size]
+            payload = self.json_codec.dumps({
+                "query": {
+                    "$domain": self.DTP_CONFIG.get_domain(),
+                    "$iri": {"$in": chunk} if len(chunk) > 1 else chunk[0]
+                }
+            })
+
+            def find_chunk(url=None):
+                req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
+                return self.json_codec.loads(self.post_general_request(payload, req_url).content)
+
+            found = [node for node in self.iter_items(find_chunk, read_ahead=0) if node.get('_iri') in chunk]
+            for node in found:
+                uuids[node['_iri']] = node['_uuid']
+                self.iri_cache.put(node['_iri'], node['_uuid'])
+            if self.node_index is not None:
+                self.node_index.add_nodes(found)
+
+        missing = [iri for iri in unresolved if iri not in uuids]
+        if missing:
+            logger_global.warning("No node found for " + str(len(missing)) + " IRIs: " + ', '.join(missing))
+        return uuids, missing
+
     def fetch_node_with_iri(self, node_iri):
         """
         The method queries nodes with given iri
@@ -136,7 +240,7 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain nodes of the type element.
         """
 
-        payload = json.dumps({
+        payload = self.json_codec.dumps({
             "query": {
                 "$domain": self.DTP_CONFIG.get_domain(),
                 "iri": node_iri
@@ -144,11 +248,12 @@ class FetchAPI:
         })
 
         req_url = self.DTP_CONFIG.get_api_url('get_find_elements')
-        return self.post_general_request(payload, req_url).json()
+        return self.json_codec.loads(self.post_general_request(payload, req_url).content)
 
     def fetch_element_nodes(self, *additional_filter, url=None):
         """
-        The method queries nodes of type elements from the platform.
+        The method queries nodes of type elements from the platform. A filter on an element type field,
+        e.g. ifc:Class, is answered by the node_index of the instance if it indexed all the elements.
 
         Parameters
         ----------
@@ -162,26 +267,21 @@ class FetchAPI:
         dictionary
             JSON mapped to a dictionary. The data contain nodes of the type element.
         """
-        query_dict = {
-            "$domain": self.DTP_CONFIG.get_domain(),
-            "$classes": {
-                "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                "$inheritance": True
-            }
-        }
+        fields = {}
 
         if len(additional_filter) == 2:
             field_name, field_value = additional_filter
-            query_dict[field_name] = field_value
+            fields[field_name] = field_value
+            if url is None and self.node_index is not None:
+                nodes = self.node_index.find_typed_nodes(self.DTP_CONFIG.get_ontology_uri('classElement'),
+                                                         field_name, field_value)
+                if nodes is not None:
+                    return {'items': nodes, 'size': len(nodes)}
         elif len(additional_filter) > 2 or len(additional_filter) == 1:
             raise TypeError(f"additional_filter only accept two arguments but got {len(additional_filter)}")
 
-        payload = json.dumps({
-            "query": query_dict
-        })
-
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        path = PathQuery(self.DTP_CONFIG, class_type='classElement', inheritance=True, fields=fields)
+        return self.__find(path.to_body(), url)
 
     def fetch_asdesigned_nodes(self, *additional_filter, url=None):
         """
@@ -200,27 +300,16 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain nodes that are of type As-Designed.
         """
 
-        query_dict = {
-            "$domain": self.DTP_CONFIG.get_domain(),
-            "$classes": {
-                "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                "$inheritance": True
-            },
-            self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): True
-        }
+        fields = {self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): True}
 
         if len(additional_filter) == 2:
             field_name, field_value = additional_filter
-            query_dict[field_name] = field_value
+            fields[field_name] = field_value
         elif len(additional_filter) > 2 or len(additional_filter) == 1:
             raise TypeError(f"Maximum additional_filter length is two but got {len(additional_filter)}")
 
-        payload = json.dumps({
-            "query": query_dict
-        })
-
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        path = PathQuery(self.DTP_CONFIG, class_type='classElement', inheritance=True, fields=fields)
+        return self.__find(path.to_body(), url)
 
     def fetch_asbuilt_nodes(self, *additional_filter, url=None):
         """
@@ -239,27 +328,16 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain elements that are of type As-Built.
         """
 
-        query_dict = {
-            "$domain": self.DTP_CONFIG.get_domain(),
-            "$classes": {
-                "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                "$inheritance": True
-            },
-            self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False
-        }
+        fields = {self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False}
 
         if len(additional_filter) == 2:
             field_name, field_value = additional_filter
-            query_dict[field_name] = field_value
+            fields[field_name] = field_value
         elif len(additional_filter) > 2 or len(additional_filter) == 1:
             raise TypeError(f"Maximum additional_filter length is two but got {len(additional_filter)}")
 
-        payload = json.dumps({
-            "query": query_dict
-        })
-
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        path = PathQuery(self.DTP_CONFIG, class_type='classElement', inheritance=True, fields=fields)
+        return self.__find(path.to_body(), url)
 
     def fetch_construction_nodes(self, url=None):
         """
@@ -276,18 +354,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain elements that are of type As-Built.
         """
 
-        payload = json.dumps({
-            "query": {
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$classes": {
-                    "$contains": self.DTP_CONFIG.get_ontology_uri('asPerformedConstruction'),
-                    "$inheritance": True
-                }
-            }
-        })
+        path = PathQuery(self.DTP_CONFIG, class_type='asPerformedConstruction', inheritance=True)
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_workpackage_nodes(self, url=None):
         """
@@ -304,17 +373,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain as-planned work package nodes.
         """
 
-        payload = json.dumps({
-            "query": {
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$classes": {
-                    "$contains": self.DTP_CONFIG.get_ontology_uri('workpackage')
-                }
-            }
-        })
+        path = PathQuery(self.DTP_CONFIG, class_type='workpackage')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_workpackage_connected_activity_nodes(self, wp_node_iri, url=None):
         """
@@ -333,27 +394,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain activity nodes connected to wp_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": wp_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasActivity'): {
-                    "$alias": "activity"
-                }
-            },
-                {
-                    "$alias": "activity",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('activity')
-                    }
-                }
-            ],
-            "return": "activity"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=wp_node_iri).hop('->', 'hasActivity', 'activity', alias='activity')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_activity_connected_task_nodes(self, activity_node_iri, url=None):
         """
@@ -372,27 +415,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain activity nodes connected to wp_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": activity_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasTask'): {
-                    "$alias": "task"
-                }
-            },
-                {
-                    "$alias": "task",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('task')
-                    }
-                }
-            ],
-            "return": "task"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=activity_node_iri).hop('->', 'hasTask', 'task', alias='task')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_elements_connected_task_nodes(self, task_node_iri, url=None):
         """
@@ -411,20 +436,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain activity nodes connected to wp_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": task_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasTarget'): {
-                    "$alias": "element"
-                }
-            }
-            ],
-            "return": "element"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=task_node_iri).hop('->', 'hasTarget', alias='element')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_asperformed_connected_asdesigned_nodes(self, asdesigned_node_iri, url=None):
         """
@@ -443,31 +457,11 @@ class FetchAPI:
             return the number of defect nodes connected to the node identified by node_iri
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": asdesigned_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'): {
-                    "$alias": "AsPerformed"
-                }
-            },
-                {
-                    "$alias": "AsPerformed",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                        "$inheritance": True
-                    }  # ,
-                    # this cannot be included because of the missing info for Mislata site
-                    # self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False
-                }
-            ],
-            "edge": True,  # TODO: Not sure what 'edge' means in this query
-            "return": "AsPerformed"
-        })
+        # the isAsDesigned condition cannot be included because of the missing info for Mislata site
+        path = PathQuery(self.DTP_CONFIG, iri=asdesigned_node_iri, edge=True)
+        path.hop('<-', 'intentStatusRelation', 'classElement', inheritance=True, alias='AsPerformed')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_asperformed_connected_asdesigned_oper_nodes(self, asdesigned_node_iri, url=None):
         """
@@ -486,28 +480,10 @@ class FetchAPI:
             return the number of defect nodes connected to the node identified by node_iri
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": asdesigned_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'): {
-                    "$alias": "AsPerformed"
-                }
-            },
-                {
-                    "$alias": "AsPerformed",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('asPerformedOperation')
-                    }
-                }
-            ],
-            # "edge": True,  # TODO: Not sure what 'edge' means in this query
-            "return": "AsPerformed"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=asdesigned_node_iri)
+        path.hop('<-', 'intentStatusRelation', 'asPerformedOperation', alias='AsPerformed')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_activity_nodes(self, url=None):
         """
@@ -524,17 +500,9 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain as-planned work package nodes.
         """
 
-        payload = json.dumps({
-            "query": {
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$classes": {
-                    "$contains": self.DTP_CONFIG.get_ontology_uri('activity')
-                }
-            }
-        })
+        path = PathQuery(self.DTP_CONFIG, class_type='activity')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_asbuilt_connected_asdesigned_nodes(self, asbuilt_node_iri, url=None):
         """
@@ -553,31 +521,11 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain as-designed nodes connected to asbuilt_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": asbuilt_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'): {
-                    "$alias": "asdesigned"
-                }
-            },
-                {
-                    "$alias": "asdesigned",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                        "$inheritance": True
-                    }  # ,
-                    # this cannot be included because of the missing info for Mislata site
-                    # self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False
-                }
-            ],
-            "edge": True,
-            "return": "asdesigned"
-        })
+        # the isAsDesigned condition cannot be included because of the missing info for Mislata site
+        path = PathQuery(self.DTP_CONFIG, iri=asbuilt_node_iri, edge=True)
+        path.hop('->', 'intentStatusRelation', 'classElement', inheritance=True, alias='asdesigned')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_asdesigned_connected_task_nodes(self, asdesigned_node_iri, url=None):
         """
@@ -596,29 +544,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain task nodes connected to asdesigned_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": asdesigned_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('hasTarget'): {
-                    "$alias": "tasks"
-                }
-            },
-                {
-                    "$alias": "tasks",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('task'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "tasks"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=asdesigned_node_iri, edge=True)
+        path.hop('<-', 'hasTarget', 'task', inheritance=True, alias='tasks')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_oper_connected_activity_nodes(self, oper_node_iri, url=None):
         """
@@ -637,29 +566,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain activity nodes connected to oper_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": oper_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('intentStatusRelation'): {
-                    "$alias": "hasActivity"
-                }
-            },
-                {
-                    "$alias": "hasActivity",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('activity'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasActivity"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=oper_node_iri, edge=True)
+        path.hop('->', 'intentStatusRelation', 'activity', inheritance=True, alias='hasActivity')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_task_connected_activity_nodes(self, task_node_iri, url=None):
         """
@@ -678,29 +588,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain activity nodes connected to task_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": task_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('hasTask'): {
-                    "$alias": "hasActivity"
-                }
-            },
-                {
-                    "$alias": "hasActivity",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('activity'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasActivity"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=task_node_iri, edge=True)
+        path.hop('<-', 'hasTask', 'activity', inheritance=True, alias='hasActivity')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_activity_connected_workpackage_nodes(self, activity_node_iri, url=None):
         """
@@ -719,29 +610,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain workpackage nodes connected to activity_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": activity_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('hasActivity'): {
-                    "$alias": "hasWorkPackage"
-                }
-            },
-                {
-                    "$alias": "hasWorkPackage",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('workpackage'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasWorkPackage"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=activity_node_iri, edge=True)
+        path.hop('<-', 'hasActivity', 'workpackage', inheritance=True, alias='hasWorkPackage')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_workpackage_connected_schedule_nodes(self, workpkg_node_iri, url=None):
         """
@@ -760,29 +632,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain workpackage nodes connected to activity_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": workpkg_node_iri,
-                "<-" + self.DTP_CONFIG.get_ontology_uri('hasWorkPackage'): {
-                    "$alias": "hasSchedule"
-                }
-            },
-                {
-                    "$alias": "hasSchedule",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('constructionSchedule'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasSchedule"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=workpkg_node_iri, edge=True)
+        path.hop('<-', 'hasWorkPackage', 'constructionSchedule', inheritance=True, alias='hasSchedule')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_constr_connected_oper_nodes(self, constr_node_iri, url=None):
         """
@@ -801,29 +654,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain operation nodes connected to constr_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": constr_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasOperation'): {
-                    "$alias": "hasOperation"
-                }
-            },
-                {
-                    "$alias": "hasOperation",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('asPerformedOperation'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasOperation"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=constr_node_iri, edge=True)
+        path.hop('->', 'hasOperation', 'asPerformedOperation', inheritance=True, alias='hasOperation')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_oper_connected_action_nodes(self, oper_node_iri, url=None):
         """
@@ -842,29 +676,10 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain action nodes connected to oper_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": oper_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasAction'): {
-                    "$alias": "hasAction"
-                }
-            },
-                {
-                    "$alias": "hasAction",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('asPerformedAction'),
-                        "$inheritance": True
-                    }
-                }
-            ],
-            "edge": True,
-            "return": "hasAction"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=oper_node_iri, edge=True)
+        path.hop('->', 'hasAction', 'asPerformedAction', inheritance=True, alias='hasAction')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
 
     def fetch_action_connected_asbuilt_nodes(self, action_node_iri, url=None):
         """
@@ -883,30 +698,98 @@ class FetchAPI:
             JSON mapped to a dictionary. The data contain asbuilt nodes connected to action_node_iri.
         """
 
-        payload = json.dumps({
-            "query": [{
-                "$domain": self.DTP_CONFIG.get_domain(),
-                "$iri": action_node_iri,
-                "->" + self.DTP_CONFIG.get_ontology_uri('hasTarget'): {
-                    "$alias": "asbuilt"
-                }
-            },
-                {
-                    "$alias": "asbuilt",
-                    "$domain": self.DTP_CONFIG.get_domain(),
-                    "$classes": {
-                        "$contains": self.DTP_CONFIG.get_ontology_uri('classElement'),
-                        "$inheritance": True
-                    },
-                    self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False
-                }
-            ],
-            "edge": True,
-            "return": "asbuilt"
-        })
+        path = PathQuery(self.DTP_CONFIG, iri=action_node_iri, edge=True)
+        path.hop('->', 'hasTarget', 'classElement', inheritance=True,
+                 fields={self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): False}, alias='asbuilt')
 
-        req_url = self.DTP_CONFIG.get_api_url('get_find_elements') if not url else url
-        return self.post_general_request(payload, req_url).json()
+        return self.__find(path.to_body(), url)
+
+    def fetch_path(self, path, url=None):
+        """
+        The method fetches the nodes reached by the last hop of a path, with a single query chaining the hops.
+
+        Parameters
+        ----------
+        path : PathQuery, obligatory
+            the path, see path_query.PathQuery and path_query.parse_path
+        url : str, optional
+            used to fetch a next page
+
+        Returns
+        ------
+        dictionary
+            JSON mapped to a dictionary. The data contain the nodes reached by the last hop.
+        """
+
+        return self.__find(path.to_body(), url)
+
+    def count_path(self, path):
+        """
+        The method counts the nodes reached by the last hop of a path, with the count endpoint.
+        It is the count function of fetch_path, see DTPApi.iter_pages_parallel.
+
+        Parameters
+        ----------
+        path : PathQuery, obligatory
+            the path, see path_query.PathQuery and path_query.parse_path
+
+        Returns
+        ------
+        int
+            the number of the nodes reached by the last hop
+        """
+
+        output = self.post_general_request(self.json_codec.dumps(path.to_body()),
+                                           self.DTP_CONFIG.get_api_url('count_nodes'))
+        return int(self.json_codec.loads(output.content)['total_items'])
+
+    def query_path(self, path, chained=True, chunk_size=500, read_ahead=None):
+        """
+        The method fetches all the nodes reached by the last hop of a path. The path is sent as a single
+        chained query or, for a platform which does not resolve the chained aliases, followed hop by hop:
+        every hop starts from all the nodes reached by the previous one, chunk_size nodes per query
+        with an $in filter, so the number of requests does not grow with the number of nodes per hop.
+
+        Parameters
+        ----------
+        path : PathQuery, obligatory
+            the path, see path_query.PathQuery and path_query.parse_path
+        chained : bool, optional
+            if set to False then the path is followed hop by hop
+        chunk_size : int, optional
+            the maximum number of IRIs per query of a hop followed hop by hop
+        read_ahead : int, optional
+            the number of prefetched pages, see DTPApi.iter_pages
+
+        Returns
+        ------
+        dictionary
+            the items and the size of all pages
+        """
+
+        if chained or not path.hops:
+            response = self.query_all_pages(self.fetch_path, path, read_ahead=read_ahead)
+            return response if response is not None else {'items': [], 'size': 0}
+
+        iri = path.start.get('$iri')
+        if len(path.start) == 1 and isinstance(iri, str):
+            frontier = [iri]
+        elif len(path.start) == 1 and isinstance(iri, dict) and list(iri) == ['$in']:
+            frontier = list(dict.fromkeys(iri['$in']))
+        else:
+            frontier = [node['_iri'] for node in
+                        self.iter_items(self.__find, path.to_start_body(), read_ahead=read_ahead)]
+
+        reached = {}
+        for index in range(len(path.hops)):
+            reached = {}
+            for start in range(0, len(frontier), chunk_size):
+                body = path.to_hop_body(index, frontier[start: start + chunk_size])
+                for node in self.iter_items(self.__find, body, read_ahead=read_ahead):
+                    reached.setdefault(node['_iri'], node)
+            frontier = list(reached)
+
+        return {'items': list(reached.values()), 'size': len(reached)}
 
     def fetch_blobs_for_node(self, node_uuid):
         """
@@ -934,18 +817,16 @@ class FetchAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("GET", self.DTP_CONFIG.get_api_url('get_blobs_per_element', node_uuid), headers=headers,
                                data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
-        response = session.send(prepared)
-        logger_global.info('Response code: ' + str(response.status_code))
+        response = self.send_prepared_request(prepared)
 
         if response.ok:
-            return response.json()
+            return self.json_codec.loads(response.content)
         else:
             logger_global.error(
                 "The response from the DTP is an error. Check the dev token and/or the domain. Status code: " + str(
@@ -980,15 +861,13 @@ class FetchAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("GET", self.DTP_CONFIG.get_api_url('download_blob', blob_uuid), headers=headers,
                                data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
-        response = session.send(prepared)
-        logger_global.info('Response code: ' + str(response.status_code))
+        response = self.send_prepared_request(prepared)
 
         if response.ok:
             return response.text
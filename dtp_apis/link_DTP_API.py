@@ -4,14 +4,13 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
-import json
-
 from helpers import logger_global
 
 
 class LinkAPI:
     """
-    Mixin link API class contains all link methods.
+    Mixin link API class contains all link methods. When a link batcher is active (see BatchAPI),
+    the new edges between nodes are queued and sent in batches instead of one request per edge.
 
     Methods
     -------
@@ -27,6 +26,51 @@ class LinkAPI:
         returns bool, True if success and False otherwise
     """
 
+    def __set_out_edge(self, label, source_iri, target_iri, log_marker):
+        """
+        The method adds an edge to a node or, if a link batcher is active, queues it.
+
+        Parameters
+        ----------
+        label : str, obligatory
+            the ontology URI of the edge
+        source_iri : str, obligatory
+            a valid IRI of the node the edge starts from
+        target_iri : str, obligatory
+            a valid IRI of the node the edge points to
+        log_marker : str, obligatory
+            the session log marker of the link, e.g. NEW_LINK_ELEMENT_DEFECT
+
+        Returns
+        ------
+        bool
+            True if the edge has been added or queued, and False otherwise
+        """
+
+        if self.link_batch is not None:
+            self.link_batch.add(label, source_iri, target_iri, log_marker)
+            return True
+
+        payload = self.json_codec.dumps([{
+            "_domain": self.DTP_CONFIG.get_domain(),
+            "_iri": source_iri,
+            "_outE": [{
+                "_label": label,
+                "_targetIRI": target_iri
+            }]
+        }])
+
+        response = self.put_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('update_set'))
+        if not self.simulation_mode:
+            if response.ok:
+                if self.session_logger is not None:
+                    self.session_logger.info("DTP_API - " + log_marker + ": " + source_iri + ', ' + target_iri)
+                return True
+            else:
+                logger_global.error("Linking nodes failed. Response code: " + str(response.status_code))
+                return False
+        return True
+
     def link_node_element_to_blob(self, node_uuid, blob_uuid):
         """
         The method links a blob to an element.
@@ -44,7 +88,7 @@ class LinkAPI:
             True if the element has been linked with a blob, and False otherwise
         """
 
-        payload = json.dumps({
+        payload = self.json_codec.dumps({
             "blob_uuid": blob_uuid,
             "avatar_uuids": [node_uuid],
             "ignore_conflicts": False
@@ -78,26 +122,8 @@ class LinkAPI:
             True if the element has been linked with a defect, and False otherwise
         """
 
-        payload = json.dumps([{
-            "_domain": self.DTP_CONFIG.get_domain(),
-            "_iri": element_node_iri,
-            "_outE": [{
-                "_label": self.DTP_CONFIG.get_ontology_uri('hasGeometricDefect'),
-                "_targetIRI": defect_node_iri
-            }]
-        }])
-
-        response = self.put_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('update_set'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info(
-                        "DTP_API - NEW_LINK_ELEMENT_DEFECT: " + element_node_iri + ', ' + defect_node_iri)
-                return True
-            else:
-                logger_global.error("Linking nodes failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__set_out_edge(self.DTP_CONFIG.get_ontology_uri('hasGeometricDefect'), element_node_iri,
+                                   defect_node_iri, 'NEW_LINK_ELEMENT_DEFECT')
 
     def link_node_operation_to_action(self, oper_node_iri, action_node_iri):
         """
@@ -116,26 +142,8 @@ class LinkAPI:
             True if the element has been linked with a defect, and False otherwise
         """
 
-        payload = json.dumps([{
-            "_domain": self.DTP_CONFIG.get_domain(),
-            "_iri": oper_node_iri,
-            "_outE": [{
-                "_label": self.DTP_CONFIG.get_ontology_uri('hasAction'),
-                "_targetIRI": action_node_iri
-            }]
-        }])
-
-        response = self.put_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('update_set'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info(
-                        "DTP_API - NEW_LINK_OPERATION_ACTION: " + oper_node_iri + ', ' + action_node_iri)
-                return True
-            else:
-                logger_global.error("Linking nodes failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__set_out_edge(self.DTP_CONFIG.get_ontology_uri('hasAction'), oper_node_iri,
+                                   action_node_iri, 'NEW_LINK_OPERATION_ACTION')
 
     def link_node_schedule_to_constr(self, schedule_node_iri, constr_node_iri):
         """
@@ -154,26 +162,8 @@ class LinkAPI:
             True if the element has been linked with a defect, and False otherwise
         """
 
-        payload = json.dumps([{
-            "_domain": self.DTP_CONFIG.get_domain(),
-            "_iri": schedule_node_iri,
-            "_outE": [{
-                "_label": self.DTP_CONFIG.get_ontology_uri('hasConstruction'),
-                "_targetIRI": constr_node_iri
-            }]
-        }])
-
-        response = self.put_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('update_set'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info(
-                        "DTP_API - NEW_LINK_SCHEDULE_CONSTR: " + schedule_node_iri + ', ' + constr_node_iri)
-                return True
-            else:
-                logger_global.error("Linking nodes failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__set_out_edge(self.DTP_CONFIG.get_ontology_uri('hasConstruction'), schedule_node_iri,
+                                   constr_node_iri, 'NEW_LINK_SCHEDULE_CONSTR')
 
     def link_node_constr_to_operation(self, constr_node_iri, oper_node_iri):
         """
@@ -192,23 +182,5 @@ class LinkAPI:
             True if the element has been linked with a defect, and False otherwise
         """
 
-        payload = json.dumps([{
-            "_domain": self.DTP_CONFIG.get_domain(),
-            "_iri": constr_node_iri,
-            "_outE": [{
-                "_label": self.DTP_CONFIG.get_ontology_uri('hasOperation'),
-                "_targetIRI": oper_node_iri
-            }]
-        }])
-
-        response = self.put_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('update_set'))
-        if not self.simulation_mode:
-            if response.ok:
-                if self.session_logger is not None:
-                    self.session_logger.info(
-                        "DTP_API - NEW_LINK_CONSTR_OPERATION: " + constr_node_iri + ', ' + oper_node_iri)
-                return True
-            else:
-                logger_global.error("Linking nodes failed. Response code: " + str(response.status_code))
-                return False
-        return True
+        return self.__set_out_edge(self.DTP_CONFIG.get_ontology_uri('hasOperation'), constr_node_iri,
+                                   oper_node_iri, 'NEW_LINK_CONSTR_OPERATION')
@@ -52,18 +52,21 @@ class RevertAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("DELETE", self.DTP_CONFIG.get_api_url('delete_avatar', node_uuid), headers=headers,
                                data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
 
             if response.ok:
+                self.iri_cache.invalidate_uuid(node_uuid)
+                if self.node_index is not None:
+                    self.node_index.invalidate_uuid(node_uuid)
+                if self.mirror is not None:
+                    self.mirror.invalidate_uuid(node_uuid)
                 logger_global.info("The node: " + node_uuid + ", has been deleted.")
                 return True
             else:
@@ -90,7 +93,7 @@ class RevertAPI:
         if not validators.url(node_iri):
             raise Exception("Sorry, the target IRI is not a valid URL.")
 
-        payload = json.dumps(
+        payload = self.json_codec.dumps(
             {
                 "_domain": self.DTP_CONFIG.get_domain(),
                 "_iri": node_iri
@@ -100,6 +103,7 @@ class RevertAPI:
         response = self.post_guarded_request(payload=payload, url=self.DTP_CONFIG.get_api_url('delete_avatar_iri'))
         if not self.simulation_mode:
             if response.ok:
+                self.iri_cache.invalidate(node_iri)
                 logger_global.info("The node: " + node_iri + ", has been deleted.")
                 return True
             else:
@@ -127,7 +131,7 @@ class RevertAPI:
             True if a blob has been unlinked and False otherwise
         """
 
-        payload = json.dumps({
+        payload = self.json_codec.dumps({
             "blob_uuid": blob_uuid,
             "avatar_uuids": [node_uuid],
             "ignore_conflicts": False
@@ -139,15 +143,13 @@ class RevertAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("POST", self.DTP_CONFIG.get_api_url('unlink_blob'), headers=headers, data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
 
             if response.ok:
                 logger_global.info("The blob : " + blob_uuid + ", unlinked from the element: " + node_uuid)
@@ -181,16 +183,14 @@ class RevertAPI:
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
 
-        session = requests.Session()
         req = requests.Request("DELETE", self.DTP_CONFIG.get_api_url('delete_blob', blob_uuid), headers=headers,
                                data=payload)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
 
             if response.ok:
                 logger_global.error("The blob: " + blob_uuid + ", has been deleted.")
@@ -215,7 +215,7 @@ class RevertAPI:
         bool
             True if a blob has been node has been updated and False otherwise
         """
-        payload = json.dumps([{
+        payload = self.json_codec.dumps([{
             "_domain": self.DTP_CONFIG.get_domain(),
             "_iri": node_iri,
             self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): "delete"
@@ -4,7 +4,6 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
-import logging
 import os
 import uuid
 
@@ -59,16 +58,14 @@ class SendAPI:
         headers = {
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
-        session = requests.Session()
         req = requests.Request("POST", self.DTP_CONFIG.get_api_url('send_blob'), headers=headers, data=payload,
                                files=files)
         prepared = req.prepare()
 
-        logger_global.info('HTTP request: \n' + self.__pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logger_global.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
             if response.status_code == 201:
                 new_uuid = os.path.basename(response.headers.get('Location'))
                 if self.session_logger is not None:
@@ -114,23 +111,21 @@ class SendAPI:
         headers = {
             'Authorization': 'Bearer ' + self.DTP_CONFIG.get_token()
         }
-        session = requests.Session()
-        req = requests.Request("POST", self.DTP_CONFIG.get_api_uri('send_blob'), headers=headers, data=payload,
+        req = requests.Request("POST", self.DTP_CONFIG.get_api_url('send_blob'), headers=headers, data=payload,
                                files=files)
         prepared = req.prepare()
 
-        logging.info('HTTP request: \n' + self.__pretty_http_request_to_string(prepared))
+        self.log_http_request(prepared)
 
         if not self.simulation_mode:
-            response = session.send(prepared)
-            logging.info('Response code: ' + str(response.status_code))
+            response = self.send_prepared_request(prepared)
             if response.status_code == 201:
                 new_uuid = os.path.basename(response.headers.get('Location'))
                 if not self.session_logger is None:
                     self.session_logger.info("DTP_API - NEW_BLOB: " + new_uuid)
                 return new_uuid
             else:
-                logging.error("Sending blob did not work! Status code: " + str(response.status_code))
+                logger_global.error("Sending blob did not work! Status code: " + str(response.status_code))
                 raise Exception("Sending blob did not work! Status code: " + str(response.status_code))
         else:
             return str(uuid.uuid4())
@@ -45,7 +45,7 @@ class UpdateAPI:
             True if a blob has been node has been updated and False otherwise
         """
 
-        payload = json.dumps([{
+        payload = self.json_codec.dumps([{
             "_domain": self.DTP_CONFIG.get_domain(),
             "_iri": node_iri,
             self.DTP_CONFIG.get_ontology_uri('isAsDesigned'): is_as_designed
@@ -90,10 +90,11 @@ class UpdateAPI:
             return True if operation node has been updated and False otherwise.
         """
         # creating backup of the node
-        node_info = self.fetch_nodes_with_iri(oper_node_iri)
+        node_info = self.fetch_node_with_iri(oper_node_iri)
         dump_path = os.path.join(log_path, f"{oper_node_iri.rsplit('/')[-1]}.json")
-        with open(dump_path, 'w') as fp:
+        with self.trace_span('dump_write', path=dump_path) as span, open(dump_path, 'w') as fp:
             json.dump(node_info, fp)
+            span.set_attribute('bytes', fp.tell())
 
         if list_of_action_iri:
             # collecting already existing edges
@@ -107,7 +108,7 @@ class UpdateAPI:
                 }
                 out_edge_to_actions.append(out_edge_dict)
 
-            payload = json.dumps([{
+            payload = self.json_codec.dumps([{
                 "_domain": self.DTP_CONFIG.get_domain(),
                 "_iri": oper_node_iri,
                 self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
@@ -115,7 +116,7 @@ class UpdateAPI:
                 "_outE": out_edge_to_actions
             }])
         else:
-            payload = json.dumps([{
+            payload = self.json_codec.dumps([{
                 "_domain": self.DTP_CONFIG.get_domain(),
                 "_iri": oper_node_iri,
                 self.DTP_CONFIG.get_ontology_uri('processStart'): process_start,
@@ -158,10 +159,11 @@ class UpdateAPI:
         # update node if operation iri list has at least one item
         if len(list_of_operation_iri):
             # creating backup of the node
-            node_info = self.fetch_nodes_with_iri(constr_iri)
+            node_info = self.fetch_node_with_iri(constr_iri)
             dump_path = os.path.join(log_path, f"{constr_iri.rsplit('/')[-1]}.json")
-            with open(dump_path, 'w') as fp:
+            with self.trace_span('dump_write', path=dump_path) as span, open(dump_path, 'w') as fp:
                 json.dump(node_info, fp)
+                span.set_attribute('bytes', fp.tell())
 
             # collecting already existing edges
             already_existing_edges = node_info['items'][0]['_outE']
@@ -174,7 +176,7 @@ class UpdateAPI:
                 }
                 out_edge_to_operation.append(out_edge_dict)
 
-            payload = json.dumps([{
+            payload = self.json_codec.dumps([{
                 "_domain": self.DTP_CONFIG.get_domain(),
                 "_iri": constr_iri,
                 "_outE": out_edge_to_operation
@@ -218,7 +220,7 @@ class UpdateAPI:
         """
         if not is_revert_session:
             assert previous_field_value, 'previous_field_value needed for logging'
-        payload = json.dumps([{
+        payload = self.json_codec.dumps([{
             "_domain": self.DTP_CONFIG.get_domain(),
             "_iri": node_iri,
             field: field_placeholder  # field_placeholder to ensure payload is valid
@@ -255,7 +257,7 @@ class UpdateAPI:
             True if a blob has been node has been updated and False otherwise
         """
 
-        payload = json.dumps([{
+        payload = self.json_codec.dumps([{
             "_domain": self.DTP_CONFIG.get_domain(),
             "_iri": node_iri,
             field: field_value
@@ -44,6 +44,7 @@ def parse_args():
     parser.add_argument('--xml_path', '-x', type=str, help='path to config xml file', required=True)
     parser.add_argument('--simulation', '-s', default=False, action='store_true')
     parser.add_argument('--log_dir', '-l', type=str, help='path to log dir', required=True)
+    helpers.add_profile_argument(parser)
 
     return parser.parse_args()
 
@@ -59,18 +60,21 @@ if __name__ == "__main__":
     dtp_api.init_logger(log_path)
     
     
-    elements = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, "ifc:Class", "IfcWall")
+    with helpers.profiling(args.profile):
+        elements = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, "ifc:Class", "IfcWall")
     
-    for element in elements['items']:
-        if is_asdesigned(dtp_config, element): #this soon should not be needed
-            asbuild_iri = create_iri_as_built(element['_iri'], 0)
-            timestamp = helpers.get_timestamp_dtp_format(datetime.now())
-            element_type = helpers.get_element_type(dtp_config, element)
+        # the new nodes are sent in batches instead of one request per node
+        with dtp_api.batch_writer():
+            for element in elements['items']:
+                if is_asdesigned(dtp_config, element): #this soon should not be needed
+                    asbuild_iri = create_iri_as_built(element['_iri'], 0)
+                    timestamp = helpers.get_timestamp_dtp_format(datetime.now())
+                    element_type = helpers.get_element_type(dtp_config, element)
             
-            # this soon should not be needed
-            if element_type.strip() in dtp_config.get_object_type_conversion_map().keys():
-                element_type = dtp_config.get_object_type_conversion_map()[element_type.strip()]            
+                    # this soon should not be needed
+                    if element_type.strip() in dtp_config.get_object_type_conversion_map().keys():
+                        element_type = dtp_config.get_object_type_conversion_map()[element_type.strip()]            
             
-            dtp_api.create_asbuilt_node(asbuild_iri, 100, timestamp, element_type, element['_iri'])
+                    dtp_api.create_asbuilt_node(asbuild_iri, 100, timestamp, element_type, element['_iri'])
         
 
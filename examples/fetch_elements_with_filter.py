@@ -12,6 +12,7 @@ sys.path.insert(0, "../")
 
 from DTP_API import DTPApi
 from DTP_config import DTPConfig
+from helpers import add_profile_argument, profiling
 
 
 
@@ -23,6 +24,7 @@ def parse_args():
     parser.add_argument('--xml_path', '-x', type=str, help='path to config xml file', required=True)
     parser.add_argument('--simulation', '-s', default=False, action='store_true')
     parser.add_argument('--log_dir', '-l', type=str, help='path to log dir', required=True)
+    add_profile_argument(parser)
 
     return parser.parse_args()
 
@@ -35,5 +37,6 @@ if __name__ == "__main__":
         os.makedirs(args.log_dir)
     log_path = os.path.join(args.log_dir, f"db_session-{time.strftime('%Y%m%d-%H%M%S')}.log")
     dtp_api.init_logger(log_path)
-    response = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, "ifc:Class", "IfcWall")
+    with profiling(args.profile):
+        response = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, "ifc:Class", "IfcWall")
     print('Response:\n', response)
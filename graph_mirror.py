@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+
+"""
+The file contains a local mirror of the nodes of a DTP domain, used to answer the fetch queries offline.
+For more information, contact the author(s) listed above.
+"""
+import argparse
+import gzip
+from datetime import datetime
+
+from delta_sync import DeltaSync, WATERMARK_FIELDS, class_query, count_class_nodes, iter_class_pages
+from helpers import logger_global, get_timestamp_dtp_format
+from in_memory_graph import InMemoryGraph
+from json_codec import get_json_codec
+
+# the ontology types of DTP_config.xml whose nodes are mirrored, with their subclasses
+MIRRORED_CLASSES = ('classElement', 'activity', 'task', 'workpackage', 'constructionSchedule', 'asPerformedOperation',
+                    'asPerformedAction', 'asPerformedConstruction')
+
+MIRROR_FORMAT = 'dtp-graph-mirror'
+MIRROR_VERSION = 1
+
+
+def _open(path, mode):
+    return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+
+class GraphMirror(InMemoryGraph):
+    """
+    The class keeps a snapshot of the nodes of a domain with their out edges and evaluates the find
+    queries of the FetchAPI methods, including the traversals chained with aliases, without a request.
+    Only the queries whose classes have been mirrored are answered, the results fit in a single page.
+    The snapshot follows the changes made on the platform only when sync is called. The nodes written
+    through a DTPApi using the mirror are dropped from it and their classes are queried on the platform
+    until the next sync, see invalidate.
+
+    Usage
+    -----
+    mirror = GraphMirror.crawl(DTPApi(dtp_config))
+    mirror.save('mirror.jsonl.gz')
+
+    # later, e.g. in the analytics scripts
+    mirror = GraphMirror.load('mirror.jsonl.gz')
+    mirror.sync(DTPApi(dtp_config))  # fetches only the nodes whose watermark fields changed since the crawl
+    dtp_api = DTPApi(dtp_config, mirror=mirror)
+    tasks = dtp_api.query_all_pages(dtp_api.fetch_activity_connected_task_nodes, activity_iri)
+
+    Attributes
+    ----------
+    domain : str
+        the domain of the mirrored nodes
+    classes : list
+        the URIs of the mirrored classes, the nodes of their subclasses are included
+    created : str
+        the time at which the crawl started, in the DTP format
+    synced : str
+        the time at which the last sync started, in the DTP format, None before the first sync
+    delta_sync : DeltaSync
+        the watermarks of the mirrored classes, see delta_sync.DeltaSync
+    stale : set
+        the URIs of the mirrored classes whose nodes have been written since the last sync,
+        the queries of these classes are not answered by the mirror
+
+    Methods
+    -------
+    crawl(dtp_api, class_types, watermark_fields, read_ahead)
+        returns GraphMirror
+    sync(dtp_api, read_ahead, full)
+        returns dictionary, the numbers of updated and removed nodes and the re-crawled classes
+    load(path)
+        returns GraphMirror
+    save(path)
+        None
+    invalidate(iri, classes)
+        None
+    invalidate_uuid(node_uuid)
+        None
+    covers(body)
+        returns bool, True if the query can be answered by the mirror
+    find_page(body)
+        returns dictionary, a page holding all the results of the query
+    """
+
+    def __init__(self, domain, classes=None, created=None, delta_sync=None, synced=None, stale=None):
+        """
+        Parameters
+        ----------
+        domain : str, obligatory
+            the domain of the mirrored nodes
+        classes : list, optional
+            the URIs of the mirrored classes
+        created : str, optional
+            the time of the crawl
+        delta_sync : DeltaSync, optional
+            the watermarks of the mirrored classes
+        synced : str, optional
+            the time of the last sync
+        stale : iterable, optional
+            the URIs of the mirrored classes written since the last sync
+        """
+
+        super().__init__()
+        self.domain = domain
+        self.classes = list(classes) if classes is not None else []
+        self.created = created
+        self.synced = synced
+        self.delta_sync = delta_sync if delta_sync is not None else DeltaSync()
+        self.stale = set(stale) if stale is not None else set()
+        self.json_codec = get_json_codec()
+        self.__mirrored_as = {}  # own class of the nodes -> the mirrored classes they are members of
+
+    @classmethod
+    def crawl(cls, dtp_api, class_types=MIRRORED_CLASSES, watermark_fields=WATERMARK_FIELDS, read_ahead=None):
+        """
+        The method queries all the nodes of the given classes of the domain, one paged query per class.
+
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to query the platform
+        class_types : tuple, optional
+            the ontology types of the classes, as in DTP_config.xml
+        watermark_fields : tuple, optional
+            the fields used by sync to find the changed nodes, see delta_sync.DeltaSync
+        read_ahead : int, optional
+            the number of prefetched pages, see DTPApi.iter_pages
+
+        Returns
+        ------
+        GraphMirror
+            the mirror of the domain
+        """
+
+        mirror = cls(dtp_api.DTP_CONFIG.get_domain(), created=get_timestamp_dtp_format(datetime.now()),
+                     delta_sync=DeltaSync(watermark_fields))
+        for class_type in class_types:
+            class_uri = dtp_api.DTP_CONFIG.get_ontology_uri(class_type)
+            mirror.classes.append(class_uri)
+            nb_nodes, _ = mirror.__crawl_class(dtp_api, class_uri, read_ahead)
+            logger_global.info('Mirrored ' + str(nb_nodes) + ' nodes of the class: ' + class_uri)
+
+        return mirror
+
+    def __learn(self, nodes, classes):
+        for node in nodes:
+            for own_class in node.get('_classes', ()):
+                self.__mirrored_as.setdefault(own_class, set()).update(classes)
+
+    def __store(self, dtp_config, class_uri, nodes):
+        self.upsert_nodes(nodes, (class_uri,))
+        self.__learn(nodes, (class_uri,))
+        self.delta_sync.observe(dtp_config, class_uri, nodes)
+
+    def __crawl_class(self, dtp_api, class_uri, read_ahead):
+        # the mirrored nodes of the class which are not on the platform anymore are removed
+        seen = set()
+        for page in iter_class_pages(dtp_api, class_uri, read_ahead=read_ahead):
+            self.__store(dtp_api.DTP_CONFIG, class_uri, page['items'])
+            seen.update(node['_iri'] for node in page['items'])
+
+        nb_removed = 0
+        for node in self.get_nodes(self.find(class_query(dtp_api.DTP_CONFIG, class_uri))):
+            if node['_iri'] not in seen:
+                self.delete_node(node['_uuid'])
+                nb_removed += 1
+        return len(seen), nb_removed
+
+    def sync(self, dtp_api, read_ahead=None, full=False):
+        """
+        The method updates the mirror with the nodes changed on the platform since the crawl or the last sync.
+        The nodes whose watermark fields reached the watermarks are fetched again, see delta_sync.DeltaSync.
+        A class whose number of nodes differs from the platform, or written since the last sync, is crawled again,
+        it catches the nodes added without watermark fields and the deleted nodes.
+
+        The delta sync does NOT pick up the edges added or removed on the platform, e.g. by the link_* methods,
+        nor the updates of the fields other than the watermark fields, unless the number of nodes of the class
+        changes. Use full=True after such changes, it crawls all the mirrored classes again.
+
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to query the platform
+        read_ahead : int, optional
+            the number of prefetched pages, see DTPApi.iter_pages
+        full : bool, optional
+            if set to True then all the mirrored classes are crawled again instead of the delta sync
+
+        Returns
+        ------
+        dictionary
+            'updated': the number of nodes fetched again, 'removed': the number of nodes deleted from the mirror
+            and 'recrawled': the URIs of the classes crawled again
+        """
+
+        started = get_timestamp_dtp_format(datetime.now())
+        stats = {'updated': 0, 'removed': 0, 'recrawled': []}
+        for class_uri in self.classes:
+            if not full:
+                for page in self.delta_sync.iter_changed_pages(dtp_api, class_uri, read_ahead):
+                    self.__store(dtp_api.DTP_CONFIG, class_uri, page['items'])
+                    stats['updated'] += len(page['items'])
+
+            nb_mirrored = len(self.find(class_query(dtp_api.DTP_CONFIG, class_uri)))
+            if full or class_uri in self.stale or count_class_nodes(dtp_api, class_uri) != nb_mirrored:
+                nb_nodes, nb_removed = self.__crawl_class(dtp_api, class_uri, read_ahead)
+                stats['updated'] += nb_nodes
+                stats['removed'] += nb_removed
+                stats['recrawled'].append(class_uri)
+            self.stale.discard(class_uri)
+
+        self.synced = started
+        logger_global.info('Mirror synced: ' + str(stats['updated']) + ' nodes updated, ' + str(stats['removed']) +
+                           ' removed, classes crawled again: ' + ', '.join(stats['recrawled']))
+        return stats
+
+    def invalidate(self, iri, classes=()):
+        """
+        The method drops a node written on the platform from the mirror, e.g. by the create_*, link_* or update_*
+        methods of DTPApi. The mirrored classes of the node are marked stale. A node which is not mirrored,
+        e.g. a new node, marks stale the mirrored classes matching its classes, the given ones
+        or the classes the mirrored nodes of these classes are members of.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of the written node
+        classes : iterable, optional
+            the classes of the written node, e.g. the _classes of the payload
+        """
+
+        node_uuid = self.uuids.get(iri)
+        if node_uuid is not None:
+            self.invalidate_uuid(node_uuid)
+            return
+        for own_class in classes:
+            if own_class in self.classes:
+                self.stale.add(own_class)
+            self.stale.update(self.__mirrored_as.get(own_class, ()))
+
+    def invalidate_uuid(self, node_uuid):
+        """
+        The method drops a node written on the platform from the mirror and marks its mirrored classes stale,
+        an unknown UUID is ignored.
+
+        Parameters
+        ----------
+        node_uuid : str, obligatory
+            the UUID of the written node
+        """
+
+        self.stale.update(self.classes_of(node_uuid).intersection(self.classes))
+        self.delete_node(node_uuid)
+
+    def covers(self, body):
+        """
+        The method checks if a find query can be answered by the mirror: the query has to stay
+        in the domain of the mirror, its classes have to be mirrored and not stale and its IRIs have to be known.
+        Every element has to be restricted to known IRIs or to a mirrored class. The nodes reached by a hop
+        without conditions can be of a class that is not mirrored, so such a hop is answered only if it follows
+        the out edges of known IRIs and all the targets of these edges are mirrored.
+
+        Parameters
+        ----------
+        body : dictionary, obligatory
+            the body of a find request
+
+        Returns
+        ------
+        bool
+            True if the query can be answered by the mirror
+        """
+
+        query = body.get('query')
+        if query is None:
+            return False
+        elements = query if isinstance(query, list) else [query]
+        aliases = {element['$alias'] for element in elements if '$alias' in element}
+        for element in elements:
+            for key, value in element.items():
+                if (key.startswith('->') or key.startswith('<-')) and value.get('$alias') not in aliases and \
+                        not (key.startswith('->') and self.__targets_mirrored(element, key[2:])):
+                    return False
+
+            if element.get('$domain', self.domain) != self.domain:
+                return False
+            iri = element.get('$iri', element.get('iri'))
+            if isinstance(iri, str) and iri not in self.uuids:
+                return False
+            if isinstance(iri, dict) and not all(i in self.uuids for i in iri.get('$in', ())):
+                return False
+            classes = element.get('$classes')
+            if classes is not None:
+                wanted = classes.get('$contains') if isinstance(classes, dict) else classes
+                if wanted not in self.classes or wanted in self.stale:
+                    return False
+            elif not (isinstance(iri, str) or (isinstance(iri, dict) and '$in' in iri)):
+                return False
+        return True
+
+    def __targets_mirrored(self, element, label):
+        iri = element.get('$iri', element.get('iri'))
+        if isinstance(iri, str):
+            iris = [iri]
+        elif isinstance(iri, dict) and isinstance(iri.get('$in'), list):
+            iris = iri['$in']
+        else:
+            return False
+        for source in iris:
+            node_uuid = self.uuids.get(source)
+            if node_uuid is None:
+                return False
+            if not all(edge['_targetIRI'] in self.uuids for edge in self.nodes[node_uuid]['_outE'] if
+                       edge['_label'] == label):
+                return False
+        return True
+
+    def find_page(self, body):
+        """
+        The method answers a find query as the platform does, in a single page without a next link.
+
+        Parameters
+        ----------
+        body : dictionary, obligatory
+            the body of a find request
+
+        Returns
+        ------
+        dictionary
+            the items and the size of the page
+        """
+
+        items = self.get_nodes(self.find(body))
+        return {'items': items, 'size': len(items)}
+
+    def save(self, path):
+        """
+        The method writes the mirror to a JSON lines file, compressed if the path ends with .gz.
+
+        Parameters
+        ----------
+        path : str, obligatory
+            the path to the file
+        """
+
+        with _open(path, 'wb') as fp:
+            fp.write(self.json_codec.dumps({'format': MIRROR_FORMAT, 'version': MIRROR_VERSION, 'domain': self.domain,
+                                            'classes': self.classes, 'created': self.created, 'synced': self.synced,
+                                            'stale': sorted(self.stale),
+                                            'watermark_fields': self.delta_sync.fields,
+                                            'watermarks': self.delta_sync.watermarks}) + b'\n')
+            for node_uuid, node in list(self.nodes.items()):
+                fp.write(self.json_codec.dumps({'node': node, 'classes': sorted(self.classes_of(node_uuid))}) + b'\n')
+
+    @classmethod
+    def load(cls, path):
+        """
+        The method reads a mirror written by save.
+
+        Parameters
+        ----------
+        path : str, obligatory
+            the path to the file
+
+        Returns
+        ------
+        GraphMirror
+            the mirror
+        """
+
+        json_codec = get_json_codec()
+        with _open(path, 'rb') as fp:
+            header = json_codec.loads(fp.readline())
+            if header.get('format') != MIRROR_FORMAT or header.get('version') != MIRROR_VERSION:
+                raise Exception("Sorry, the file is not a graph mirror: " + path)
+            delta_sync = DeltaSync(header.get('watermark_fields', WATERMARK_FIELDS), header.get('watermarks'))
+            mirror = cls(header['domain'], header['classes'], header['created'], delta_sync, header.get('synced'),
+                         header.get('stale'))
+            for line in fp:
+                entry = json_codec.loads(line)
+                mirror.upsert_nodes([entry['node']], entry['classes'])
+                mirror.__learn([entry['node']], set(entry['classes']).intersection(mirror.classes))
+        return mirror
+
+
+# Below code snippet for mirroring a domain from the command line
+
+def parse_args():
+    """
+    Get parameters from user
+    """
+    parser = argparse.ArgumentParser(description='Mirror the nodes of a DTP domain to a local file')
+    parser.add_argument('--xml_path', '-x', type=str, help='path to config xml file', required=True)
+    parser.add_argument('--output', '-o', type=str, help='path to the mirror file, .gz to compress it',
+                        required=True)
+    parser.add_argument('--sync', default=False, action='store_true',
+                        help='update an existing mirror file with the nodes whose timeStamp, processStart or '
+                             'processEnd changed since its last sync; new links and other updates are not seen')
+    parser.add_argument('--full', default=False, action='store_true',
+                        help='with --sync, crawl all the classes again, it picks up the new links and all updates')
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from DTP_API import DTPApi
+    from DTP_config import DTPConfig
+
+    args = parse_args()
+    with DTPApi(DTPConfig(args.xml_path)) as dtp_api:
+        if args.sync:
+            graph_mirror = GraphMirror.load(args.output)
+            graph_mirror.sync(dtp_api, full=args.full)
+        else:
+            graph_mirror = GraphMirror.crawl(dtp_api)
+    graph_mirror.save(args.output)
+    print(f"{len(graph_mirror)} nodes mirrored to {args.output}")
@@ -4,10 +4,24 @@
 #  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
 #  This file cannot be used without a written permission from the author(s).
 
+import cProfile
+import io
 import logging
 import logging.config
 import multiprocessing
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from multiprocessing_logging import BatchingFileHandler, start_queue_logging
+
+OFFSET_QUERY_PARAMS = ('first', 'offset', 'skip', 'start', 'from')
+PAGE_QUERY_PARAMS = ('page', 'pageNumber', 'page_number')
 
 
 def get_element_type(DTP_CONFIG, element):
@@ -82,6 +96,240 @@ def get_info_from_log(line, marker):
     return [x.strip() for x in ids.split(',')]
 
 
+def get_page_url_builder(next_url, page_size):
+    """
+    The function derives direct page URLs from the 'next' link of the first page of a query.
+    Both offset (e.g. ?first=100&size=100) and page number (e.g. ?page=2) links are recognized.
+
+    Parameters
+    ----------
+    next_url : str, obligatory
+        the 'next' link returned with the first page
+    page_size : int, obligatory
+        the number of items on the first page
+
+    Returns
+    ------
+    function or None
+        a function mapping a page index, starting from 0, to its URL,
+        or None if the link does not expose a recognized page parameter
+    """
+
+    parts = urlsplit(next_url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+
+    def builder_for(param_index, value_of_page):
+        name_of_param = params[param_index][0]
+
+        def page_url(page_index):
+            new_params = list(params)
+            new_params[param_index] = (name_of_param, str(value_of_page(page_index)))
+            return urlunsplit(parts._replace(query=urlencode(new_params)))
+
+        return page_url
+
+    for i, (name, value) in enumerate(params):
+        if not value.isdigit():
+            continue
+        if name in OFFSET_QUERY_PARAMS and int(value) == page_size:
+            return builder_for(i, lambda page_index: page_index * page_size)
+        if name in PAGE_QUERY_PARAMS and int(value) in (1, 2):
+            first_page_number = int(value) - 1
+            return builder_for(i, lambda page_index: page_index + first_page_number)
+    return None
+
+
+def pretty_http_request_to_string(req, max_body=None):
+    """
+    The function formats a prepared HTTP request: the method, the URL, the headers and the body.
+    Source: https://stackoverflow.com/questions/20658572/python-requests-print-entire-http-request-raw
+    Author: AntonioHerraizS
+
+    Parameters
+    ----------
+    req : requests.PreparedRequest, obligatory
+        the prepared request
+    max_body : int, optional
+        the maximum number of characters, or bytes, of the body kept, None for the full body
+
+    Returns
+    ------
+    str
+        the request as a string
+    """
+
+    body = req.body
+    if isinstance(body, bytes):
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError:  # e.g. a binary file sent as a blob
+            pass
+    if max_body is not None and body is not None and len(body) > max_body:
+        body = '{}... [{} of {} bytes shown]'.format(body[:max_body], max_body, len(body))
+
+    return '{}\n{}\r\n{}\r\n\r\n{}\n{}'.format(
+        '-----------START-----------',
+        req.method + ' ' + req.url,
+        '\r\n'.join('{}: {}'.format(k, v) for k, v in req.headers.items()),
+        body,
+        '-----------END-----------'
+    )
+
+
+class LazyHTTPRequest:
+    """
+    The class wraps a prepared HTTP request passed as a logging argument, so the request
+    is formatted only if a handler actually emits the record.
+
+    Usage
+    -----
+    logger_global.debug('HTTP request: \n%s', LazyHTTPRequest(prepared, max_body=2048))
+    """
+
+    __slots__ = ('req', 'max_body')
+
+    def __init__(self, req, max_body=None):
+        self.req = req
+        self.max_body = max_body
+
+    def __str__(self):
+        return pretty_http_request_to_string(self.req, self.max_body)
+
+
+def add_profile_argument(parser):
+    """
+    The function adds the --profile option of the command line scripts to an argument parser, see profiling.
+
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser, obligatory
+        the parser of the script
+    """
+
+    parser.add_argument('--profile', '-p', type=str, nargs='?', const='profile', default=None, metavar='PREFIX',
+                        help='run under cProfile and tracemalloc and write PREFIX.prof, PREFIX_profile.txt '
+                             'and PREFIX_memory.txt (default prefix: profile)')
+
+
+def _take_peak_snapshots(state, stop, interval, growth):
+    # tracemalloc keeps only the peak size, the allocation sites are recorded whenever the traced memory grows
+    while not stop.wait(interval):
+        current, _ = tracemalloc.get_traced_memory()
+        if current > state['size'] * growth:
+            state['snapshot'] = tracemalloc.take_snapshot()
+            state['size'] = current
+
+
+def _allocation_report(snapshot, title, nb_allocations):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>')))
+    lines = [title]
+    for index, stat in enumerate(snapshot.statistics('lineno')[:nb_allocations], 1):
+        frame = stat.traceback[0]
+        lines.append(f"#{index}: {frame.filename}:{frame.lineno}: {stat.size / 1024 / 1024:.1f} MiB "
+                     f"in {stat.count} blocks")
+    lines.append('')
+    lines.append('Call stacks of the largest allocation sites:')
+    for stat in snapshot.statistics('traceback')[:3]:
+        lines.append(f"{stat.size / 1024 / 1024:.1f} MiB in {stat.count} blocks")
+        lines.extend('    ' + line for line in stat.traceback.format(most_recent_first=True))
+    return lines
+
+
+@contextmanager
+def profiling(output_prefix, nb_allocations=25, nb_frames=10, nb_functions=40, snapshot_interval=0.5):
+    """
+    The function runs the code in its context under cProfile and tracemalloc. It writes the profile
+    (output_prefix.prof, e.g. for snakeviz or pstats), the functions sorted by cumulative time
+    (output_prefix_profile.txt) and the peak memory with the top allocation sites (output_prefix_memory.txt).
+    The threads started in the context, e.g. the page prefetching, are profiled too and merged into the report.
+    The allocation sites are taken from the largest traced memory observed, sampled every snapshot_interval
+    seconds, or from the end of the context if it is larger. Tracing the allocations slows the code down.
+
+    Usage
+    -----
+    with profiling(args.profile):
+        response = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, "ifc:Class", "IfcWall")
+
+    Parameters
+    ----------
+    output_prefix : str, obligatory
+        the prefix of the paths of the reports, None runs the code without profiling
+    nb_allocations : int, optional
+        the number of allocation sites in the memory report
+    nb_frames : int, optional
+        the number of frames stored for each allocation
+    nb_functions : int, optional
+        the number of functions in the profile report
+    snapshot_interval : float, optional
+        the number of seconds between the checks of the traced memory
+    """
+
+    if output_prefix is None:
+        yield
+        return
+
+    directory = os.path.dirname(output_prefix)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    tracemalloc.start(nb_frames)
+    state = {'size': 0, 'snapshot': None}
+    stop = threading.Event()
+    sampler = threading.Thread(target=_take_peak_snapshots, args=(state, stop, snapshot_interval, 1.1),
+                               name='profiling-memory-sampler', daemon=True)
+    sampler.start()
+    profiler = cProfile.Profile()
+    thread_profilers = []
+
+    def profile_thread(frame, event, arg):
+        # called once in every new thread, the profiler of the thread replaces the hook
+        thread_profiler = cProfile.Profile()
+        thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    # since Python 3.12 a profiler records all the threads
+    if sys.version_info < (3, 12):
+        threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        stop.set()
+        sampler.join()
+        current, peak = tracemalloc.get_traced_memory()
+        if current >= state['size']:
+            state['snapshot'] = tracemalloc.take_snapshot()
+            state['size'] = current
+        tracemalloc.stop()
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        for thread_profiler in thread_profilers:
+            stats.add(thread_profiler)
+        stats.dump_stats(output_prefix + '.prof')
+        stats.sort_stats('cumulative').print_stats(nb_functions)
+        with open(output_prefix + '_profile.txt', 'w') as fp:
+            fp.write(stream.getvalue())
+
+        lines = [f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB",
+                 f"Traced memory at the end: {current / 1024 / 1024:.1f} MiB", '']
+        lines += _allocation_report(state['snapshot'], f"Top allocation sites with "
+                                    f"{state['size'] / 1024 / 1024:.1f} MiB traced:", nb_allocations)
+        with open(output_prefix + '_memory.txt', 'w') as fp:
+            fp.write('\n'.join(lines) + '\n')
+
+        summary = (f"Profile written to {output_prefix}.prof, {output_prefix}_profile.txt and "
+                   f"{output_prefix}_memory.txt, peak traced memory: {peak / 1024 / 1024:.1f} MiB")
+        logger_global.info(summary)
+        print(summary)
+
+
 def read_ply_collection_date(ply_path):
     comment_date_begin = 'comment collected'
     file = open(ply_path, 'r')
@@ -100,16 +348,17 @@ def read_ply_collection_date(ply_path):
 
 
 # based on function from https://stackoverflow.com/questions/641420/how-should-i-log-while-using-multiprocessing-in-python
+# the records are written by a background thread, see multiprocessing_logging.start_queue_logging
 def create_logger(log_filename, formatter, level):
     logger = multiprocessing.get_logger()
     logger.setLevel(level)
-    handler = logging.FileHandler(log_filename)
-    handler.setFormatter(formatter)
 
     # this bit will make sure you won't have 
     # duplicated messages in the output
     if not len(logger.handlers):
-        logger.addHandler(handler)
+        handler = BatchingFileHandler(log_filename)
+        handler.setFormatter(formatter)
+        start_queue_logging(logger, handler)
     return logger
 
 
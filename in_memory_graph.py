@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+import threading
+import uuid
+from collections import defaultdict
+
+MISSING = object()
+
+
+class QueryError(Exception):
+    pass
+
+
+def match_value(value, condition):
+    """
+    The function checks a node field against a query condition, either a plain value or
+    an operator dictionary such as {"$in": [...]}, {"$gte": ...} or {"$exists": True}.
+
+    Parameters
+    ----------
+    value : object, obligatory
+        the value of the field, MISSING if the node does not have the field
+    condition : object, obligatory
+        the condition from the query
+
+    Returns
+    ------
+    bool
+        True if the value satisfies the condition
+    """
+
+    if not (isinstance(condition, dict) and condition and all(key.startswith('$') for key in condition)):
+        return value is not MISSING and value == condition
+
+    for operator, argument in condition.items():
+        try:
+            if operator == '$in':
+                matched = value is not MISSING and value in argument
+            elif operator == '$nin':
+                matched = value is MISSING or value not in argument
+            elif operator == '$ne':
+                matched = value is MISSING or value != argument
+            elif operator == '$exists':
+                matched = (value is not MISSING) == bool(argument)
+            elif operator == '$contains':
+                matched = value is not MISSING and argument in value
+            elif operator == '$gt':
+                matched = value is not MISSING and value > argument
+            elif operator == '$gte':
+                matched = value is not MISSING and value >= argument
+            elif operator == '$lt':
+                matched = value is not MISSING and value < argument
+            elif operator == '$lte':
+                matched = value is not MISSING and value <= argument
+            else:
+                raise QueryError("Unsupported operator: " + operator)
+        except TypeError:
+            matched = False
+        if not matched:
+            return False
+    return True
+
+
+class InMemoryGraph:
+    """
+    The class keeps DTP nodes, their out edges and blobs in memory and evaluates find and count queries.
+
+    Attributes
+    ----------
+    nodes : dictionary
+        map from UUIDs to nodes
+    uuids : dictionary
+        map from IRIs to UUIDs
+    blobs : dictionary
+        map from blob UUIDs to blobs
+
+    Methods
+    -------
+    add_nodes(nodes)
+        returns list of UUIDs and list of conflicting IRIs
+    upsert_nodes(nodes, classes)
+        returns int, the number of nodes replaced
+    update_set(updates)
+        returns list of unknown IRIs
+    update_unset(updates)
+        returns list of unknown IRIs
+    delete_node(node_uuid)
+        returns bool, True if success and False otherwise
+    find(body)
+        returns list of nodes
+    classes_of(node_uuid)
+        returns set of classes
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.uuids = {}
+        self.blobs = {}
+        self.__classes = defaultdict(dict)  # class -> ordered set of UUIDs
+        self.__memberships = {}  # UUID -> the classes of the node in self.__classes
+        self.__in_edges = defaultdict(dict)  # target IRI -> ordered set of (label, source IRI)
+        self.__version = 0
+        self.__results = {}  # query -> (version, UUIDs), keeps the pagination of a query cheap
+        self.__lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __add_out_edges(self, node, edges):
+        existing = {(edge['_label'], edge['_targetIRI']) for edge in node['_outE']}
+        for edge in edges:
+            key = (edge['_label'], edge['_targetIRI'])
+            if key not in existing:
+                existing.add(key)
+                node['_outE'].append({'_label': edge['_label'], '_targetIRI': edge['_targetIRI']})
+                self.__in_edges[edge['_targetIRI']][(edge['_label'], node['_iri'])] = None
+
+    def add_nodes(self, nodes):
+        """
+        The method creates new nodes.
+
+        Parameters
+        ----------
+        nodes : list, obligatory
+            nodes as sent to the add_node endpoint
+
+        Returns
+        ------
+        list, list
+            the UUIDs of the new nodes and the IRIs which already exist
+        """
+
+        new_uuids, conflicts = [], []
+        with self.__lock:
+            for new_node in nodes:
+                if new_node['_iri'] in self.uuids:
+                    conflicts.append(new_node['_iri'])
+                    continue
+                node = {key: value for key, value in new_node.items() if key != '_outE'}
+                node['_uuid'] = str(uuid.uuid4())
+                node.setdefault('_classes', [])
+                node['_outE'] = []
+                self.__insert(node, node['_classes'], new_node.get('_outE', []))
+                new_uuids.append(node['_uuid'])
+            self.__version += 1
+        return new_uuids, conflicts
+
+    def __insert(self, node, classes, edges):
+        self.nodes[node['_uuid']] = node
+        self.uuids[node['_iri']] = node['_uuid']
+        self.__memberships[node['_uuid']] = set(classes)
+        for node_class in classes:
+            self.__classes[node_class][node['_uuid']] = None
+        self.__add_out_edges(node, edges)
+
+    def __remove(self, node):
+        del self.nodes[node['_uuid']]
+        del self.uuids[node['_iri']]
+        for node_class in self.__memberships.pop(node['_uuid']):
+            self.__classes[node_class].pop(node['_uuid'], None)
+        for edge in node['_outE']:
+            self.__in_edges[edge['_targetIRI']].pop((edge['_label'], node['_iri']), None)
+
+    def upsert_nodes(self, nodes, classes=()):
+        """
+        The method inserts nodes as returned by the platform, keeping their UUIDs. A node with the IRI
+        of an existing node replaces it, including its out edges.
+
+        Parameters
+        ----------
+        nodes : iterable, obligatory
+            nodes as returned by the find endpoint
+        classes : iterable, optional
+            classes the nodes belong to besides their _classes, e.g. the superclass of an
+            inheritance query, since the ontology is not known locally
+
+        Returns
+        ------
+        int
+            the number of replaced nodes
+        """
+
+        classes = tuple(classes)
+        nb_replaced = 0
+        with self.__lock:
+            for new_node in nodes:
+                node = {key: value for key, value in new_node.items() if key != '_outE'}
+                node.setdefault('_uuid', str(uuid.uuid4()))
+                node.setdefault('_classes', [])
+                node['_outE'] = []
+                memberships = set(node['_classes']).union(classes)
+                old_uuid = self.uuids.get(node['_iri'])
+                if old_uuid is not None:
+                    old_node = self.nodes[old_uuid]
+                    # the classes given by earlier calls are kept, the own classes of the node are replaced
+                    memberships.update(self.__memberships[old_uuid].difference(old_node['_classes']))
+                    self.__remove(old_node)
+                    nb_replaced += 1
+                self.__insert(node, memberships, new_node.get('_outE', []))
+            self.__version += 1
+        return nb_replaced
+
+    def update_set(self, updates):
+        """
+        The method sets fields of existing nodes, new out edges are added to the existing ones.
+
+        Parameters
+        ----------
+        updates : list, obligatory
+            partial nodes identified by their IRI
+
+        Returns
+        ------
+        list
+            the IRIs without a node
+        """
+
+        unknown = []
+        with self.__lock:
+            for update in updates:
+                node_uuid = self.uuids.get(update.get('_iri'))
+                if node_uuid is None:
+                    unknown.append(update.get('_iri'))
+                    continue
+                node = self.nodes[node_uuid]
+                for key, value in update.items():
+                    if key == '_outE':
+                        self.__add_out_edges(node, value)
+                    elif key not in ('_iri', '_uuid', '_domain'):
+                        node[key] = value
+            self.__version += 1
+        return unknown
+
+    def update_unset(self, updates):
+        """
+        The method removes fields of existing nodes.
+
+        Parameters
+        ----------
+        updates : list, obligatory
+            partial nodes identified by their IRI, the other keys are the fields to remove
+
+        Returns
+        ------
+        list
+            the IRIs without a node
+        """
+
+        unknown = []
+        with self.__lock:
+            for update in updates:
+                node_uuid = self.uuids.get(update.get('_iri'))
+                if node_uuid is None:
+                    unknown.append(update.get('_iri'))
+                    continue
+                for key in update.keys():
+                    if key not in ('_iri', '_uuid', '_domain', '_classes', '_outE'):
+                        self.nodes[node_uuid].pop(key, None)
+            self.__version += 1
+        return unknown
+
+    def delete_node(self, node_uuid):
+        """
+        The method deletes a node and its out edges.
+
+        Parameters
+        ----------
+        node_uuid : str, obligatory
+            the UUID of the node
+
+        Returns
+        ------
+        bool
+            True if the node existed
+        """
+
+        with self.__lock:
+            node = self.nodes.get(node_uuid)
+            if node is None:
+                return False
+            self.__remove(node)
+            for blob in self.blobs.values():
+                blob['avatars'].discard(node_uuid)
+            self.__version += 1
+            return True
+
+    def __candidates(self, element):
+        iri = element.get('$iri', element.get('iri', MISSING))
+        if isinstance(iri, str):
+            node_uuid = self.uuids.get(iri)
+            return [node_uuid] if node_uuid is not None else []
+        if isinstance(iri, dict) and isinstance(iri.get('$in'), list):
+            return [self.uuids[i] for i in dict.fromkeys(iri['$in']) if i in self.uuids]
+        classes = element.get('$classes')
+        if isinstance(classes, dict) and '$contains' in classes:
+            return list(self.__classes.get(classes['$contains'], {}))
+        return list(self.nodes)
+
+    def __matches(self, node, element):
+        for key, condition in element.items():
+            if key.startswith('->') or key.startswith('<-') or key == '$alias':
+                continue
+            if key == '$domain':
+                matched = node.get('_domain') == condition
+            elif key in ('$iri', 'iri'):
+                matched = match_value(node['_iri'], condition)
+            elif key == '$classes':
+                # the ontology is not known locally, so the class inheritance is resolved
+                # only for the classes given to upsert_nodes
+                wanted = condition.get('$contains') if isinstance(condition, dict) else condition
+                if isinstance(condition, dict) and condition.get('$inheritance'):
+                    matched = node['_uuid'] in self.__classes.get(wanted, ())
+                else:
+                    matched = wanted in node.get('_classes', ())
+            else:
+                matched = match_value(node.get(key, MISSING), condition)
+            if not matched:
+                return False
+        return True
+
+    def __neighbours(self, node_uuids, direction, label):
+        found = {}
+        for node_uuid in node_uuids:
+            node = self.nodes[node_uuid]
+            if direction == '->':
+                targets = (edge['_targetIRI'] for edge in node['_outE'] if edge['_label'] == label)
+            else:
+                targets = (source for edge_label, source in self.__in_edges.get(node['_iri'], {}) if
+                           edge_label == label)
+            for iri in targets:
+                neighbour_uuid = self.uuids.get(iri)
+                if neighbour_uuid is not None:
+                    found[neighbour_uuid] = None
+        return list(found)
+
+    def __evaluate(self, body):
+        query = body.get('query')
+        if query is None:
+            raise QueryError("The body has no query.")
+        elements = query if isinstance(query, list) else [query]
+        by_alias = {element['$alias']: element for element in elements if '$alias' in element}
+
+        edges = []
+        for index, element in enumerate(elements):
+            source = element.get('$alias', index)
+            for key, value in element.items():
+                if key.startswith('->') or key.startswith('<-'):
+                    edges.append((source, key[:2], key[2:], value['$alias']))
+
+        targets = {edge[3] for edge in edges}
+        results = {}
+        for index, element in enumerate(elements):
+            alias = element.get('$alias', index)
+            if alias not in targets:
+                results[alias] = [node_uuid for node_uuid in self.__candidates(element) if
+                                  self.__matches(self.nodes[node_uuid], element)]
+
+        # the aliases are resolved following the edges from the elements which are not edge targets
+        pending = list(edges)
+        while pending:
+            ready = [edge for edge in pending if edge[0] in results]
+            if not ready:
+                raise QueryError("The query aliases do not form a tree.")
+            for edge in ready:
+                pending.remove(edge)
+                source, direction, label, alias = edge
+                reached = self.__neighbours(results[source], direction, label)
+                element = by_alias.get(alias, {})
+                reached = [node_uuid for node_uuid in reached if self.__matches(self.nodes[node_uuid], element)]
+                if alias in results:
+                    kept = set(reached)
+                    reached = [node_uuid for node_uuid in results[alias] if node_uuid in kept]
+                results[alias] = reached
+
+        returned = body.get('return', elements[0].get('$alias', 0))
+        return results.get(returned, [])
+
+    def find(self, body):
+        """
+        The method evaluates a find query, a single element or a list of elements chained with aliases.
+
+        Parameters
+        ----------
+        body : dictionary, obligatory
+            the body of a find or count request
+
+        Returns
+        ------
+        list
+            the UUIDs of the matching nodes, in a stable order
+        """
+
+        key = json.dumps(body, sort_keys=True)
+        with self.__lock:
+            cached = self.__results.get(key)
+            if cached is not None and cached[0] == self.__version:
+                return cached[1]
+            node_uuids = self.__evaluate(body)
+            if len(self.__results) > 64:
+                self.__results.clear()
+            self.__results[key] = (self.__version, node_uuids)
+            return node_uuids
+
+    def classes_of(self, node_uuid):
+        with self.__lock:
+            return set(self.__memberships.get(node_uuid, ()))
+
+    def get_nodes(self, node_uuids):
+        with self.__lock:
+            return [json.loads(json.dumps(self.nodes[node_uuid])) for node_uuid in node_uuids if
+                    node_uuid in self.nodes]
+
+    def add_blob(self, filename, content, content_type, fields):
+        with self.__lock:
+            blob_uuid = str(uuid.uuid4())
+            self.blobs[blob_uuid] = {'_uuid': blob_uuid, 'filename': filename, 'content': content,
+                                     'content_type': content_type, 'fields': fields, 'avatars': set()}
+            return blob_uuid
+
+    def link_blob(self, blob_uuid, node_uuids, link=True):
+        with self.__lock:
+            blob = self.blobs.get(blob_uuid)
+            if blob is None or any(node_uuid not in self.nodes for node_uuid in node_uuids):
+                return False
+            if link:
+                blob['avatars'].update(node_uuids)
+            else:
+                blob['avatars'].difference_update(node_uuids)
+            return True
+
+    def blobs_of_node(self, node_uuid):
+        with self.__lock:
+            return [{'_uuid': blob['_uuid'], 'filename': blob['filename'], 'content_type': blob['content_type']}
+                    for blob in self.blobs.values() if node_uuid in blob['avatars']]
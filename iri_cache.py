@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class IRICache:
+    """
+    The class is a bounded, thread-safe, in-memory map from node IRIs to UUIDs.
+    The least recently used entries are evicted first and entries older than ttl seconds are ignored.
+
+    Attributes
+    ----------
+    maxsize : int
+        the maximum number of cached IRIs, 0 disables the cache
+    ttl : float
+        the number of seconds an entry stays valid, None for no expiry
+    hits : int
+        the number of lookups answered from the cache
+    misses : int
+        the number of lookups not found in the cache
+    evictions : int
+        the number of entries dropped because the cache was full
+
+    Methods
+    -------
+    get(iri)
+        returns str, UUID or None
+    put(iri, uuid)
+        None
+    invalidate(iri)
+        None
+    invalidate_uuid(uuid)
+        None
+    clear()
+        None
+    stats()
+        returns dictionary with the counters
+    """
+
+    def __init__(self, maxsize=10000, ttl=3600):
+        """
+        Parameters
+        ----------
+        maxsize : int, optional
+            the maximum number of cached IRIs, 0 disables the cache
+        ttl : float, optional
+            the number of seconds an entry stays valid, None for no expiry
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()  # iri -> (uuid, expiry)
+        self.__iris = {}  # uuid -> iri
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __drop(self, iri):
+        node_uuid, _ = self.__entries.pop(iri)
+        self.__iris.pop(node_uuid, None)
+
+    def get(self, iri):
+        """
+        The method returns the cached UUID of an IRI.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of a node
+
+        Returns
+        ------
+        str
+            the UUID or None if the IRI is not cached or expired
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(iri)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self.__drop(iri)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(iri)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, iri, node_uuid):
+        """
+        The method caches the UUID of an IRI.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of a node
+        node_uuid : str, obligatory
+            the UUID of the node
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        expiry = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.__lock:
+            if iri in self.__entries:
+                self.__drop(iri)
+            self.__entries[iri] = (node_uuid, expiry)
+            self.__iris[node_uuid] = iri
+            while len(self.__entries) > self.maxsize:
+                self.__drop(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def invalidate(self, iri):
+        """
+        The method removes an IRI from the cache, e.g. when the node has been created or deleted.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of a node
+        """
+
+        with self.__lock:
+            if iri in self.__entries:
+                self.__drop(iri)
+
+    def invalidate_uuid(self, node_uuid):
+        """
+        The method removes the IRI cached for a UUID, e.g. when the node has been deleted.
+
+        Parameters
+        ----------
+        node_uuid : str, obligatory
+            the UUID of a node
+        """
+
+        with self.__lock:
+            iri = self.__iris.get(node_uuid)
+            if iri is not None:
+                self.__drop(iri)
+
+    def clear(self):
+        """
+        The method removes all the entries, the counters are kept.
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__iris.clear()
+
+    def stats(self):
+        """
+        The method returns the counters of the cache.
+
+        Returns
+        ------
+        dictionary
+            size, maxsize, hits, misses and evictions
+        """
+
+        with self.__lock:
+            return {'size': len(self.__entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
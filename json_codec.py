@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StdlibJSONCodec:
+    """
+    The class encodes the payloads and decodes the responses with the json module of the standard library.
+
+    Methods
+    -------
+    dumps(obj)
+        returns bytes, UTF-8 encoded JSON
+    loads(data)
+        returns the decoded object
+    """
+
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        # json.loads detects the encoding of bytes itself
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """
+    The class encodes the payloads and decodes the responses with orjson, which works directly on bytes.
+
+    Methods
+    -------
+    dumps(obj)
+        returns bytes, UTF-8 encoded JSON
+    loads(data)
+        returns the decoded object
+    """
+
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(obj):
+        return orjson.dumps(obj)
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+def get_json_codec(backend='auto'):
+    """
+    The function returns a JSON codec, the codecs encode to bytes and decode bytes or strings.
+
+    Parameters
+    ----------
+    backend : str, optional
+        'orjson', 'json' or 'auto' for orjson if it is installed and json otherwise
+
+    Returns
+    ------
+    class
+        OrjsonCodec or StdlibJSONCodec
+    """
+
+    if backend == 'auto':
+        return OrjsonCodec if orjson is not None else StdlibJSONCodec
+    if backend == 'orjson':
+        if orjson is None:
+            raise Exception("Sorry, orjson is not installed.")
+        return OrjsonCodec
+    if backend == 'json':
+        return StdlibJSONCodec
+    raise Exception("Sorry, the JSON backend has to be: auto, orjson or json.")
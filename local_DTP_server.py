@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+
+"""
+The file contains a lightweight local stand-in for the DTP, used for offline testing and benchmarking.
+It implements the endpoints listed in DTP_config.xml on top of an in-memory graph.
+For more information, contact the author(s) listed above.
+"""
+import argparse
+import email.parser
+import email.policy
+import json
+import os
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from in_memory_graph import InMemoryGraph, QueryError
+
+
+class _DTPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'LocalDTP/1.0'
+    disable_nagle_algorithm = True  # the headers and the body are written separately
+
+    routes = [
+        ('POST', r'/avatars/find', 'find'),
+        ('POST', r'/avatars/count', 'count'),
+        ('POST', r'/avatars/delete', 'delete_avatar_iri'),
+        ('POST', r'/batch/avatars', 'add_node'),
+        ('PUT', r'/batch/avatars/update/set', 'update_set'),
+        ('PUT', r'/batch/avatars/update/unset', 'update_unset'),
+        ('GET', r'/avatars/(?P<id>[^/]+)/blobs', 'get_blobs_per_element'),
+        ('DELETE', r'/avatars/(?P<id>[^/]+)', 'delete_avatar'),
+        ('POST', r'/blobs', 'send_blob'),
+        ('GET', r'/blobs/(?P<id>[^/]+)/download', 'download_blob'),
+        ('DELETE', r'/blobs/(?P<id>[^/]+)', 'delete_blob'),
+        ('POST', r'/blobs/link', 'link_blob'),
+        ('PUT', r'/blobs/link', 'link_blob'),
+        ('POST', r'/blobs/unlink', 'unlink_blob'),
+        ('PUT', r'/blobs/unlink', 'unlink_blob'),
+    ]
+
+    def log_message(self, format, *args):
+        if self.server.dtp.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.__dispatch('GET')
+
+    def do_POST(self):
+        self.__dispatch('POST')
+
+    def do_PUT(self):
+        self.__dispatch('PUT')
+
+    def do_DELETE(self):
+        self.__dispatch('DELETE')
+
+    def __reply(self, status, payload=None, headers=None, content_type='application/json'):
+        if payload is None:
+            body = b''
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __dispatch(self, method):
+        dtp = self.server.dtp
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+        parts = urlsplit(self.path)
+        self.query_params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        delay = dtp.latency + (random.uniform(0, dtp.jitter) if dtp.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if dtp.error_rate > 0 and random.random() < dtp.error_rate:
+            headers = {'Retry-After': str(dtp.retry_after)} if dtp.retry_after is not None else None
+            self.__reply(dtp.error_status, {'error': 'injected error'}, headers)
+            return
+
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, parts.path.rstrip('/'))
+            if route_method == method and match is not None:
+                try:
+                    status, payload, headers = getattr(self, 'handle_' + name)(**match.groupdict())
+                except (QueryError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    status, payload, headers = 400, {'error': str(e)}, None
+                self.__reply(status, payload, headers)
+                return
+        self.__reply(404, {'error': 'unknown endpoint: ' + method + ' ' + parts.path})
+
+    def __json_body(self):
+        return json.loads(self.body.decode('utf-8'))
+
+    def handle_find(self):
+        dtp = self.server.dtp
+        node_uuids = dtp.graph.find(self.__json_body())
+        size = min(int(self.query_params.get('size', dtp.page_size)), dtp.max_page_size)
+        first = int(self.query_params.get('first', 0))
+        items = dtp.graph.get_nodes(node_uuids[first: first + size])
+        response = {'items': items, 'size': len(items)}
+        if first + size < len(node_uuids):
+            response['next'] = dtp.url + '/avatars/find?' + urlencode({'size': size, 'first': first + size})
+        return 200, response, None
+
+    def handle_count(self):
+        return 200, {'total_items': len(self.server.dtp.graph.find(self.__json_body()))}, None
+
+    def handle_add_node(self):
+        nodes = self.__json_body()
+        if not isinstance(nodes, list):
+            raise ValueError('a list of nodes is expected')
+        new_uuids, conflicts = self.server.dtp.graph.add_nodes(nodes)
+        if conflicts:
+            return 409, {'error': 'the nodes already exist', 'iris': conflicts, 'created': new_uuids}, None
+        return 201, new_uuids, None
+
+    def handle_update_set(self):
+        updates = self.__json_body()
+        if isinstance(updates, dict) and 'blob_uuid' in updates:  # link_node_element_to_blob uses this endpoint
+            return self.handle_link_blob()
+        unknown = self.server.dtp.graph.update_set(updates)
+        return (404, {'error': 'unknown nodes', 'iris': unknown}, None) if unknown else (200, {}, None)
+
+    def handle_update_unset(self):
+        unknown = self.server.dtp.graph.update_unset(self.__json_body())
+        return (404, {'error': 'unknown nodes', 'iris': unknown}, None) if unknown else (200, {}, None)
+
+    def handle_delete_avatar(self, id):
+        return (204, None, None) if self.server.dtp.graph.delete_node(id) else (404, {'error': 'unknown node'}, None)
+
+    def handle_delete_avatar_iri(self):
+        graph = self.server.dtp.graph
+        node_uuid = graph.uuids.get(self.__json_body()['_iri'])
+        if node_uuid is None or not graph.delete_node(node_uuid):
+            return 404, {'error': 'unknown node'}, None
+        return 204, None, None
+
+    def handle_send_blob(self):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + self.headers.get('Content-Type', '').encode('latin-1') + b'\r\n\r\n' + self.body)
+        filename, content, content_type, fields = None, b'', None, {}
+        for part in message.iter_parts():
+            if part.get_filename() is not None:
+                filename = part.get_filename()
+                content = part.get_payload(decode=True)
+                content_type = part.get_content_type()
+            else:
+                fields[part.get_param('name', header='content-disposition')] = part.get_content()
+        if filename is None:
+            raise ValueError('the request has no file')
+        blob_uuid = self.server.dtp.graph.add_blob(filename, content, content_type, fields)
+        return 201, {'_uuid': blob_uuid}, {'Location': self.server.dtp.url + '/blobs/' + blob_uuid}
+
+    def handle_download_blob(self, id):
+        blob = self.server.dtp.graph.blobs.get(id)
+        if blob is None:
+            return 404, {'error': 'unknown blob'}, None
+        return 200, blob['content'], None
+
+    def handle_delete_blob(self, id):
+        if self.server.dtp.graph.blobs.pop(id, None) is None:
+            return 404, {'error': 'unknown blob'}, None
+        return 204, None, None
+
+    def handle_link_blob(self, link=True):
+        body = self.__json_body()
+        if not self.server.dtp.graph.link_blob(body['blob_uuid'], body['avatar_uuids'], link=link):
+            return 404, {'error': 'unknown blob or node'}, None
+        return 200, {}, None
+
+    def handle_unlink_blob(self):
+        return self.handle_link_blob(link=False)
+
+    def handle_get_blobs_per_element(self, id):
+        if id not in self.server.dtp.graph.nodes:
+            return 404, {'error': 'unknown node'}, None
+        blobs = self.server.dtp.graph.blobs_of_node(id)
+        return 200, {'items': blobs, 'size': len(blobs)}, None
+
+
+class LocalDTPServer:
+    """
+    The class runs a local HTTP server standing in for the DTP. It keeps an in-memory graph, paginates
+    find results with 'next' links and can inject latency and errors.
+
+    Usage
+    -----
+    with LocalDTPServer(latency=0.01) as server:
+        dtp_config = DTPConfig(server.write_config('local_config.xml'))
+        dtp_api = DTPApi(dtp_config)
+
+    Attributes
+    ----------
+    graph : InMemoryGraph
+        the data served
+    url : str
+        the base URL of the server, e.g. http://127.0.0.1:8080
+    latency : float
+        the delay added to every request in seconds
+    jitter : float
+        the maximum random delay added on top of latency in seconds
+    error_rate : float
+        the probability of answering a request with error_status
+    error_status : int
+        the status code of the injected errors
+    retry_after : int
+        the value of the Retry-After header of the injected errors, None to omit it
+    page_size : int
+        the number of items per page when the request does not set it
+
+    Methods
+    -------
+    start()
+        returns str, the base URL
+    stop()
+        None
+    write_config(config_path, template_path, token_path)
+        returns str, the path to the configuration
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, graph=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, retry_after=None, page_size=100, max_page_size=1000, verbose=False):
+        """
+        Parameters
+        ----------
+        host : str, optional
+            the interface to listen on, an IP address since DTPConfig does not accept 'localhost'
+        port : int, optional
+            the port to listen on, 0 picks a free port
+        graph : InMemoryGraph, optional
+            the data to serve, an empty graph if not provided
+        latency : float, optional
+            the delay added to every request in seconds
+        jitter : float, optional
+            the maximum random delay added on top of latency in seconds
+        error_rate : float, optional
+            the probability, between 0 and 1, of answering a request with error_status
+        error_status : int, optional
+            the status code of the injected errors
+        retry_after : int, optional
+            the value of the Retry-After header of the injected errors
+        page_size : int, optional
+            the number of items per page when the request does not set it
+        max_page_size : int, optional
+            the upper limit of the page size
+        verbose : bool, optional
+            if True then every request is printed
+        """
+
+        self.graph = graph if graph is not None else InMemoryGraph()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.verbose = verbose
+        self.__httpd = ThreadingHTTPServer((host, port), _DTPRequestHandler)
+        self.__httpd.daemon_threads = True
+        self.__httpd.dtp = self
+        self.__thread = None
+        self.url = 'http://' + host + ':' + str(self.__httpd.server_address[1])
+
+    def start(self):
+        """
+        The method starts serving in a background thread.
+
+        Returns
+        ------
+        str
+            the base URL of the server
+        """
+
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever, name='LocalDTPServer', daemon=True)
+        self.__thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self.__httpd.serve_forever()
+
+    def stop(self):
+        """
+        The method stops the server.
+        """
+
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def write_config(self, config_path, template_path=None, token_path=None):
+        """
+        The method writes a DTP configuration file whose API URLs point to the server.
+
+        Parameters
+        ----------
+        config_path : str, obligatory
+            the path of the configuration file to write
+        template_path : str, optional
+            the configuration used as a template, DTP_config.xml of the repository by default
+        token_path : str, optional
+            the path to the dev token file, a dummy token is written next to the configuration if not provided
+
+        Returns
+        ------
+        str
+            config_path
+        """
+
+        if template_path is None:
+            template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'DTP_config.xml')
+        if token_path is None:
+            token_path = os.path.splitext(config_path)[0] + '_token.txt'
+            with open(token_path, 'w') as f:
+                f.write('local-dtp-token')
+
+        tree = ET.parse(template_path)
+        config = tree.getroot()
+        config.find('DEV_TOKEN').text = os.path.abspath(token_path)
+        for url in config.find('API_URLS'):
+            url.text = self.url + urlsplit(url.text.strip(' \t\n\r')).path
+        tree.write(config_path, encoding='UTF-8', xml_declaration=True)
+        return config_path
+
+
+def parse_args():
+    """
+    Get parameters from user
+    """
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the DTP')
+    parser.add_argument('--port', '-p', type=int, default=8080, help='port to listen on')
+    parser.add_argument('--config_out', '-c', type=str, help='path to write a config xml file pointing to the server')
+    parser.add_argument('--seed', type=str, help='path to a JSON file with a list of nodes to load')
+    parser.add_argument('--latency', type=float, default=0.0, help='delay added to every request in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random extra delay in seconds')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='probability of an injected error')
+    parser.add_argument('--error_status', type=int, default=503, help='status code of the injected errors')
+    parser.add_argument('--retry_after', type=int, help='Retry-After header of the injected errors')
+    parser.add_argument('--page_size', type=int, default=100, help='default number of items per page')
+    parser.add_argument('--verbose', '-v', default=False, action='store_true')
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = LocalDTPServer(port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                            error_status=args.error_status, retry_after=args.retry_after,
+                            page_size=args.page_size, verbose=args.verbose)
+    if args.seed:
+        with open(args.seed) as f:
+            server.graph.add_nodes(json.load(f))
+    if args.config_out:
+        print('Config written to:', server.write_config(args.config_out))
+    print('Serving the DTP stand-in at:', server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
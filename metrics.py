@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import bisect
+import json
+import threading
+
+# the upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _APIMetrics:
+    __slots__ = ('statuses', 'errors', 'retries', 'request_bytes', 'response_bytes', 'bucket_counts',
+                 'latency_sum', 'latency_count')
+
+    def __init__(self, nb_buckets):
+        self.statuses = {}
+        self.errors = {}
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.bucket_counts = [0] * (nb_buckets + 1)  # the last bucket is +Inf
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+
+class MetricsRegistry:
+    """
+    The class collects the metrics of the requests sent to the platform, keyed by API name
+    (get_find_elements, add_node, update_set, ...): latency histograms, request and response bytes,
+    status codes, connection errors and retries. Gauges, e.g. the concurrency window, are read at export.
+
+    Usage
+    -----
+    dtp_api = DTPApi(dtp_config)
+    dtp_api.query_all_pages(dtp_api.fetch_element_nodes)
+    print(dtp_api.metrics.to_json())
+    open('metrics.prom', 'w').write(dtp_api.metrics.to_prometheus())
+
+    Attributes
+    ----------
+    buckets : tuple
+        the upper bounds of the latency histogram buckets in seconds
+
+    Methods
+    -------
+    observe_request(api_name, latency, request_bytes, response_bytes, status_code)
+        None
+    observe_error(api_name, latency, error_name)
+        None
+    observe_retry(api_name)
+        None
+    register_gauge(name, function, description)
+        None
+    to_dict()
+        returns dictionary
+    to_json()
+        returns str
+    to_prometheus(prefix)
+        returns str, the Prometheus text exposition format
+    reset()
+        None
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.__apis = {}
+        self.__gauges = {}
+        self.__lock = threading.Lock()
+
+    def __get(self, api_name):
+        api_name = api_name or 'unknown'
+        metrics = self.__apis.get(api_name)
+        if metrics is None:
+            metrics = self.__apis[api_name] = _APIMetrics(len(self.buckets))
+        return metrics
+
+    def __observe_latency(self, metrics, latency):
+        metrics.bucket_counts[bisect.bisect_left(self.buckets, latency)] += 1
+        metrics.latency_sum += latency
+        metrics.latency_count += 1
+
+    def observe_request(self, api_name, latency, request_bytes, response_bytes, status_code):
+        """
+        The method records a request which received a response.
+
+        Parameters
+        ----------
+        api_name : str, obligatory
+            the API type of the request, None if unknown
+        latency : float, obligatory
+            the duration of the request in seconds
+        request_bytes : int, obligatory
+            the size of the request body
+        response_bytes : int, obligatory
+            the size of the response body
+        status_code : int, obligatory
+            the status code of the response
+        """
+
+        with self.__lock:
+            metrics = self.__get(api_name)
+            metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+            self.__observe_latency(metrics, latency)
+
+    def observe_error(self, api_name, latency, error_name):
+        """
+        The method records a request which failed without a response, e.g. a connection error.
+
+        Parameters
+        ----------
+        api_name : str, obligatory
+            the API type of the request, None if unknown
+        latency : float, obligatory
+            the time until the failure in seconds
+        error_name : str, obligatory
+            the name of the error, e.g. ConnectionError
+        """
+
+        with self.__lock:
+            metrics = self.__get(api_name)
+            metrics.errors[error_name] = metrics.errors.get(error_name, 0) + 1
+            self.__observe_latency(metrics, latency)
+
+    def observe_retry(self, api_name):
+        with self.__lock:
+            self.__get(api_name).retries += 1
+
+    def register_gauge(self, name, function, description=''):
+        """
+        The method adds a value read when the metrics are exported.
+
+        Parameters
+        ----------
+        name : str, obligatory
+            the name of the gauge, e.g. concurrency_window
+        function : function, obligatory
+            a function without argument returning a number
+        description : str, optional
+            the help text of the gauge
+        """
+
+        with self.__lock:
+            self.__gauges[name] = (function, description)
+
+    def reset(self):
+        """
+        The method removes the collected metrics, the gauges are kept.
+        """
+
+        with self.__lock:
+            self.__apis.clear()
+
+    def to_dict(self):
+        """
+        The method returns a snapshot of the metrics.
+
+        Returns
+        ------
+        dictionary
+            'apis' maps the API names to their requests, statuses, errors, retries, bytes and latency histogram,
+            whose buckets are cumulative as in Prometheus; 'gauges' maps the gauge names to their values
+        """
+
+        with self.__lock:
+            apis = {}
+            for api_name, metrics in sorted(self.__apis.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + (float('inf'),), metrics.bucket_counts):
+                    cumulative += count
+                    buckets['+Inf' if bound == float('inf') else repr(bound)] = cumulative
+                apis[api_name] = {
+                    'requests': sum(metrics.statuses.values()),
+                    'statuses': {str(status): count for status, count in sorted(metrics.statuses.items())},
+                    'errors': dict(metrics.errors),
+                    'retries': metrics.retries,
+                    'request_bytes': metrics.request_bytes,
+                    'response_bytes': metrics.response_bytes,
+                    'latency': {
+                        'count': metrics.latency_count,
+                        'sum': metrics.latency_sum,
+                        'mean': metrics.latency_sum / metrics.latency_count if metrics.latency_count else None,
+                        'buckets': buckets
+                    }
+                }
+            gauges = dict(self.__gauges)
+
+        return {'apis': apis, 'gauges': {name: function() for name, (function, _) in gauges.items()}}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_prometheus(self, prefix='dtp'):
+        """
+        The method exports the metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            the prefix of the metric names
+
+        Returns
+        ------
+        str
+            the metrics, e.g. for the textfile collector of the node exporter
+        """
+
+        snapshot = self.to_dict()
+        lines = []
+
+        def family(name, metric_type, description, samples):
+            lines.append('# HELP ' + prefix + '_' + name + ' ' + description)
+            lines.append('# TYPE ' + prefix + '_' + name + ' ' + metric_type)
+            for suffix, labels, value in samples:
+                label_str = ','.join(key + '="' + str(val).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                                     for key, val in labels)
+                value = str(value) if type(value) is int else repr(float(value))
+                lines.append(prefix + '_' + name + suffix + ('{' + label_str + '}' if label_str else '') + ' ' + value)
+
+        apis = snapshot['apis']
+        family('requests_total', 'counter', 'Requests which received a response, by API and status code.',
+               [('', (('api', api), ('status', status)), count)
+                for api, metrics in apis.items() for status, count in metrics['statuses'].items()])
+        family('request_errors_total', 'counter', 'Requests failed without a response, by API and error.',
+               [('', (('api', api), ('error', error)), count)
+                for api, metrics in apis.items() for error, count in metrics['errors'].items()])
+        family('retries_total', 'counter', 'Retried requests, by API.',
+               [('', (('api', api),), metrics['retries']) for api, metrics in apis.items()])
+        family('request_bytes_total', 'counter', 'Bytes of the request bodies, by API.',
+               [('', (('api', api),), metrics['request_bytes']) for api, metrics in apis.items()])
+        family('response_bytes_total', 'counter', 'Bytes of the response bodies, by API.',
+               [('', (('api', api),), metrics['response_bytes']) for api, metrics in apis.items()])
+
+        samples = []
+        for api, metrics in apis.items():
+            for bound, count in metrics['latency']['buckets'].items():
+                samples.append(('_bucket', (('api', api), ('le', bound)), count))
+            samples.append(('_sum', (('api', api),), metrics['latency']['sum']))
+            samples.append(('_count', (('api', api),), metrics['latency']['count']))
+        family('request_duration_seconds', 'histogram', 'Duration of the requests, by API.', samples)
+
+        with self.__lock:
+            descriptions = {name: description for name, (_, description) in self.__gauges.items()}
+        for name, value in snapshot['gauges'].items():
+            if value is not None:
+                family(name, 'gauge', descriptions.get(name) or name, [('', (), value)])
+
+        return '\n'.join(lines) + '\n'
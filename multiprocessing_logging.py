@@ -10,7 +10,10 @@
 
 import logging
 import logging.handlers
+import multiprocessing.util
+import queue
 import sys
+import threading
 import traceback
 from os import path
 
@@ -63,3 +66,158 @@ def listener_process(queue, configurer, log_name, log_file_path):
         except Exception:
             print('Failure in listener_process', file=sys.stderr)
             traceback.print_last(limit=1, file=sys.stderr)
+
+
+class BatchingFileHandler(logging.FileHandler):
+    """ File handler able to write many records with a single
+    write and flush, used by QueueLogListener
+    """
+
+    def emit_batch(self, records):
+        """ Formats the records and writes them at once
+
+        Arguments:
+            records (list): list of logging.LogRecord
+        """
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(''.join(lines))
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+
+
+class ThreadQueueHandler(logging.handlers.QueueHandler):
+    """ Queue handler passing the records unchanged to a listener
+    thread of the same process, so the messages are formatted by
+    the listener and not by the thread logging them
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class QueueLogListener:
+    """ Background thread writing the records of a logger to the given
+    handlers through a queue, so the threads logging never wait for the
+    disk. All the records waiting in the queue are taken at once and
+    BatchingFileHandler writes them with a single write.
+
+    The listener is stopped, and the remaining records written, at the
+    exit of the process, including multiprocessing workers, and it is
+    restarted with a new queue in the forked workers.
+    """
+
+    _sentinel = None
+
+    def __init__(self, logger, handlers, max_batch=512):
+        """
+        Arguments:
+            logger (logging.Logger): logger whose records are queued
+            handlers (list): the handlers writing the records
+            max_batch (int): the maximum number of records per write
+        """
+        self.logger = logger
+        self.handlers = handlers
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.queue_handler = ThreadQueueHandler(self.queue)
+        self.queue_handler.listener = self  # keeps the listener alive as long as the logger uses it
+        self._thread = None
+        multiprocessing.util.register_after_fork(self, QueueLogListener._after_fork)
+
+    def start(self):
+        """ Starts the thread and replaces the handlers of the logger
+        by a queue handler
+        """
+        for handler in self.handlers:
+            if handler in self.logger.handlers:
+                self.logger.removeHandler(handler)
+        if self.queue_handler not in self.logger.handlers:
+            self.logger.addHandler(self.queue_handler)
+
+        self._thread = threading.Thread(target=self._monitor, name='QueueLogListener', daemon=True)
+        self._thread.start()
+        # run by multiprocessing at the exit of the main process and of the workers, after their last messages
+        multiprocessing.util.Finalize(self, QueueLogListener.stop, args=(self,), exitpriority=-100)
+
+    def _monitor(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._sentinel in batch
+            records = [record for record in batch if record is not self._sentinel]
+            for handler in self.handlers:
+                accepted = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+                if hasattr(handler, 'emit_batch'):
+                    handler.emit_batch(accepted)
+                else:
+                    for record in accepted:
+                        handler.handle(record)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                break
+
+    def flush(self):
+        """ Blocks until all the queued records are written
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.join()
+
+    def stop(self):
+        """ Writes the remaining records, stops the thread and gives
+        the handlers back to the logger, so the messages logged later,
+        e.g. at the exit of the process, are written directly. The
+        method can be called more than once.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+        self._thread = None
+
+        if self.queue_handler in self.logger.handlers:
+            self.logger.removeHandler(self.queue_handler)
+            for handler in self.handlers:
+                self.logger.addHandler(handler)
+
+    def _after_fork(self):
+        # the thread of the parent does not exist in the child and its queue may be locked
+        self.queue = queue.Queue()
+        self.queue_handler.queue = self.queue
+        self._thread = None
+        if self.queue_handler in self.logger.handlers:
+            self.start()
+
+
+def start_queue_logging(logger, *handlers, max_batch=512):
+    """ Makes a logger non-blocking: the records are put in a queue
+    and written by the handlers from a background thread
+
+    Arguments:
+        logger (logging.Logger): logger to configure
+        handlers (logging.Handler): handlers writing the records, preferably BatchingFileHandler
+        max_batch (int): the maximum number of records per write
+
+    Returns:
+        QueueLogListener: the started listener, its flush() waits for the queued records
+    """
+    listener = QueueLogListener(logger, list(handlers), max_batch=max_batch)
+    listener.start()
+    return listener
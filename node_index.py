@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+
+"""
+The file contains an on-disk index of the nodes of a DTP domain, shared by the processes of a parallel job.
+For more information, contact the author(s) listed above.
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from delta_sync import iter_class_pages
+from graph_mirror import MIRRORED_CLASSES
+from helpers import logger_global, get_timestamp_dtp_format
+from json_codec import get_json_codec
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS nodes (iri TEXT PRIMARY KEY, uuid TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS nodes_uuid ON nodes (uuid);
+CREATE TABLE IF NOT EXISTS node_classes (class_uri TEXT NOT NULL, iri TEXT NOT NULL, PRIMARY KEY (class_uri, iri));
+CREATE INDEX IF NOT EXISTS node_classes_iri ON node_classes (iri);
+CREATE TABLE IF NOT EXISTS node_types (field TEXT NOT NULL, value TEXT NOT NULL, iri TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS node_types_value ON node_types (field, value);
+CREATE INDEX IF NOT EXISTS node_types_iri ON node_types (iri);
+CREATE TABLE IF NOT EXISTS edges (source_iri TEXT NOT NULL, label TEXT NOT NULL, target_iri TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS edges_source ON edges (source_iri, label);
+CREATE INDEX IF NOT EXISTS edges_target ON edges (target_iri, label);
+CREATE TABLE IF NOT EXISTS complete_classes (class_uri TEXT PRIMARY KEY, indexed TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS class_types (own_class TEXT NOT NULL, class_uri TEXT NOT NULL,
+                                        PRIMARY KEY (own_class, class_uri));
+"""
+
+
+class NodeIndex:
+    """
+    The class is an index of DTP nodes kept in a single SQLite file: IRI to UUID, class to IRIs,
+    element type (the object type fields of DTP_config.xml, e.g. hasElementType or ifc:Class) to IRIs
+    and the out edges of the nodes by label. The file is opened in the WAL mode, so the processes
+    of a pool can read it while one of them writes, every process and thread uses its own connection.
+
+    A class is complete once all its nodes have been indexed from the platform, see index_classes.
+    The queries over all the nodes of a class, e.g. fetch_element_nodes with a type filter, are answered
+    only for the complete classes, the others are sent to the platform. The nodes written through
+    a DTPApi using the index are removed from it and their classes are not complete anymore. A new node
+    makes incomplete only the classes matching the _classes of the written payload, see invalidate.
+
+    Usage
+    -----
+    node_index = NodeIndex('nodes.sqlite')
+    node_index.index_classes(DTPApi(dtp_config))
+
+    # in every worker process
+    dtp_api = DTPApi(dtp_config, node_index=NodeIndex('nodes.sqlite'))
+    dtp_api.get_uuid_for_iri(iri)  # no request for the indexed IRIs
+
+    Attributes
+    ----------
+    path : str
+        the path to the SQLite file
+    timeout : float
+        the number of seconds a connection waits for the lock held by another writer
+
+    Methods
+    -------
+    index_classes(dtp_api, class_types, read_ahead)
+        returns dictionary, the number of indexed nodes per class URI
+    index_mirror(mirror, type_fields)
+        returns int, the number of indexed nodes
+    add_nodes(nodes, classes)
+        None
+    get_uuid(iri)
+        returns str, UUID or None
+    get_uuids(iris)
+        returns dictionary, IRI to UUID of the indexed IRIs
+    is_complete(class_uri)
+        returns bool
+    has_type_field(field)
+        returns bool
+    find_typed_nodes(class_uri, field, value)
+        returns list of nodes, None if the index cannot answer
+    count_neighbours(iri, label, direction, class_uri, fields)
+        returns int, None if the index cannot answer
+    invalidate(iri, classes)
+        None
+    invalidate_uuid(uuid)
+        None
+    close()
+        None
+    """
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Parameters
+        ----------
+        path : str, obligatory
+            the path to the SQLite file, it does not need to exist
+        timeout : float, optional
+            the number of seconds a connection waits for the lock held by another writer
+        """
+
+        self.path = path
+        self.timeout = timeout
+        self.json_codec = get_json_codec()
+        self.__local = threading.local()
+        with self.__connection() as connection:
+            connection.executescript(_SCHEMA)
+
+    def __getstate__(self):
+        # the connections are not sent to the worker processes, they open their own
+        return {'path': self.path, 'timeout': self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['timeout'])
+
+    def __connection(self):
+        # a connection is not shared between threads, nor inherited by a forked process
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None or self.__local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.__local.connection = connection
+            self.__local.pid = os.getpid()
+        return connection
+
+    def __type_fields(self, connection):
+        row = connection.execute("SELECT value FROM meta WHERE key = 'type_fields'").fetchone()
+        return self.json_codec.loads(row[0]) if row is not None else []
+
+    def __set_type_fields(self, connection, type_fields):
+        fields = sorted(set(self.__type_fields(connection)) | set(type_fields))
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('type_fields', ?)",
+                           (self.json_codec.dumps(fields).decode('utf-8'),))
+
+    def __delete(self, connection, iri):
+        connection.execute('DELETE FROM nodes WHERE iri = ?', (iri,))
+        connection.execute('DELETE FROM node_classes WHERE iri = ?', (iri,))
+        connection.execute('DELETE FROM node_types WHERE iri = ?', (iri,))
+        connection.execute('DELETE FROM edges WHERE source_iri = ?', (iri,))
+
+    def __insert(self, connection, nodes, classes, type_fields):
+        for node in nodes:
+            iri = node['_iri']
+            self.__delete(connection, iri)
+            connection.execute('INSERT INTO nodes VALUES (?, ?, ?)',
+                               (iri, node['_uuid'], self.json_codec.dumps(node).decode('utf-8')))
+            connection.executemany('INSERT OR IGNORE INTO node_classes VALUES (?, ?)',
+                                   [(class_uri, iri) for class_uri in classes])
+            # the own classes of the nodes are mapped to the indexed classes, e.g. Wall to classElement
+            connection.executemany('INSERT OR IGNORE INTO class_types VALUES (?, ?)',
+                                   [(own_class, class_uri) for own_class in node.get('_classes', ())
+                                    for class_uri in classes])
+            connection.executemany('INSERT INTO node_types VALUES (?, ?, ?)',
+                                   [(field, node[field], iri) for field in type_fields
+                                    if isinstance(node.get(field), str)])
+            connection.executemany('INSERT INTO edges VALUES (?, ?, ?)',
+                                   [(iri, edge['_label'], edge['_targetIRI']) for edge in node.get('_outE', [])])
+
+    def add_nodes(self, nodes, classes=()):
+        """
+        The method adds nodes sent by the platform to the index, the indexed nodes with the same IRIs are replaced.
+        The nodes keep the classes they have been indexed with, a class is complete only after index_classes.
+
+        Parameters
+        ----------
+        nodes : list, obligatory
+            the nodes, with their out edges
+        classes : tuple, optional
+            the URIs of the classes the nodes were queried with
+        """
+
+        with self.__connection() as connection:
+            type_fields = self.__type_fields(connection)
+            for node in nodes:
+                # the classes of the replaced node are kept
+                known = [row[0] for row in
+                         connection.execute('SELECT class_uri FROM node_classes WHERE iri = ?', (node['_iri'],))]
+                self.__insert(connection, [node], set(classes) | set(known), type_fields)
+
+    def index_classes(self, dtp_api, class_types=MIRRORED_CLASSES, read_ahead=None):
+        """
+        The method indexes all the nodes of the given classes of the domain, one paged query per class,
+        and marks the classes complete. The indexed nodes of the classes which are not on the platform
+        anymore are removed. The object type fields of the configuration are indexed.
+
+        Parameters
+        ----------
+        dtp_api : DTPApi, obligatory
+            the instance used to query the platform
+        class_types : tuple, optional
+            the ontology types of the classes, as in DTP_config.xml
+        read_ahead : int, optional
+            the number of prefetched pages, see DTPApi.iter_pages
+
+        Returns
+        ------
+        dictionary
+            the number of indexed nodes per class URI
+        """
+
+        type_fields = dtp_api.DTP_CONFIG.get_object_type_classes()
+        counts = {}
+        for class_type in class_types:
+            class_uri = dtp_api.DTP_CONFIG.get_ontology_uri(class_type)
+            with self.__connection() as connection:
+                self.__set_type_fields(connection, type_fields)
+                connection.execute('DELETE FROM complete_classes WHERE class_uri = ?', (class_uri,))
+                previous = {row[0] for row in
+                            connection.execute('SELECT iri FROM node_classes WHERE class_uri = ?', (class_uri,))}
+
+            seen = set()
+            for page in iter_class_pages(dtp_api, class_uri, read_ahead=read_ahead):
+                self.add_nodes(page['items'], (class_uri,))
+                seen.update(node['_iri'] for node in page['items'])
+
+            with self.__connection() as connection:
+                for iri in previous - seen:
+                    self.__delete(connection, iri)
+                connection.execute('INSERT OR REPLACE INTO complete_classes VALUES (?, ?)',
+                                   (class_uri, get_timestamp_dtp_format(datetime.now())))
+            counts[class_uri] = len(seen)
+            logger_global.info('Indexed ' + str(len(seen)) + ' nodes of the class: ' + class_uri)
+        return counts
+
+    def index_mirror(self, mirror, type_fields=()):
+        """
+        The method indexes the nodes of a graph mirror and marks its classes complete, see graph_mirror.GraphMirror.
+
+        Parameters
+        ----------
+        mirror : GraphMirror, obligatory
+            the mirror of the domain
+        type_fields : list, optional
+            the element type fields to be indexed, e.g. dtp_config.get_object_type_classes()
+
+        Returns
+        ------
+        int
+            the number of indexed nodes
+        """
+
+        indexed = get_timestamp_dtp_format(datetime.now())
+        with self.__connection() as connection:
+            self.__set_type_fields(connection, type_fields)
+            type_fields = self.__type_fields(connection)
+            for class_uri in mirror.classes:
+                connection.execute('DELETE FROM complete_classes WHERE class_uri = ?', (class_uri,))
+            for node_uuid, node in list(mirror.nodes.items()):
+                self.__insert(connection, [node], mirror.classes_of(node_uuid), type_fields)
+            connection.executemany('INSERT OR REPLACE INTO complete_classes VALUES (?, ?)',
+                                   [(class_uri, indexed) for class_uri in mirror.classes])
+        return len(mirror)
+
+    def get_uuid(self, iri):
+        row = self.__connection().execute('SELECT uuid FROM nodes WHERE iri = ?', (iri,)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_uuids(self, iris):
+        connection = self.__connection()
+        uuids = {}
+        iris = list(iris)
+        # the number of the parameters of a statement is limited
+        for start in range(0, len(iris), 500):
+            chunk = iris[start:start + 500]
+            rows = connection.execute('SELECT iri, uuid FROM nodes WHERE iri IN (' + ','.join('?' * len(chunk)) + ')',
+                                      chunk)
+            uuids.update(rows)
+        return uuids
+
+    def is_complete(self, class_uri):
+        row = self.__connection().execute('SELECT 1 FROM complete_classes WHERE class_uri = ?', (class_uri,))
+        return row.fetchone() is not None
+
+    def has_type_field(self, field):
+        return field in self.__type_fields(self.__connection())
+
+    def find_typed_nodes(self, class_uri, field, value):
+        """
+        The method returns the nodes of a class, including its subclasses, whose element type field has a value.
+
+        Parameters
+        ----------
+        class_uri : str, obligatory
+            the URI of the class
+        field : str, obligatory
+            the element type field, e.g. ifc:Class
+        value : str, obligatory
+            the value of the field, e.g. IfcWall
+
+        Returns
+        ------
+        list
+            the nodes, None if the class is not complete or the field is not indexed
+        """
+
+        if not isinstance(value, str) or not self.has_type_field(field) or not self.is_complete(class_uri):
+            return None
+        rows = self.__connection().execute(
+            'SELECT nodes.data FROM node_types JOIN node_classes ON node_classes.iri = node_types.iri '
+            'JOIN nodes ON nodes.iri = node_types.iri '
+            'WHERE node_types.field = ? AND node_types.value = ? AND node_classes.class_uri = ? ORDER BY nodes.rowid',
+            (field, value, class_uri))
+        return [self.json_codec.loads(row[0]) for row in rows]
+
+    def count_neighbours(self, iri, label, direction, class_uri, fields=None):
+        """
+        The method counts the nodes of a class connected to a node by edges with a label.
+        The out neighbours are known if the node is indexed and the class is complete,
+        the in neighbours are known if the class is complete.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of the node
+        label : str, obligatory
+            the URI of the edges
+        direction : str, obligatory
+            '->' for the out edges of the node and '<-' for its in edges
+        class_uri : str, obligatory
+            the URI of the class of the neighbours, including its subclasses
+        fields : dictionary, optional
+            the values of the fields of the counted neighbours, e.g. {is_as_designed_uri: False}
+
+        Returns
+        ------
+        int
+            the number of the neighbours, None if the index cannot answer
+        """
+
+        if not self.is_complete(class_uri):
+            return None
+        connection = self.__connection()
+        if direction == '->':
+            if connection.execute('SELECT 1 FROM nodes WHERE iri = ?', (iri,)).fetchone() is None:
+                return None
+            join, where = 'edges.target_iri', 'edges.source_iri = ?'
+        else:
+            join, where = 'edges.source_iri', 'edges.target_iri = ?'
+
+        rows = connection.execute(
+            'SELECT DISTINCT nodes.data FROM edges JOIN node_classes ON node_classes.iri = ' + join +
+            ' JOIN nodes ON nodes.iri = ' + join + ' WHERE ' + where +
+            ' AND edges.label = ? AND node_classes.class_uri = ?',
+            (iri, label, class_uri))
+        if not fields:
+            return len(rows.fetchall())
+        nodes = (self.json_codec.loads(row[0]) for row in rows)
+        return sum(1 for node in nodes if all(node.get(field) == value for field, value in fields.items()))
+
+    def invalidate(self, iri, classes=()):
+        """
+        The method removes a node changed on the platform from the index. The classes of the node are not
+        complete anymore. If the node was not indexed, e.g. a new node, the classes matching the given
+        classes are not complete anymore: the given classes and the classes their nodes have been indexed with.
+
+        Parameters
+        ----------
+        iri : str, obligatory
+            the IRI of the node
+        classes : iterable, optional
+            the classes of the written node, e.g. the _classes of the payload
+        """
+
+        with self.__connection() as connection:
+            known = connection.execute('SELECT 1 FROM nodes WHERE iri = ?', (iri,)).fetchone() is not None
+            if known:
+                stale = [row[0] for row in
+                         connection.execute('SELECT class_uri FROM node_classes WHERE iri = ?', (iri,))]
+            else:
+                stale = set(classes)
+                for own_class in classes:
+                    stale.update(row[0] for row in connection.execute(
+                        'SELECT class_uri FROM class_types WHERE own_class = ?', (own_class,)))
+            connection.executemany('DELETE FROM complete_classes WHERE class_uri = ?',
+                                   [(class_uri,) for class_uri in stale])
+            self.__delete(connection, iri)
+
+    def invalidate_uuid(self, uuid):
+        # a node which is not indexed is not a member of a complete class
+        row = self.__connection().execute('SELECT iri FROM nodes WHERE uuid = ?', (uuid,)).fetchone()
+        if row is not None:
+            self.invalidate(row[0])
+
+    def close(self):
+        connection = getattr(self.__local, 'connection', None)
+        if connection is not None and self.__local.pid == os.getpid():
+            connection.close()
+        self.__local.connection = None
+
+
+# Below code snippet for indexing a domain from the command line
+
+def parse_args():
+    """
+    Get parameters from user
+    """
+    parser = argparse.ArgumentParser(description='Index the nodes of a DTP domain in a SQLite file')
+    parser.add_argument('--xml_path', '-x', type=str, help='path to config xml file', required=True)
+    parser.add_argument('--output', '-o', type=str, help='path to the SQLite file', required=True)
+    parser.add_argument('--mirror', '-m', type=str, help='path to a graph mirror file indexed instead of the '
+                                                         'platform, see graph_mirror.py')
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from DTP_API import DTPApi
+    from DTP_config import DTPConfig
+    from graph_mirror import GraphMirror
+
+    args = parse_args()
+    node_index = NodeIndex(args.output)
+    dtp_config = DTPConfig(args.xml_path)
+    if args.mirror:
+        nb_indexed = node_index.index_mirror(GraphMirror.load(args.mirror), dtp_config.get_object_type_classes())
+    else:
+        with DTPApi(dtp_config) as dtp_api:
+            nb_indexed = sum(node_index.index_classes(dtp_api).values())
+    node_index.close()
+    print(f"{nb_indexed} nodes indexed in {args.output}")
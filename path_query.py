@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import re
+
+# a step of a path written as text: -label-> or <-label-
+_STEP = re.compile(r'^(?:-(?P<out>[^\s<>-]+)->|<-(?P<in>[^\s<>-]+)-)$')
+
+
+class PathQuery:
+    """
+    The class describes a path of the graph, a start element followed by hops along the edges, and compiles
+    it to the body of a find request. The hops are chained with aliases, so a path of any length is sent
+    in a single request and the nodes of the last hop are returned. If the platform does not resolve
+    the chained aliases, the path can be followed hop by hop, see to_hop_body and FetchAPI.query_path.
+
+    Usage
+    -----
+    path = PathQuery(dtp_config, iri=wp_iri).hop('->', 'hasActivity', 'activity').hop('->', 'hasTask', 'task')
+    tasks = dtp_api.query_all_pages(dtp_api.fetch_path, path)
+
+    # or from text, every class is matched with its subclasses
+    path = parse_path(dtp_config, 'workpackage -hasActivity-> activity -hasTask-> task <-intentStatusRelation- *')
+
+    Attributes
+    ----------
+    dtp_config : DTPConfig
+        the configuration resolving the ontology types
+    start : dictionary
+        the conditions of the start element
+    edge : bool
+        the 'edge' flag of the platform set in the compiled bodies
+    hops : list
+        (direction, edge URI, conditions, alias) tuples, the conditions of the reached nodes
+        are a dictionary, empty if all the reached nodes are kept
+
+    Methods
+    -------
+    hop(direction, edge_type, class_type, inheritance, fields, alias)
+        returns PathQuery, the path itself
+    to_body()
+        returns dictionary, the body of the find request
+    to_start_body()
+        returns dictionary, the body of the find request of the start element
+    to_hop_body(index, iris)
+        returns dictionary, the body of the find request of a single hop
+    """
+
+    def __init__(self, dtp_config, iri=None, class_type=None, inheritance=False, fields=None, edge=False):
+        """
+        Parameters
+        ----------
+        dtp_config : DTPConfig, obligatory
+            the configuration resolving the ontology types
+        iri : str or list, optional
+            the IRI of the start node, or the IRIs of the start nodes
+        class_type : str, optional
+            the ontology type of the class of the start nodes, as in DTP_config.xml
+        inheritance : bool, optional
+            if set to True then the nodes of the subclasses of class_type are included
+        fields : dictionary, optional
+            the values of the fields of the start nodes, by field URI
+        edge : bool, optional
+            if set to True then the 'edge' flag of the platform is set in the compiled bodies
+        """
+
+        self.dtp_config = dtp_config
+        self.edge = edge
+        self.start = self.__conditions(class_type, inheritance, fields)
+        if isinstance(iri, str):
+            self.start = {"$iri": iri, **self.start}
+        elif iri is not None:
+            self.start = {"$iri": {"$in": list(iri)}, **self.start}
+        self.hops = []
+
+    def __conditions(self, class_type, inheritance, fields):
+        conditions = {}
+        if class_type is not None:
+            conditions["$classes"] = {"$contains": self.dtp_config.get_ontology_uri(class_type)}
+            if inheritance:
+                conditions["$classes"]["$inheritance"] = True
+        conditions.update(fields or {})
+        return conditions
+
+    def hop(self, direction, edge_type, class_type=None, inheritance=False, fields=None, alias=None):
+        """
+        The method appends a hop to the path.
+
+        Parameters
+        ----------
+        direction : str, obligatory
+            '->' to follow the out edges of the nodes and '<-' to follow their in edges
+        edge_type : str, obligatory
+            the ontology type of the edges, as in DTP_config.xml
+        class_type : str, optional
+            the ontology type of the class of the reached nodes
+        inheritance : bool, optional
+            if set to True then the nodes of the subclasses of class_type are included
+        fields : dictionary, optional
+            the values of the fields of the reached nodes, by field URI
+        alias : str, optional
+            the alias of the reached nodes in the body, 'hop' followed by the number of the hop if not provided
+
+        Returns
+        ------
+        PathQuery
+            the path itself, so the hops can be chained
+        """
+
+        if direction not in ('->', '<-'):
+            raise Exception("Sorry, the direction of a hop has to be -> or <-.")
+        alias = alias if alias is not None else 'hop' + str(len(self.hops) + 1)
+        self.hops.append((direction, self.dtp_config.get_ontology_uri(edge_type),
+                          self.__conditions(class_type, inheritance, fields), alias))
+        return self
+
+    def __element(self, conditions, alias=None):
+        element = {"$alias": alias} if alias is not None else {}
+        element["$domain"] = self.dtp_config.get_domain()
+        element.update(conditions)
+        return element
+
+    def to_body(self):
+        """
+        The method compiles the path to the body of a single find request, the hops chained with aliases.
+
+        Returns
+        ------
+        dictionary
+            the body of the find request, returning the nodes of the last hop
+        """
+
+        if not self.hops:
+            return self.to_start_body()
+
+        elements = [self.__element(self.start)]
+        for direction, label, conditions, alias in self.hops:
+            elements[-1][direction + label] = {"$alias": alias}
+            # the nodes reached without conditions need no element, unless a hop starts from them
+            elements.append(self.__element(conditions, alias))
+        if not self.hops[-1][2]:
+            elements.pop()
+
+        body = {"query": elements}
+        if self.edge:
+            body["edge"] = True
+        body["return"] = self.hops[-1][3]
+        return body
+
+    def to_start_body(self):
+        return {"query": self.__element(self.start)}
+
+    def to_hop_body(self, index, iris):
+        """
+        The method compiles a single hop of the path, starting from the given nodes, e.g. the nodes
+        reached by the previous hop. It is used when the platform does not resolve the chained aliases.
+
+        Parameters
+        ----------
+        index : int, obligatory
+            the position of the hop in hops
+        iris : list, obligatory
+            the IRIs of the nodes the hop starts from
+
+        Returns
+        ------
+        dictionary
+            the body of the find request, returning the nodes reached by the hop
+        """
+
+        direction, label, conditions, alias = self.hops[index]
+        source = self.__element({"$iri": iris[0] if len(iris) == 1 else {"$in": list(iris)}})
+        source[direction + label] = {"$alias": alias}
+        elements = [source]
+        if conditions:
+            elements.append(self.__element(conditions, alias))
+
+        body = {"query": elements}
+        if self.edge:
+            body["edge"] = True
+        body["return"] = alias
+        return body
+
+
+def parse_path(dtp_config, text, iri=None):
+    """
+    The function builds a path from text: ontology types of classes separated by hops written as -edge-> or
+    <-edge-, e.g. 'workpackage -hasActivity-> activity -hasTask-> task'. The classes are matched with their
+    subclasses and * matches any node. The first class can be omitted if the IRI of the start node is given.
+
+    Parameters
+    ----------
+    dtp_config : DTPConfig, obligatory
+        the configuration resolving the ontology types
+    text : str, obligatory
+        the path
+    iri : str or list, optional
+        the IRI of the start node, or the IRIs of the start nodes
+
+    Returns
+    ------
+    PathQuery
+        the path
+    """
+
+    tokens = text.split()
+    if tokens and _STEP.match(tokens[0]):
+        tokens.insert(0, '*')
+    if len(tokens) % 2 == 0:
+        raise Exception("Sorry, a path has to alternate classes and hops: " + text)
+
+    def class_type(token):
+        return None if token == '*' else token
+
+    path = PathQuery(dtp_config, iri=iri, class_type=class_type(tokens[0]), inheritance=True)
+    for step, target in zip(tokens[1::2], tokens[2::2]):
+        matched = _STEP.match(step)
+        if matched is None or _STEP.match(target):
+            raise Exception("Sorry, a path has to alternate classes and hops: " + text)
+        if matched.group('out') is not None:
+            path.hop('->', matched.group('out'), class_type(target), inheritance=True)
+        else:
+            path.hop('<-', matched.group('in'), class_type(target), inheritance=True)
+    return path
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import math
+import threading
+import time
+
+# the endpoint class of each API type of DTP_config.xml, the rates are set per class
+ENDPOINT_CLASSES = {
+    'get_find_elements': 'find',
+    'count_nodes': 'count',
+    'add_node': 'write',
+    'update_set': 'write',
+    'update_unset': 'write',
+    'delete_avatar': 'write',
+    'delete_avatar_iri': 'write',
+    'send_blob': 'blob',
+    'download_blob': 'blob',
+    'get_blobs_per_element': 'blob',
+    'delete_blob': 'blob',
+    'link_blob': 'blob',
+    'unlink_blob': 'blob'
+}
+
+
+class RateLimiter:
+    """
+    The class is a token-bucket rate limiter with one bucket per endpoint class (find, count, write, blob, other).
+    A bucket holds up to burst tokens and refills at rate tokens per second, every request takes one token
+    and waits if the bucket is empty. The waiting requests are served in the order they arrived.
+
+    The limiter is shared by the threads using the same DTPApi. To share it between processes, create it with
+    RateLimiter.shared, the limiter can then be passed to the workers, e.g. as an argument of Pool.map.
+
+    Usage
+    -----
+    with multiprocessing.Manager() as manager:
+        rate_limiter = RateLimiter.shared(manager, {'find': 20, 'write': 5})
+        with multiprocessing.Pool(4) as pool:
+            pool.starmap(work, [(xml_path, rate_limiter, chunk) for chunk in chunks])
+
+    # in the workers
+    dtp_api = DTPApi(DTPConfig(xml_path), rate_limiter=rate_limiter)
+
+    Attributes
+    ----------
+    rates : dictionary
+        the number of requests per second of each endpoint class, a class without a rate is not limited
+    bursts : dictionary
+        the bucket size of each endpoint class, by default the rate rounded up
+    endpoint_classes : dictionary
+        the endpoint class of each API type, the other API types belong to the class 'other'
+
+    Methods
+    -------
+    shared(manager, rates, bursts, endpoint_classes)
+        returns RateLimiter, a limiter shared between processes
+    acquire(api_name)
+        returns float, the number of seconds waited
+    """
+
+    def __init__(self, rates, bursts=None, endpoint_classes=None, state=None, lock=None):
+        """
+        Parameters
+        ----------
+        rates : dictionary, obligatory
+            the number of requests per second of each endpoint class, e.g. {'find': 20, 'write': 5}
+        bursts : dictionary, optional
+            the maximum number of requests of an endpoint class sent at once after an idle period
+        endpoint_classes : dictionary, optional
+            the endpoint class of each API type, ENDPOINT_CLASSES by default
+        state : dictionary, optional
+            the mapping holding the buckets, a manager dictionary to share them between processes
+        lock : Lock, optional
+            the lock protecting the buckets, a manager lock to share them between processes
+        """
+
+        for endpoint_class, rate in rates.items():
+            if rate is not None and rate < 0:
+                raise Exception("Sorry, the rate of " + endpoint_class + " has to be a positive number.")
+
+        self.rates = dict(rates)
+        self.bursts = {endpoint_class: max(1, math.ceil(rate)) for endpoint_class, rate in rates.items() if rate}
+        self.bursts.update(bursts or {})
+        self.endpoint_classes = dict(endpoint_classes if endpoint_classes is not None else ENDPOINT_CLASSES)
+        self.__state = state if state is not None else {}
+        self.__lock = lock if lock is not None else threading.Lock()
+
+    @classmethod
+    def shared(cls, manager, rates, bursts=None, endpoint_classes=None):
+        """
+        The method creates a limiter whose buckets are kept by a multiprocessing manager.
+
+        Parameters
+        ----------
+        manager : multiprocessing.managers.SyncManager, obligatory
+            a started manager, e.g. multiprocessing.Manager()
+        rates : dictionary, obligatory
+            the number of requests per second of each endpoint class
+        bursts : dictionary, optional
+            the bucket size of each endpoint class
+        endpoint_classes : dictionary, optional
+            the endpoint class of each API type
+
+        Returns
+        ------
+        RateLimiter
+            the limiter, which can be pickled and sent to other processes
+        """
+
+        return cls(rates, bursts=bursts, endpoint_classes=endpoint_classes, state=manager.dict(),
+                   lock=manager.Lock())
+
+    def acquire(self, api_name):
+        """
+        The method takes a token from the bucket of the endpoint class of an API type, it waits if there is none.
+
+        Parameters
+        ----------
+        api_name : str, obligatory
+            the API type of the request, e.g. get_find_elements, None if unknown
+
+        Returns
+        ------
+        float
+            the number of seconds waited
+        """
+
+        endpoint_class = self.endpoint_classes.get(api_name, 'other')
+        rate = self.rates.get(endpoint_class)
+        if not rate:
+            return 0.0
+
+        burst = self.bursts[endpoint_class]
+        # the token is reserved under the lock and the wait happens outside of it, so the lock is held
+        # only for the bookkeeping and the requests are served in the order of their reservations
+        with self.__lock:
+            now = time.monotonic()
+            tokens, last = self.__state.get(endpoint_class, (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate) - 1
+            self.__state[endpoint_class] = (tokens, now)
+
+        delay = -tokens / rate if tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        return delay
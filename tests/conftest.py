@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DTP_API import DTPApi
+from DTP_config import DTPConfig
+from local_DTP_server import LocalDTPServer
+
+NS = 'http://bim2twin.eu/mislata_wp3/'
+WALL = 'https://www.bim2twin.eu/ontology/Core#Wall'
+
+
+def seed_graph(graph, dtp_config, nb_wp=2, nb_act=3, nb_task=3, nb_el=2):
+    """
+    The function fills a graph with a small schedule: work packages, activities, tasks and their as-designed
+    elements, the as-built elements, the operations of the activities, their actions and a construction.
+    """
+
+    ontology = dtp_config.get_ontology_uri
+    domain = dtp_config.get_domain()
+    nodes = []
+
+    def add(name, classes, edges=(), **fields):
+        node = {'_domain': domain, '_iri': NS + name, '_classes': classes,
+                '_outE': [{'_label': ontology(label), '_targetIRI': NS + target} for label, target in edges]}
+        node.update(fields)
+        nodes.append(node)
+
+    add('schedule0', [ontology('constructionSchedule')], [('hasWorkPackage', 'wp%d' % w) for w in range(nb_wp)])
+    for w in range(nb_wp):
+        add('wp%d' % w, [ontology('workpackage')], [('hasActivity', 'act%d_%d' % (w, a)) for a in range(nb_act)])
+        for a in range(nb_act):
+            add('act%d_%d' % (w, a), [ontology('activity')],
+                [('hasTask', 'task%d_%d_%d' % (w, a, t)) for t in range(nb_task)])
+            for t in range(nb_task):
+                key = '%d_%d_%d' % (w, a, t)
+                add('task' + key, [ontology('task')], [('hasTarget', 'ifc%s_%d' % (key, e)) for e in range(nb_el)])
+                for e in range(nb_el):
+                    # the elements are Walls, a subclass of classElement
+                    add('ifc%s_%d' % (key, e), [WALL, ontology('classElement')],
+                        **{ontology('isAsDesigned'): True, 'ifc:Class': 'IfcWall', ontology('hasElementType'): WALL,
+                           ontology('timeStamp'): '2023-01-01T00:00:00'})
+                    add('asbuilt%s_%d' % (key, e), [WALL, ontology('classElement')],
+                        [('intentStatusRelation', 'ifc%s_%d' % (key, e))],
+                        **{ontology('isAsDesigned'): False, ontology('timeStamp'): '2023-02-01T00:00:00'})
+                add('oper' + key, [ontology('asPerformedOperation')],
+                    [('intentStatusRelation', 'act%d_%d' % (w, a)), ('hasAction', 'action' + key)],
+                    **{ontology('processStart'): '2023-01-01T00:00:00', ontology('processEnd'): '2023-01-02T00:00:00'})
+                add('action' + key, [ontology('asPerformedAction')], [('hasTarget', 'asbuilt%s_0' % key)])
+    add('constr0', [ontology('asPerformedConstruction')], [('hasOperation', 'oper0_0_0')])
+    graph.add_nodes(nodes)
+    return nodes
+
+
+def nb_requests(dtp_api):
+    return sum(api['requests'] for api in dtp_api.metrics.to_dict()['apis'].values())
+
+
+@pytest.fixture
+def dtp_server(tmp_path):
+    with LocalDTPServer(page_size=7) as server:
+        server.dtp_config = DTPConfig(server.write_config(str(tmp_path / 'DTP_config.xml')))
+        seed_graph(server.graph, server.dtp_config)
+        yield server
+
+
+@pytest.fixture
+def dtp_config(dtp_server):
+    return dtp_server.dtp_config
+
+
+@pytest.fixture
+def dtp_api(dtp_config):
+    with DTPApi(dtp_config) as dtp_api:
+        yield dtp_api
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+import adjacency
+from adjacency import AdjacencyGraph, path_steps
+from conftest import NS, WALL, seed_graph
+from in_memory_graph import InMemoryGraph
+
+
+@pytest.fixture(params=['numpy', 'standard library'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if adjacency.numpy is None:
+            pytest.skip('NumPy is not installed')
+    else:
+        monkeypatch.setattr(adjacency, 'numpy', None)
+    return request.param
+
+
+@pytest.fixture
+def graph(dtp_config):
+    graph = InMemoryGraph()
+    seed_graph(graph, dtp_config)
+    return graph
+
+
+def test_walk_follows_the_out_and_in_edges(backend, dtp_config, graph):
+    adjacency_graph = AdjacencyGraph.from_graph(graph)
+    steps = path_steps(dtp_config, '->hasActivity', '->hasTask', '->hasTarget', '<-intentStatusRelation')
+
+    reached = adjacency_graph.walk([NS + 'wp0'], steps)
+
+    assert sorted(reached) == sorted(NS + 'asbuilt0_%d_%d_%d' % (a, t, e)
+                                     for a in range(3) for t in range(3) for e in range(2))
+
+
+def test_walk_filters_the_class_of_the_reached_nodes(backend, dtp_config, graph):
+    adjacency_graph = AdjacencyGraph.from_nodes(graph.get_nodes(list(graph.nodes)))
+    steps = path_steps(dtp_config, '->hasActivity', '<-intentStatusRelation')
+
+    assert len(adjacency_graph.walk([NS + 'wp1'], steps)) == 9
+    assert adjacency_graph.walk([NS + 'wp1'], steps, dtp_config.get_ontology_uri('activity')) == []
+    assert len(adjacency_graph.walk([NS + 'wp1'], steps, dtp_config.get_ontology_uri('asPerformedOperation'))) == 9
+    assert len(adjacency_graph.walk([NS + 'task0_0_0'], path_steps(dtp_config, '->hasTarget'), WALL)) == 2
+
+
+def test_walk_from_many_nodes_returns_each_node_once(backend, dtp_config, graph):
+    adjacency_graph = AdjacencyGraph.from_graph(graph)
+    steps = path_steps(dtp_config, '->hasTask', '<-hasTask')
+
+    assert adjacency_graph.walk([NS + 'act0_0', NS + 'act0_1', NS + 'unknown'], steps) == [NS + 'act0_0',
+                                                                                         NS + 'act0_1']
+
+
+def test_walk_without_edges(backend, dtp_config, graph):
+    adjacency_graph = AdjacencyGraph.from_graph(graph, labels=[dtp_config.get_ontology_uri('hasTask')])
+
+    assert adjacency_graph.nb_edges(dtp_config.get_ontology_uri('hasTask')) == 18
+    assert adjacency_graph.nb_edges(dtp_config.get_ontology_uri('hasActivity')) == 0
+    assert adjacency_graph.walk([NS + 'wp0'], path_steps(dtp_config, '->hasActivity')) == []
+    assert adjacency_graph.walk([], path_steps(dtp_config, '->hasTask')) == []
+
+
+def test_bad_steps(dtp_config, graph):
+    with pytest.raises(Exception, match='->'):
+        path_steps(dtp_config, 'hasTask')
+    with pytest.raises(Exception, match='direction'):
+        AdjacencyGraph.from_graph(graph).walk([NS + 'wp0'], [('=>', dtp_config.get_ontology_uri('hasActivity'))])
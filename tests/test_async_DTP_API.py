@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+
+from async_DTP_API import AsyncDTPApi
+from conftest import NS, nb_requests
+
+
+def test_gather_keeps_the_order_of_the_arguments(dtp_server):
+    iris = [NS + 'wp%d' % w for w in range(2)] + [NS + 'act0_%d' % a for a in range(3)]
+
+    async def main():
+        async with AsyncDTPApi(dtp_server.dtp_config, max_concurrency=4) as dtp_api:
+            return await dtp_api.gather('get_uuid_for_iri', [(iri,) for iri in iris]), nb_requests(dtp_api)
+
+    uuids, nb = asyncio.run(main())
+    assert uuids == [dtp_server.graph.uuids[iri] for iri in iris]
+    assert nb == len(iris)
+
+
+def test_methods_are_coroutines_and_accept_coroutine_fetch_functions(dtp_server):
+    async def main():
+        async with AsyncDTPApi(dtp_server.dtp_config) as dtp_api:
+            assert inspect.iscoroutinefunction(dtp_api.fetch_element_nodes)
+            assert dtp_api.DTP_CONFIG is dtp_api.dtp_api.DTP_CONFIG
+            return await dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+
+    walls = asyncio.run(main())
+    assert len({node['_iri'] for node in walls['items']}) == 36
+
+
+def test_requests_in_flight_are_limited_by_max_concurrency(dtp_config):
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def slow_request():
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+
+    async def main():
+        async with AsyncDTPApi(dtp_config, max_concurrency=3) as dtp_api:
+            dtp_api.dtp_api.slow_request = slow_request
+            await dtp_api.gather('slow_request', [()] * 12)
+
+    asyncio.run(main())
+    assert in_flight[1] == 3
+
+
+def test_bad_max_concurrency(dtp_config):
+    with pytest.raises(Exception, match='positive'):
+        AsyncDTPApi(dtp_config, max_concurrency=0)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+from datetime import datetime
+
+import pytest
+
+from conftest import NS, nb_requests
+from helpers import get_timestamp_dtp_format
+
+
+def create_defects(dtp_api, names):
+    timestamp = get_timestamp_dtp_format(datetime.now())
+    for name in names:
+        assert dtp_api.create_defect_node(dtp_api.DTP_CONFIG.get_ontology_uri('GeometricDefect'), NS + name,
+                                          'minor', timestamp, 'test')
+
+
+def test_nodes_are_sent_in_batches(dtp_server, dtp_api):
+    names = ['defect%d' % i for i in range(10)]
+    with dtp_api.batch_writer(max_nodes=4) as batch:
+        create_defects(dtp_api, names)
+        assert nb_requests(dtp_api) == 2
+        assert len(batch) == 2
+
+    assert nb_requests(dtp_api) == 3
+    assert batch.nb_requests == 3
+    assert batch.nb_created == 10
+    assert all(NS + name in dtp_server.graph.uuids for name in names)
+
+
+def test_batches_are_limited_by_the_payload_size(dtp_api):
+    with dtp_api.batch_writer(max_bytes=1) as batch:
+        create_defects(dtp_api, ['defect0', 'defect1'])
+
+    assert batch.nb_requests == 2
+    assert batch.nb_created == 2
+
+
+def test_rejected_batch_reports_its_iris(dtp_api):
+    with dtp_api.batch_writer() as batch:
+        create_defects(dtp_api, ['defect0'])
+        dtp_api.node_batch.add({'_domain': dtp_api.DTP_CONFIG.get_domain(), '_iri': NS + 'wp0', '_classes': []},
+                               'NEW_ELEMENT_IRI')
+
+    assert batch.failed_iris == [NS + 'defect0', NS + 'wp0']
+
+
+def test_a_single_batch_writer_is_active(dtp_api):
+    with dtp_api.batch_writer():
+        with pytest.raises(Exception, match='already active'):
+            with dtp_api.batch_writer():
+                pass
+    with pytest.raises(Exception, match='positive'):
+        with dtp_api.batch_writer(max_nodes=0):
+            pass
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_DTP_API import percentile
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'bench_DTP_API.py')
+
+
+def test_percentile():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+    assert percentile(values, 0.5) == 5
+    assert percentile(values, 0.95) == 10
+    assert percentile(values, 0.0) == 1
+    assert percentile([], 0.5) is None
+
+
+def test_benchmark_runs_every_operation(tmp_path):
+    output = str(tmp_path / 'results.json')
+    subprocess.run([sys.executable, BENCHMARK, '--sizes', '30', '--ops', '10', '--page_size', '7', '-o', output],
+                   cwd=str(tmp_path), check=True, capture_output=True)
+
+    report = json.load(open(output))
+    results = {result['operation']: result for result in report['results']}
+    assert list(results) == ['query_all_pages', 'get_uuid_for_iri', 'create_*', 'link_*', 'revert_last_session']
+    # 30 as-built nodes on pages of 7 items
+    assert results['query_all_pages']['nb_requests'] == 5
+    for operation in ('get_uuid_for_iri', 'create_*', 'link_*'):
+        assert results[operation]['nb_calls'] == results[operation]['nb_requests'] == 10
+    assert all(result['latency_ms']['p50'] is not None for result in results.values())
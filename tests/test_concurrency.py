@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import threading
+import time
+
+import pytest
+
+from concurrency import AdaptiveConcurrencyController
+
+
+def complete(controller, latency, failed=False, api_name=None):
+    controller.acquire()
+    controller.release(latency, failed, api_name)
+
+
+def test_mixed_endpoints_with_flat_latencies_grow_the_window():
+    controller = AdaptiveConcurrencyController(initial_window=16, max_window=64)
+    for _ in range(200):
+        complete(controller, 0.015, api_name='count_nodes')
+        complete(controller, 0.080, api_name='get_find_elements')
+
+    assert controller.nb_decreases == 0
+    assert controller.window > 16
+    assert controller.stats()['reference_latencies'] == {'count_nodes': 0.015, 'get_find_elements': 0.080}
+
+
+def test_latency_spike_of_an_endpoint_decreases_the_window():
+    controller = AdaptiveConcurrencyController(initial_window=16)
+    for _ in range(10):
+        complete(controller, 0.015, api_name='count_nodes')
+    complete(controller, 0.200, api_name='count_nodes')
+
+    assert controller.window == 8
+    assert controller.nb_decreases == 1
+
+
+def test_failure_decreases_the_window_down_to_min_window():
+    controller = AdaptiveConcurrencyController(initial_window=4, min_window=2)
+    complete(controller, 0.001, failed=True)
+    assert controller.window == 2
+    time.sleep(0.01)
+    complete(controller, 0.001, failed=True)
+    assert controller.window == 2
+
+
+def test_window_grows_up_to_max_window():
+    controller = AdaptiveConcurrencyController(initial_window=1, max_window=3)
+    for _ in range(50):
+        complete(controller, 0.001)
+    assert controller.window == 3
+
+
+def test_requests_above_the_window_wait():
+    controller = AdaptiveConcurrencyController(initial_window=1, max_window=1)
+    controller.acquire()
+    acquired = threading.Event()
+
+    def second():
+        controller.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    assert not acquired.wait(0.05)
+    controller.release(0.001)
+    assert acquired.wait(1.0)
+    thread.join()
+    assert controller.in_flight == 1
+
+
+@pytest.mark.parametrize('kwargs', [{'initial_window': 0}, {'min_window': 8, 'initial_window': 4},
+                                    {'decrease_factor': 1.0}])
+def test_bad_parameters(kwargs):
+    with pytest.raises(Exception, match='Sorry'):
+        AdaptiveConcurrencyController(**kwargs)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from conftest import NS
+from delta_sync import DeltaSync, iter_class_pages
+from graph_mirror import GraphMirror
+from path_query import PathQuery
+
+
+@pytest.fixture
+def mirror(dtp_api):
+    return GraphMirror.crawl(dtp_api)
+
+
+def test_changed_pages_hold_the_nodes_at_and_after_the_watermarks(dtp_server, dtp_api):
+    o = dtp_api.DTP_CONFIG.get_ontology_uri
+    delta_sync = DeltaSync()
+    for page in iter_class_pages(dtp_api, o('asPerformedOperation')):
+        delta_sync.observe(dtp_api.DTP_CONFIG, o('asPerformedOperation'), page['items'])
+    assert delta_sync.watermarks[o('asPerformedOperation')][o('processEnd')] == '2023-01-02T00:00:00'
+
+    dtp_server.graph.update_set([{'_iri': NS + 'oper1_1_1', o('processEnd'): '2023-06-01T00:00:00'}])
+    changed = [node['_iri'] for page in delta_sync.iter_changed_pages(dtp_api, o('asPerformedOperation'))
+               for node in page['items']]
+
+    assert NS + 'oper1_1_1' in changed
+
+
+def test_sync_fetches_the_changed_and_removed_nodes(dtp_server, dtp_api, mirror):
+    o = dtp_api.DTP_CONFIG.get_ontology_uri
+    dtp_server.graph.update_set([{'_iri': NS + 'oper0_0_0', o('processEnd'): '2023-06-01T00:00:00'}])
+    dtp_server.graph.delete_node(dtp_server.graph.uuids[NS + 'wp1'])
+
+    stats = mirror.sync(dtp_api)
+
+    oper = mirror.get_nodes([mirror.uuids[NS + 'oper0_0_0']])[0]
+    assert oper[o('processEnd')] == '2023-06-01T00:00:00'
+    assert NS + 'wp1' not in mirror.uuids
+    assert stats['removed'] == 1
+    assert o('workpackage') in stats['recrawled']
+
+
+def test_full_sync_picks_up_the_new_links(dtp_api, mirror):
+    dtp_api.link_node_constr_to_operation(NS + 'constr0', NS + 'oper1_0_0')
+    body = PathQuery(dtp_api.DTP_CONFIG, iri=NS + 'constr0').hop('->', 'hasOperation', 'asPerformedOperation').to_body()
+
+    mirror.sync(dtp_api)
+    assert len(mirror.find(body)) == 1
+
+    mirror.sync(dtp_api, full=True)
+    assert len(mirror.find(body)) == 2
+
+
+def test_watermarks_keep_a_single_kind(dtp_config):
+    delta_sync = DeltaSync(fields=('version',))
+    delta_sync.observe(dtp_config, 'class', [{'version': 3}, {'version': '10'}, {'version': True}, {'version': 7}])
+    assert delta_sync.watermarks['class']['version'] == 7
+
+    delta_sync.observe(dtp_config, 'class', [{'version': 'z'}, {'version': 8}])
+    assert delta_sync.watermarks['class']['version'] == 8
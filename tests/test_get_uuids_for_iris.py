@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from conftest import NS, nb_requests
+
+
+def test_iris_are_resolved_in_chunks(dtp_server, dtp_api):
+    iris = [NS + 'task0_%d_%d' % (a, t) for a in range(3) for t in range(3)]
+
+    uuids, missing = dtp_api.get_uuids_for_iris(iris + [NS + 'unknown', iris[0]], chunk_size=4)
+
+    assert uuids == {iri: dtp_server.graph.uuids[iri] for iri in iris}
+    assert missing == [NS + 'unknown']
+    assert nb_requests(dtp_api) == 3
+
+
+def test_cached_iris_are_not_queried(dtp_api):
+    dtp_api.get_uuid_for_iri(NS + 'wp0')
+    before = nb_requests(dtp_api)
+
+    uuids, missing = dtp_api.get_uuids_for_iris([NS + 'wp0'])
+
+    assert NS + 'wp0' in uuids and not missing
+    assert nb_requests(dtp_api) == before
+
+
+def test_invalid_iri(dtp_api):
+    with pytest.raises(Exception, match='not a valid URI'):
+        dtp_api.get_uuids_for_iris(['not an iri'])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+from datetime import datetime
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS, nb_requests
+from graph_mirror import GraphMirror
+from path_query import PathQuery
+
+SUB_ACTIVITY = 'https://www.bim2twin.eu/ontology/Core#SubActivity'
+
+
+@pytest.fixture
+def mirror(dtp_api):
+    return GraphMirror.crawl(dtp_api)
+
+
+@pytest.fixture
+def mirror_api(dtp_config, mirror):
+    with DTPApi(dtp_config, mirror=mirror) as dtp_api:
+        yield dtp_api
+
+
+def fetch_iris(dtp_api, fetch_function, *args):
+    return sorted(node['_iri'] for node in dtp_api.query_all_pages(fetch_function, *args)['items'])
+
+
+@pytest.mark.parametrize('fetch_name, args', [
+    ('fetch_workpackage_connected_activity_nodes', (NS + 'wp0',)),
+    ('fetch_activity_connected_task_nodes', (NS + 'act0_1',)),
+    ('fetch_oper_connected_action_nodes', (NS + 'oper1_2_0',)),
+    ('fetch_constr_connected_oper_nodes', (NS + 'constr0',)),
+    ('fetch_task_connected_activity_nodes', (NS + 'task1_1_1',)),
+    ('fetch_activity_nodes', ()),
+    ('fetch_workpackage_nodes', ()),
+    ('fetch_element_nodes', ('ifc:Class', 'IfcWall')),
+])
+def test_covered_queries_match_the_platform_without_requests(dtp_api, mirror_api, fetch_name, args):
+    expected = fetch_iris(dtp_api, getattr(dtp_api, fetch_name), *args)
+    before = nb_requests(mirror_api)
+    assert fetch_iris(mirror_api, getattr(mirror_api, fetch_name), *args) == expected
+    assert nb_requests(mirror_api) == before
+
+
+def test_covers(dtp_config, mirror):
+    activity = PathQuery(dtp_config, class_type='activity')
+    assert mirror.covers(activity.to_body())
+    assert not mirror.covers(PathQuery(dtp_config, class_type='GeometricDefect').to_body())
+    assert not mirror.covers(PathQuery(dtp_config, iri=NS + 'unknown').hop('->', 'hasTask', 'task').to_body())
+    assert mirror.covers(PathQuery(dtp_config, iri=NS + 'act0_0').hop('->', 'hasTask', 'task').to_body())
+    assert not mirror.covers({'query': {'$domain': 'https://other.domain/', '$iri': NS + 'act0_0'}})
+
+
+def test_hop_without_class_to_mirrored_targets_is_covered(dtp_api, mirror_api):
+    expected = fetch_iris(dtp_api, dtp_api.fetch_elements_connected_task_nodes, NS + 'task0_1_2')
+    before = nb_requests(mirror_api)
+    assert fetch_iris(mirror_api, mirror_api.fetch_elements_connected_task_nodes, NS + 'task0_1_2') == expected
+    assert len(expected) == 2
+    assert nb_requests(mirror_api) == before
+
+
+def test_hop_without_class_to_unmirrored_targets_is_not_covered(dtp_config, mirror):
+    # the defects are not mirrored, so the targets of the task are not all known
+    task = mirror.nodes[mirror.uuids[NS + 'task0_0_0']]
+    task['_outE'].append({'_label': dtp_config.get_ontology_uri('hasTarget'), '_targetIRI': NS + 'defect0'})
+    assert not mirror.covers(PathQuery(dtp_config, iri=NS + 'task0_0_0').hop('->', 'hasTarget').to_body())
+    assert mirror.covers(PathQuery(dtp_config, iri=NS + 'task0_0_1').hop('->', 'hasTarget').to_body())
+    assert not mirror.covers(PathQuery(dtp_config, iri=NS + 'ifc0_0_0_0').hop('<-', 'hasTarget').to_body())
+    assert not mirror.covers({'query': [{'$iri': NS + 'task0_0_1', '->hasTarget': {'$alias': 'target'}},
+                                        {'$alias': 'target', 'ifc:Class': 'IfcWall'}], 'return': 'target'})
+
+
+def test_query_without_inheritance_ignores_the_subclasses(dtp_server, dtp_api):
+    dtp_server.graph.upsert_nodes([{'_domain': dtp_api.DTP_CONFIG.get_domain(), '_iri': NS + 'sub_activity',
+                                    '_classes': [SUB_ACTIVITY]}], (dtp_api.DTP_CONFIG.get_ontology_uri('activity'),))
+    mirror = GraphMirror.crawl(dtp_api)
+    assert NS + 'sub_activity' in mirror.uuids
+
+    with DTPApi(dtp_api.DTP_CONFIG, mirror=mirror) as mirror_api:
+        activities = fetch_iris(mirror_api, mirror_api.fetch_activity_nodes)
+    assert NS + 'sub_activity' not in activities
+    assert activities == fetch_iris(dtp_api, dtp_api.fetch_activity_nodes)
+
+
+def test_write_through_the_api_invalidates_the_mirror(dtp_api, mirror, mirror_api):
+    construction = dtp_api.DTP_CONFIG.get_ontology_uri('asPerformedConstruction')
+    mirror_api.link_node_constr_to_operation(NS + 'constr0', NS + 'oper1_0_0')
+
+    assert NS + 'constr0' not in mirror.uuids
+    assert construction in mirror.stale
+    assert fetch_iris(mirror_api, mirror_api.fetch_constr_connected_oper_nodes, NS + 'constr0') == \
+        [NS + 'oper0_0_0', NS + 'oper1_0_0']
+
+    now = datetime.now()
+    mirror_api.create_action_node('task', NS + 'action_new', NS + 'task0_0_0', NS + 'asbuilt0_0_0_0', 'contractor',
+                                  now, now)
+    assert dtp_api.DTP_CONFIG.get_ontology_uri('asPerformedAction') in mirror.stale
+    assert dtp_api.DTP_CONFIG.get_ontology_uri('activity') not in mirror.stale
+
+    stats = mirror.sync(dtp_api)
+    assert construction in stats['recrawled']
+    assert not mirror.stale
+    before = nb_requests(mirror_api)
+    assert fetch_iris(mirror_api, mirror_api.fetch_constr_connected_oper_nodes, NS + 'constr0') == \
+        [NS + 'oper0_0_0', NS + 'oper1_0_0']
+    assert nb_requests(mirror_api) == before
+
+
+def test_save_and_load(tmp_path, dtp_config, mirror):
+    mirror.stale.add(dtp_config.get_ontology_uri('task'))
+    mirror.save(str(tmp_path / 'mirror.jsonl.gz'))
+    loaded = GraphMirror.load(str(tmp_path / 'mirror.jsonl.gz'))
+
+    assert len(loaded) == len(mirror)
+    assert loaded.classes == mirror.classes
+    assert loaded.stale == mirror.stale
+    assert loaded.delta_sync.watermarks == mirror.delta_sync.watermarks
+    body = PathQuery(dtp_config, iri=NS + 'wp0').hop('->', 'hasActivity', 'activity').to_body()
+    assert loaded.get_nodes(loaded.find(body)) == mirror.get_nodes(mirror.find(body))
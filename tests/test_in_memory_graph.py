@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from in_memory_graph import MISSING, InMemoryGraph, QueryError, match_value
+
+ELEMENT = 'https://w3id.org/bot#Element'
+WALL = 'https://www.bim2twin.eu/ontology/Core#Wall'
+TASK = 'https://www.bim2twin.eu/ontology/Core#Task'
+HAS_TARGET = 'https://www.bim2twin.eu/ontology/Core#hasTarget'
+
+
+@pytest.mark.parametrize('value, condition, expected', [
+    (3, 3, True),
+    (3, 4, False),
+    (MISSING, 3, False),
+    ({'a': 1}, {'a': 1}, True),
+    (2, {'$in': [1, 2]}, True),
+    (MISSING, {'$in': [1, 2]}, False),
+    (3, {'$nin': [1, 2]}, True),
+    (MISSING, {'$nin': [1, 2]}, True),
+    (1, {'$ne': 1}, False),
+    (MISSING, {'$exists': False}, True),
+    (0, {'$exists': True}, True),
+    (['a', 'b'], {'$contains': 'b'}, True),
+    ('2023-02-01', {'$gte': '2023-01-01', '$lt': '2023-03-01'}, True),
+    ('2023-03-01', {'$gte': '2023-01-01', '$lt': '2023-03-01'}, False),
+    (5, {'$gt': 5}, False),
+    (5, {'$lte': 5}, True),
+    ('a', {'$gt': 1}, False),
+])
+def test_match_value(value, condition, expected):
+    assert match_value(value, condition) is expected
+
+
+def test_match_value_unsupported_operator():
+    with pytest.raises(QueryError):
+        match_value(1, {'$regex': '.*'})
+
+
+@pytest.fixture
+def graph():
+    graph = InMemoryGraph()
+    graph.add_nodes([
+        {'_domain': 'd', '_iri': 'task', '_classes': [TASK], '_outE': [
+            {'_label': HAS_TARGET, '_targetIRI': 'wall'}, {'_label': HAS_TARGET, '_targetIRI': 'element'}]},
+        {'_domain': 'd', '_iri': 'element', '_classes': [ELEMENT]},
+    ])
+    # the subclass is known only from the class the node is upserted with
+    graph.upsert_nodes([{'_domain': 'd', '_iri': 'wall', '_classes': [WALL]}], (ELEMENT,))
+    return graph
+
+
+def iris(graph, body):
+    return sorted(node['_iri'] for node in graph.get_nodes(graph.find(body)))
+
+
+def test_classes_without_inheritance_match_the_own_classes(graph):
+    assert iris(graph, {'query': {'$classes': {'$contains': ELEMENT}}}) == ['element']
+
+
+def test_classes_with_inheritance_match_the_subclasses(graph):
+    assert iris(graph, {'query': {'$classes': {'$contains': ELEMENT, '$inheritance': True}}}) == ['element', 'wall']
+
+
+def test_aliases_follow_the_edges(graph):
+    out = {'query': [{'$iri': 'task', '->' + HAS_TARGET: {'$alias': 'target'}},
+                     {'$alias': 'target', '$classes': {'$contains': ELEMENT, '$inheritance': True}}],
+           'return': 'target'}
+    assert iris(graph, out) == ['element', 'wall']
+
+    back = {'query': [{'$iri': 'wall', '<-' + HAS_TARGET: {'$alias': 'source'}},
+                      {'$alias': 'source', '$classes': {'$contains': TASK}}],
+            'return': 'source'}
+    assert iris(graph, back) == ['task']
+
+
+def test_deleted_node_is_not_found(graph):
+    graph.delete_node(graph.uuids['wall'])
+    body = {'query': {'$classes': {'$contains': ELEMENT, '$inheritance': True}}}
+    assert iris(graph, body) == ['element']
+    assert iris(graph, {'query': [{'$iri': 'task', '->' + HAS_TARGET: {'$alias': 't'}}], 'return': 't'}) == \
+        ['element']
+
+
+def test_upsert_keeps_the_given_classes(graph):
+    assert graph.upsert_nodes([{'_domain': 'd', '_iri': 'wall', '_classes': [WALL], 'name': 'w'}]) == 1
+    assert graph.classes_of(graph.uuids['wall']) == {WALL, ELEMENT}
+    assert graph.get_nodes([graph.uuids['wall']])[0]['name'] == 'w'
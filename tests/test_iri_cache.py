@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import time
+
+from conftest import NS, nb_requests
+from iri_cache import IRICache
+
+
+def test_least_recently_used_entries_are_evicted():
+    iri_cache = IRICache(maxsize=2)
+    iri_cache.put('a', '1')
+    iri_cache.put('b', '2')
+    assert iri_cache.get('a') == '1'
+    iri_cache.put('c', '3')
+
+    assert iri_cache.get('b') is None
+    assert iri_cache.get('a') == '1'
+    assert iri_cache.get('c') == '3'
+    assert iri_cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_expired_entries_are_ignored():
+    iri_cache = IRICache(ttl=0.05)
+    iri_cache.put('a', '1')
+    assert iri_cache.get('a') == '1'
+    time.sleep(0.06)
+    assert iri_cache.get('a') is None
+    assert len(iri_cache) == 0
+
+
+def test_invalidate():
+    iri_cache = IRICache()
+    iri_cache.put('a', '1')
+    iri_cache.put('b', '2')
+    iri_cache.invalidate('a')
+    iri_cache.invalidate_uuid('2')
+    iri_cache.invalidate('unknown')
+
+    assert iri_cache.get('a') is None
+    assert iri_cache.get('b') is None
+
+
+def test_disabled_cache():
+    iri_cache = IRICache(maxsize=0)
+    iri_cache.put('a', '1')
+    assert iri_cache.get('a') is None
+
+
+def test_get_uuid_for_iri_is_cached_until_the_node_is_deleted(dtp_server, dtp_api):
+    node_uuid = dtp_api.get_uuid_for_iri(NS + 'wp0')
+    before = nb_requests(dtp_api)
+    assert dtp_api.get_uuid_for_iri(NS + 'wp0') == node_uuid == dtp_server.graph.uuids[NS + 'wp0']
+    assert nb_requests(dtp_api) == before
+
+    assert dtp_api.delete_node_from_graph_with_iri(NS + 'wp0')
+    assert dtp_api.iri_cache.get(NS + 'wp0') is None
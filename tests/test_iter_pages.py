@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+from conftest import nb_requests
+
+
+def iris(items):
+    return [item['_iri'] for item in items]
+
+
+def test_pages_are_yielded_one_by_one(dtp_api):
+    pages = dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+    first_page = next(pages)
+    assert len(first_page['items']) == 7 and 'next' in first_page
+
+    remaining = list(pages)
+    assert [len(page['items']) for page in remaining] == [7, 7, 7, 7, 1]
+    assert nb_requests(dtp_api) == 6
+
+
+def test_items_match_query_all_pages(dtp_api):
+    items = iris(dtp_api.iter_items(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall'))
+
+    assert len(set(items)) == 36
+    assert items == iris(dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')['items'])
+
+
+def test_single_page_query(dtp_api):
+    pages = list(dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcSlab'))
+
+    assert len(pages) == 1 and pages[0]['items'] == []
+    assert nb_requests(dtp_api) == 1
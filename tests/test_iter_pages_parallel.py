@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from conftest import NS, nb_requests
+from helpers import get_page_url_builder
+from path_query import parse_path
+
+
+def iris(pages):
+    return [item['_iri'] for page in pages for item in page['items']]
+
+
+def test_page_url_builder():
+    offset_url = get_page_url_builder('http://dtp/avatars/find?size=7&first=7', 7)
+    assert offset_url(3) == 'http://dtp/avatars/find?size=7&first=21'
+    page_number_url = get_page_url_builder('http://dtp/avatars/find?page=2', 7)
+    assert page_number_url(0) == 'http://dtp/avatars/find?page=1'
+    assert get_page_url_builder('http://dtp/avatars/find?cursor=abc', 7) is None
+
+
+def test_parallel_pages_keep_the_order_of_the_next_chain(dtp_api):
+    sequential = iris(dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall', read_ahead=0))
+    before = nb_requests(dtp_api)
+
+    pages = list(dtp_api.iter_pages_parallel(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall', max_workers=2))
+
+    assert iris(pages) == sequential
+    # the first page, the count query and the five remaining pages
+    assert nb_requests(dtp_api) - before == 7
+    merged = dtp_api.query_all_pages_parallel(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+    assert len(merged['items']) == 36
+
+
+def test_count_function_of_another_query(dtp_api):
+    path = parse_path(dtp_api.DTP_CONFIG, '-hasActivity-> activity -hasTask-> task', iri=NS + 'wp1')
+
+    pages = list(dtp_api.iter_pages_parallel(dtp_api.fetch_path, path, count_function=dtp_api.count_path))
+
+    assert sorted(iris(pages)) == sorted(NS + 'task1_%d_%d' % (a, t) for a in range(3) for t in range(3))
+
+
+def test_count_which_is_not_an_integer(dtp_api):
+    with pytest.raises(Exception, match='not an integer'):
+        list(dtp_api.iter_pages_parallel(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall',
+                                         count_function=lambda *args: {'total_items': 'many'}))
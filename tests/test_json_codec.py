@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS, nb_requests
+from json_codec import OrjsonCodec, StdlibJSONCodec, get_json_codec
+
+PAYLOAD = {'_iri': NS + 'wall', 'name': 'mur porteur é', 'values': [1, 2.5, None, True]}
+
+
+@pytest.mark.parametrize('codec', [StdlibJSONCodec, OrjsonCodec])
+def test_codecs_round_trip_bytes_and_strings(codec):
+    if codec is OrjsonCodec:
+        pytest.importorskip('orjson')
+    data = codec.dumps(PAYLOAD)
+
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == PAYLOAD
+    assert codec.loads(data.decode('utf-8')) == PAYLOAD
+
+
+def test_get_json_codec():
+    assert get_json_codec('json') is StdlibJSONCodec
+    assert get_json_codec('auto') in (OrjsonCodec, StdlibJSONCodec)
+    with pytest.raises(Exception, match='Sorry'):
+        get_json_codec('simplejson')
+
+
+@pytest.mark.parametrize('json_backend', ['json', 'auto'])
+def test_responses_are_decoded_with_the_selected_codec(dtp_server, json_backend):
+    with DTPApi(dtp_server.dtp_config, json_backend=json_backend) as dtp_api:
+        assert dtp_api.json_codec is get_json_codec(json_backend)
+        walls = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+        assert len({node['_iri'] for node in walls['items']}) == 36
+        assert nb_requests(dtp_api) == 6
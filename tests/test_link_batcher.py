@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from conftest import NS, nb_requests
+
+
+def out_edges(dtp_server, iri, label):
+    node = dtp_server.graph.nodes[dtp_server.graph.uuids[iri]]
+    return sorted(edge['_targetIRI'] for edge in node['_outE'] if edge['_label'] == label)
+
+
+def test_edges_are_grouped_by_source_node(dtp_server, dtp_api):
+    has_operation = dtp_api.DTP_CONFIG.get_ontology_uri('hasOperation')
+    has_action = dtp_api.DTP_CONFIG.get_ontology_uri('hasAction')
+    with dtp_api.link_batcher() as links:
+        for a in range(3):
+            dtp_api.link_node_constr_to_operation(NS + 'constr0', NS + 'oper1_%d_0' % a)
+        dtp_api.link_node_operation_to_action(NS + 'oper1_0_0', NS + 'action1_0_1')
+        assert nb_requests(dtp_api) == 0
+        assert len(links) == 4
+
+    assert nb_requests(dtp_api) == 1
+    assert links.nb_linked == 4
+    assert out_edges(dtp_server, NS + 'constr0', has_operation) == [NS + 'oper0_0_0'] + \
+        [NS + 'oper1_%d_0' % a for a in range(3)]
+    assert out_edges(dtp_server, NS + 'oper1_0_0', has_action) == [NS + 'action1_0_0', NS + 'action1_0_1']
+
+
+def test_batches_are_limited_by_the_number_of_source_nodes(dtp_api):
+    with dtp_api.link_batcher(max_nodes=2) as links:
+        for a in range(3):
+            dtp_api.link_node_operation_to_action(NS + 'oper0_%d_0' % a, NS + 'action0_%d_1' % a)
+
+    assert links.nb_requests == 2
+    assert links.nb_linked == 3
+
+
+def test_rejected_batch_reports_its_links(dtp_api):
+    has_action = dtp_api.DTP_CONFIG.get_ontology_uri('hasAction')
+    with dtp_api.link_batcher() as links:
+        dtp_api.link_node_operation_to_action(NS + 'unknown_oper', NS + 'action0_0_0')
+
+    assert links.failed_links == [(NS + 'unknown_oper', has_action, NS + 'action0_0_0')]
+
+
+def test_a_single_link_batcher_is_active(dtp_api):
+    with dtp_api.link_batcher():
+        with pytest.raises(Exception, match='already active'):
+            with dtp_api.link_batcher():
+                pass
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS
+
+
+def test_find_pages_follow_the_next_links(dtp_api):
+    page = dtp_api.fetch_element_nodes('ifc:Class', 'IfcWall')
+    assert page['size'] == 7
+    assert 'next' in page
+
+    walls = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+    assert walls['size'] == 36
+    assert len({node['_iri'] for node in walls['items']}) == 36
+
+
+def test_count_and_write_endpoints(dtp_server, dtp_api):
+    assert dtp_api.activity_count_connected_task_nodes(NS + 'act0_0') == 3
+
+    assert dtp_api.delete_node_from_graph_with_iri(NS + 'task0_0_0')
+    assert NS + 'task0_0_0' not in dtp_server.graph.uuids
+    assert dtp_api.activity_count_connected_task_nodes(NS + 'act0_0') == 2
+
+
+def test_injected_errors_are_retried(dtp_server, dtp_config):
+    dtp_server.error_rate = 1.0
+    dtp_server.retry_after = 0
+    with DTPApi(dtp_config, max_retries=2, circuit_breaker_threshold=0) as dtp_api:
+        with pytest.raises(Exception, match='503'):
+            dtp_api.post_general_request('{}', dtp_config.get_api_url('count_nodes'))
+        assert dtp_api.metrics.to_dict()['apis']['count_nodes']['statuses'] == {'503': 3}
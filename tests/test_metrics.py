@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+
+from conftest import NS
+from metrics import MetricsRegistry
+
+
+def test_requests_are_recorded_by_api():
+    metrics = MetricsRegistry(buckets=(0.01, 0.1))
+    metrics.observe_request('count_nodes', 0.005, 10, 20, 200)
+    metrics.observe_request('count_nodes', 0.05, 10, 20, 503)
+    metrics.observe_error('count_nodes', 0.5, 'ConnectionError')
+    metrics.observe_retry('count_nodes')
+    metrics.observe_retry(None)
+
+    snapshot = metrics.to_dict()['apis']
+    assert snapshot['count_nodes'] == {
+        'requests': 2,
+        'statuses': {'200': 1, '503': 1},
+        'errors': {'ConnectionError': 1},
+        'retries': 1,
+        'request_bytes': 20,
+        'response_bytes': 40,
+        'latency': {'count': 3, 'sum': 0.555, 'mean': 0.555 / 3, 'buckets': {'0.01': 1, '0.1': 2, '+Inf': 3}}
+    }
+    assert snapshot['unknown']['retries'] == 1
+    assert json.loads(metrics.to_json()) == metrics.to_dict()
+
+
+def test_reset_keeps_the_gauges():
+    metrics = MetricsRegistry()
+    metrics.register_gauge('window', lambda: 4, 'The concurrency window.')
+    metrics.observe_request('add_node', 0.01, 1, 1, 201)
+    metrics.reset()
+
+    assert metrics.to_dict() == {'apis': {}, 'gauges': {'window': 4}}
+
+
+def test_prometheus_exposition():
+    metrics = MetricsRegistry(buckets=(0.1,))
+    metrics.register_gauge('window', lambda: 4, 'The concurrency window.')
+    metrics.register_gauge('unset', lambda: None)
+    metrics.observe_request('get_find_elements', 0.05, 100, 2000, 200)
+
+    lines = metrics.to_prometheus(prefix='test').splitlines()
+    assert 'test_requests_total{api="get_find_elements",status="200"} 1' in lines
+    assert 'test_response_bytes_total{api="get_find_elements"} 2000' in lines
+    assert 'test_request_duration_seconds_bucket{api="get_find_elements",le="0.1"} 1' in lines
+    assert 'test_request_duration_seconds_bucket{api="get_find_elements",le="+Inf"} 1' in lines
+    assert 'test_request_duration_seconds_count{api="get_find_elements"} 1' in lines
+    assert '# TYPE test_window gauge' in lines
+    assert 'test_window 4' in lines
+    assert not any(line.startswith('test_unset') for line in lines)
+
+
+def test_dtp_api_records_its_requests(dtp_api):
+    dtp_api.get_uuid_for_iri(NS + 'wp0')
+    dtp_api.get_uuid_for_iri(NS + 'wp1')
+
+    snapshot = dtp_api.metrics.to_dict()
+    assert sum(metrics['requests'] for metrics in snapshot['apis'].values()) == 2
+    assert all(metrics['response_bytes'] > 0 for metrics in snapshot['apis'].values())
+    assert snapshot['gauges']['circuit_open'] == 0
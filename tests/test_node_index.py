@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+from datetime import datetime
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS, nb_requests
+from node_index import NodeIndex
+
+
+@pytest.fixture
+def node_index(tmp_path, dtp_api):
+    node_index = NodeIndex(str(tmp_path / 'nodes.sqlite'))
+    node_index.index_classes(dtp_api)
+    yield node_index
+    node_index.close()
+
+
+@pytest.fixture
+def indexed_api(dtp_config, node_index):
+    with DTPApi(dtp_config, node_index=node_index) as dtp_api:
+        yield dtp_api
+
+
+def test_index_classes_marks_classes_complete(dtp_config, node_index):
+    for class_type in ('classElement', 'activity', 'task', 'asPerformedAction'):
+        assert node_index.is_complete(dtp_config.get_ontology_uri(class_type))
+    assert not node_index.is_complete('https://www.bim2twin.eu/ontology/Core#Defect')
+
+
+def test_counts_are_answered_from_the_index(dtp_api, indexed_api):
+    expected = dtp_api.activity_count_connected_task_nodes(NS + 'act0_1')
+    before = nb_requests(indexed_api)
+    assert indexed_api.activity_count_connected_task_nodes(NS + 'act0_1') == expected == 3
+    assert nb_requests(indexed_api) == before
+
+
+def test_get_uuid_for_iri_is_answered_from_the_index(dtp_api, indexed_api):
+    expected = dtp_api.get_uuid_for_iri(NS + 'task0_1_2')
+    before = nb_requests(indexed_api)
+    assert indexed_api.get_uuid_for_iri(NS + 'task0_1_2') == expected
+    assert nb_requests(indexed_api) == before
+
+
+def test_creating_a_node_keeps_unrelated_classes_complete(dtp_config, node_index, indexed_api):
+    now = datetime.now()
+    assert indexed_api.create_action_node('task', NS + 'action_new', NS + 'task0_0_0', NS + 'asbuilt0_0_0_0',
+                                          'contractor', now, now)
+
+    assert not node_index.is_complete(dtp_config.get_ontology_uri('asPerformedAction'))
+    assert node_index.is_complete(dtp_config.get_ontology_uri('activity'))
+    assert node_index.is_complete(dtp_config.get_ontology_uri('task'))
+
+    before = nb_requests(indexed_api)
+    assert indexed_api.activity_count_connected_task_nodes(NS + 'act0_1') == 3
+    assert nb_requests(indexed_api) == before
+
+
+def test_updating_a_node_invalidates_its_classes(dtp_api, dtp_config, node_index, indexed_api):
+    indexed_api.update_asdesigned_param_node(NS + 'asbuilt0_0_0_1', True)
+
+    assert node_index.get_uuid(NS + 'asbuilt0_0_0_1') is None
+    assert not node_index.is_complete(dtp_config.get_ontology_uri('classElement'))
+    assert node_index.is_complete(dtp_config.get_ontology_uri('task'))
+    assert indexed_api.asdesigned_count_connected_asbuilt_nodes(NS + 'ifc0_0_0_1') == \
+        dtp_api.asdesigned_count_connected_asbuilt_nodes(NS + 'ifc0_0_0_1')
+
+
+def test_unknown_uuid_keeps_the_classes_complete(dtp_config, node_index):
+    node_index.invalidate_uuid('00000000-0000-0000-0000-000000000000')
+    node_index.invalidate(NS + 'unknown')
+
+    assert node_index.is_complete(dtp_config.get_ontology_uri('activity'))
+
+
+def test_new_node_of_a_subclass_invalidates_the_indexed_class(dtp_config, node_index):
+    node_index.invalidate(NS + 'wall_new', ['https://www.bim2twin.eu/ontology/Core#Wall'])
+
+    assert not node_index.is_complete(dtp_config.get_ontology_uri('classElement'))
+    assert node_index.is_complete(dtp_config.get_ontology_uri('activity'))
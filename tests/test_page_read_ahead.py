@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import threading
+import time
+
+import pytest
+
+from conftest import nb_requests
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def prefetch_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'DTPApi-page-prefetch']
+
+
+def test_without_read_ahead_pages_are_fetched_on_demand(dtp_api):
+    pages = dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall', read_ahead=0)
+    next(pages)
+    time.sleep(0.05)
+
+    assert nb_requests(dtp_api) == 1
+    assert not prefetch_threads()
+    pages.close()
+
+
+def test_read_ahead_pages_are_fetched_in_the_background(dtp_api):
+    pages = dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall', read_ahead=2)
+    next(pages)
+
+    # the consumed page, two buffered pages and one page waiting for room in the buffer
+    assert wait_for(lambda: nb_requests(dtp_api) == 4)
+    time.sleep(0.05)
+    assert nb_requests(dtp_api) == 4
+    assert len(list(pages)) == 5
+
+
+def test_closing_the_generator_stops_the_prefetch(dtp_api):
+    pages = dtp_api.iter_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall', read_ahead=1)
+    next(pages)
+    pages.close()
+
+    assert wait_for(lambda: not prefetch_threads())
+    assert nb_requests(dtp_api) < 6
+
+
+def test_errors_of_the_prefetch_are_raised_in_the_consumer(dtp_api):
+    def fetch_function(*args, url=None):
+        if url is not None:
+            raise ValueError('page lost')
+        return dtp_api.fetch_element_nodes(*args)
+
+    pages = dtp_api.iter_pages(fetch_function, 'ifc:Class', 'IfcWall', read_ahead=1)
+    next(pages)
+    with pytest.raises(ValueError, match='page lost'):
+        next(pages)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import pytest
+
+from conftest import NS
+from path_query import PathQuery, parse_path
+
+
+def test_to_body_chains_the_hops(dtp_config):
+    o = dtp_config.get_ontology_uri
+    domain = dtp_config.get_domain()
+    path = PathQuery(dtp_config, iri=NS + 'wp0').hop('->', 'hasActivity', 'activity').hop(
+        '->', 'hasTask', 'task', inheritance=True, alias='tasks')
+
+    assert path.to_body() == {
+        'query': [
+            {'$domain': domain, '$iri': NS + 'wp0', '->' + o('hasActivity'): {'$alias': 'hop1'}},
+            {'$alias': 'hop1', '$domain': domain, '$classes': {'$contains': o('activity')},
+             '->' + o('hasTask'): {'$alias': 'tasks'}},
+            {'$alias': 'tasks', '$domain': domain, '$classes': {'$contains': o('task'), '$inheritance': True}},
+        ],
+        'return': 'tasks'
+    }
+
+
+def test_to_body_without_hops_is_the_start_body(dtp_config):
+    path = PathQuery(dtp_config, iri=[NS + 'wp0', NS + 'wp1'], class_type='workpackage', edge=True)
+
+    assert path.to_body() == path.to_start_body() == {'query': {
+        '$domain': dtp_config.get_domain(), '$iri': {'$in': [NS + 'wp0', NS + 'wp1']},
+        '$classes': {'$contains': dtp_config.get_ontology_uri('workpackage')}}}
+
+
+def test_last_hop_without_conditions_has_no_element(dtp_config):
+    body = PathQuery(dtp_config, iri=NS + 'task0_0_0', edge=True).hop('->', 'hasTarget').to_body()
+
+    assert len(body['query']) == 1
+    assert body['edge'] is True
+    assert body['return'] == 'hop1'
+
+
+def test_to_hop_body_starts_from_the_given_nodes(dtp_config):
+    o = dtp_config.get_ontology_uri
+    path = PathQuery(dtp_config, iri=NS + 'wp0').hop('->', 'hasActivity', 'activity').hop('<-', 'intentStatusRelation')
+
+    body = path.to_hop_body(1, [NS + 'act0_0', NS + 'act0_1'])
+    assert body == {'query': [{'$domain': dtp_config.get_domain(), '$iri': {'$in': [NS + 'act0_0', NS + 'act0_1']},
+                               '<-' + o('intentStatusRelation'): {'$alias': 'hop2'}}],
+                    'return': 'hop2'}
+    assert path.to_hop_body(0, [NS + 'wp0'])['query'][0]['$iri'] == NS + 'wp0'
+
+
+def test_hop_with_a_bad_direction(dtp_config):
+    with pytest.raises(Exception, match='direction'):
+        PathQuery(dtp_config).hop('=>', 'hasTask')
+
+
+def test_parse_path(dtp_config):
+    o = dtp_config.get_ontology_uri
+    path = parse_path(dtp_config, 'workpackage -hasActivity-> activity <-intentStatusRelation- *')
+
+    assert path.start == {'$classes': {'$contains': o('workpackage'), '$inheritance': True}}
+    assert path.hops == [
+        ('->', o('hasActivity'), {'$classes': {'$contains': o('activity'), '$inheritance': True}}, 'hop1'),
+        ('<-', o('intentStatusRelation'), {}, 'hop2'),
+    ]
+
+
+def test_parse_path_from_an_iri(dtp_config):
+    path = parse_path(dtp_config, '-hasTask-> task', iri=NS + 'act0_0')
+
+    assert path.start == {'$iri': NS + 'act0_0'}
+    assert len(path.hops) == 1
+
+
+@pytest.mark.parametrize('text', ['activity -hasTask->', 'activity task', 'activity -hasTask-> -hasTarget->'])
+def test_parse_path_rejects_malformed_paths(dtp_config, text):
+    with pytest.raises(Exception, match='alternate'):
+        parse_path(dtp_config, text)
+
+
+def test_path_queries_match_the_fetch_methods(dtp_api):
+    path = parse_path(dtp_api.DTP_CONFIG, '-hasActivity-> activity -hasTask-> task', iri=NS + 'wp1')
+    tasks = sorted(node['_iri'] for node in dtp_api.query_all_pages(dtp_api.fetch_path, path)['items'])
+
+    assert tasks == sorted(NS + 'task1_%d_%d' % (a, t) for a in range(3) for t in range(3))
+    assert dtp_api.count_path(path) == 9
+    hop_by_hop = dtp_api.query_path(path, chained=False)
+    assert sorted(node['_iri'] for node in hop_by_hop['items']) == tasks
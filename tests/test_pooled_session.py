@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS
+from transport import PooledHTTPAdapter
+
+
+def nb_connections_opened(dtp_api):
+    pools = dtp_api.session.get_adapter(dtp_api.DTP_CONFIG.get_api_url('get_find_elements')).poolmanager.pools
+    return sum(pools[key].num_connections for key in pools.keys())
+
+
+def test_the_session_is_pooled(dtp_config):
+    with DTPApi(dtp_config, pool_maxsize=3, pool_block=True) as dtp_api:
+        adapter = dtp_api.session.get_adapter('https://example.com')
+        assert isinstance(adapter, PooledHTTPAdapter)
+        assert adapter is dtp_api.session.get_adapter('http://example.com')
+        assert adapter._pool_maxsize == 3 and adapter._pool_block
+        assert dtp_api.parallel_requests == 3
+
+
+def test_requests_reuse_a_single_connection(dtp_server):
+    with DTPApi(dtp_server.dtp_config) as dtp_api:
+        for w in range(2):
+            for a in range(2):
+                dtp_api.get_uuid_for_iri(NS + 'act%d_%d' % (w, a))
+
+        assert nb_connections_opened(dtp_api) == 1
+
+
+@pytest.mark.parametrize('keep_alive', [True, False])
+def test_without_keep_alive_the_connection_is_closed(dtp_server, keep_alive):
+    with DTPApi(dtp_server.dtp_config, keep_alive=keep_alive) as dtp_api:
+        payload = json.dumps({'query': {'$domain': dtp_api.DTP_CONFIG.get_domain(), '$iri': NS + 'wp0'}})
+        response = dtp_api.post_general_request(payload, dtp_api.DTP_CONFIG.get_api_url('count_nodes'))
+
+        assert (response.request.headers.get('Connection') == 'close') is not keep_alive
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import argparse
+import pstats
+
+from helpers import add_profile_argument, profiling
+
+
+def test_profile_argument():
+    parser = argparse.ArgumentParser()
+    add_profile_argument(parser)
+
+    assert parser.parse_args([]).profile is None
+    assert parser.parse_args(['--profile']).profile == 'profile'
+    assert parser.parse_args(['-p', 'out/run']).profile == 'out/run'
+
+
+def test_profiling_writes_the_reports(tmp_path, dtp_api):
+    prefix = str(tmp_path / 'reports' / 'run')
+    with profiling(prefix, snapshot_interval=0.01):
+        walls = dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+    assert len(walls['items']) == 36
+
+    functions = {function_name for _, _, function_name in pstats.Stats(prefix + '.prof').stats}
+    # the pages are fetched by the prefetch thread, whose profile is merged
+    assert {'query_all_pages', 'fetch_element_nodes'} <= functions
+    assert 'cumulative' in open(prefix + '_profile.txt').read()
+    memory_report = open(prefix + '_memory.txt').read()
+    assert memory_report.startswith('Peak traced memory:') and 'Top allocation sites' in memory_report
+
+
+def test_without_prefix_nothing_is_profiled(tmp_path):
+    with profiling(None):
+        pass
+
+    assert not list(tmp_path.iterdir())
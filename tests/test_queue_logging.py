@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import logging
+import threading
+
+from multiprocessing_logging import BatchingFileHandler, start_queue_logging
+
+
+def queue_logger(tmp_path, name, max_batch=512):
+    path = tmp_path / (name + '.log')
+    handler = BatchingFileHandler(str(path))
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger('test_queue_logging.' + name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger, handler, start_queue_logging(logger, handler, max_batch=max_batch), path
+
+
+def test_records_of_all_threads_are_written_once(tmp_path):
+    logger, handler, listener, path = queue_logger(tmp_path, 'threads', max_batch=8)
+    assert handler not in logger.handlers
+
+    def work(index):
+        for line in range(100):
+            logger.info('thread %d line %d', index, line)
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    listener.flush()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert sorted(lines) == sorted('thread %d line %d' % (index, line) for index in range(4) for line in range(100))
+    listener.stop()
+    handler.close()
+
+
+def test_stop_writes_the_remaining_records_and_restores_the_handlers(tmp_path):
+    logger, handler, listener, path = queue_logger(tmp_path, 'stop')
+    logger.info('queued')
+    listener.stop()
+    listener.stop()
+
+    assert logger.handlers == [handler]
+    logger.info('direct')
+    handler.close()
+    assert path.read_text(encoding='utf-8').splitlines() == ['queued', 'direct']
+
+
+def test_handler_levels_are_respected(tmp_path):
+    logger, handler, listener, path = queue_logger(tmp_path, 'levels')
+    handler.setLevel(logging.WARNING)
+    logger.info('dropped')
+    logger.warning('kept')
+    listener.stop()
+    handler.close()
+
+    assert path.read_text(encoding='utf-8').splitlines() == ['kept']
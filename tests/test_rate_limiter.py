@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import threading
+import time
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS
+from rate_limiter import RateLimiter
+
+
+def test_unlimited_class_does_not_wait():
+    rate_limiter = RateLimiter({'write': 1})
+    assert all(rate_limiter.acquire('get_find_elements') == 0.0 for _ in range(100))
+
+
+def test_negative_rate():
+    with pytest.raises(Exception, match='positive'):
+        RateLimiter({'find': -1})
+
+
+def test_burst_then_rate():
+    rate_limiter = RateLimiter({'find': 20}, bursts={'find': 3})
+    assert [rate_limiter.acquire('get_find_elements') for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    start = time.monotonic()
+    waited = [rate_limiter.acquire('get_find_elements') for _ in range(4)]
+    elapsed = time.monotonic() - start
+
+    assert all(delay > 0 for delay in waited)
+    assert 0.15 <= elapsed < 0.5
+
+
+def test_buckets_are_per_endpoint_class():
+    rate_limiter = RateLimiter({'find': 1, 'other': 1})
+    assert rate_limiter.acquire('get_find_elements') == 0.0
+    assert rate_limiter.acquire('count_nodes') == 0.0
+    assert rate_limiter.acquire('unknown_api') == 0.0
+    assert rate_limiter.acquire(None) > 0.0
+
+
+def test_threads_share_the_rate():
+    rate_limiter = RateLimiter({'find': 50}, bursts={'find': 1})
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=rate_limiter.acquire, args=('get_find_elements',)) for _ in range(11)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.monotonic() - start >= 0.18
+
+
+def test_requests_of_the_api_are_limited(dtp_config):
+    with DTPApi(dtp_config, rate_limiter=RateLimiter({'find': 20}, bursts={'find': 1})) as dtp_api:
+        start = time.monotonic()
+        for _ in range(5):
+            dtp_api.fetch_node_with_iri(NS + 'wp0')
+        assert time.monotonic() - start >= 0.18
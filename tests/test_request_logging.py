@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import logging
+
+import pytest
+import requests
+
+from DTP_API import DTPApi
+from conftest import NS
+from helpers import LazyHTTPRequest, logger_global
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def log_records():
+    handler = RecordingHandler()
+    logger_global.addHandler(handler)
+    yield handler.records
+    logger_global.removeHandler(handler)
+
+
+def request_logs(records):
+    dumps = [record for record in records if record.levelno == logging.DEBUG and record.msg.startswith('HTTP request')]
+    summaries = [record for record in records if record.levelno == logging.INFO and 'Response code' in record.msg]
+    return dumps, summaries
+
+
+@pytest.mark.parametrize('request_log_mode, nb_dumps, nb_summaries', [('full', 1, 1), ('summary', 0, 1), ('off', 0, 0)])
+def test_request_log_modes(dtp_server, log_records, request_log_mode, nb_dumps, nb_summaries):
+    with DTPApi(dtp_server.dtp_config, request_log_mode=request_log_mode) as dtp_api:
+        dtp_api.get_uuid_for_iri(NS + 'wp0')
+
+    dumps, summaries = request_logs(log_records)
+    assert (len(dumps), len(summaries)) == (nb_dumps, nb_summaries)
+
+
+def test_request_dumps_can_be_sampled_out(dtp_server, log_records):
+    with DTPApi(dtp_server.dtp_config, request_log_sample_rate=0.0) as dtp_api:
+        dtp_api.get_uuid_for_iri(NS + 'wp0')
+
+    dumps, summaries = request_logs(log_records)
+    assert (len(dumps), len(summaries)) == (0, 1)
+
+
+def test_requests_are_formatted_only_when_emitted():
+    prepared = requests.Request('POST', 'http://dtp/avatars/find', data='x' * 100).prepare()
+    lazy_request = LazyHTTPRequest(prepared, max_body=10)
+
+    text = str(lazy_request)
+    assert text.startswith('-----------START-----------\nPOST http://dtp/avatars/find')
+    assert 'x' * 10 + '... [10 of 100 bytes shown]' in text and 'x' * 11 not in text
+
+
+def test_bad_request_log_mode(dtp_config):
+    with pytest.raises(Exception, match='request log mode'):
+        DTPApi(dtp_config, request_log_mode='verbose')
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import json
+import threading
+
+import pytest
+
+from DTP_API import DTPApi
+from conftest import NS
+from tracing import JSONLinesExporter, Tracer
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def close(self):
+        pass
+
+
+def test_nested_spans_form_a_tree():
+    tracer = Tracer(ListExporter())
+    with tracer.span('outer', page=0) as outer:
+        with tracer.span('inner') as inner:
+            inner.set_attribute('size', 3)
+
+    assert [span.name for span in tracer.exporter.spans] == ['inner', 'outer']
+    assert inner.trace_id == outer.trace_id and inner.parent_id == outer.span_id
+    assert outer.parent_id is None and outer.attributes == {'page': 0}
+    assert inner.attributes == {'size': 3} and inner.duration <= outer.duration
+    assert tracer.current_span() is None
+
+
+def test_failed_span_records_the_error():
+    tracer = Tracer(ListExporter())
+    with pytest.raises(ValueError):
+        with tracer.span('failing'):
+            raise ValueError('bad value')
+
+    span = tracer.exporter.spans[0]
+    assert span.status == 'error' and span.error == 'ValueError: bad value'
+
+
+def test_bound_function_keeps_the_parent_in_another_thread():
+    tracer = Tracer(ListExporter())
+
+    def work():
+        with tracer.span('child'):
+            pass
+
+    with tracer.span('parent') as parent:
+        thread = threading.Thread(target=tracer.bind(work))
+        thread.start()
+        thread.join()
+
+    child = tracer.exporter.spans[0]
+    assert child.parent_id == parent.span_id and child.thread != parent.thread
+
+
+def test_json_lines_exporter(tmp_path):
+    path = str(tmp_path / 'spans.jsonl')
+    tracer = Tracer(JSONLinesExporter(path))
+    with tracer.span('first', iri=NS + 'wp0'):
+        pass
+    with tracer.span('second'):
+        pass
+    tracer.close()
+
+    spans = [json.loads(line) for line in open(path, encoding='utf-8')]
+    assert [span['name'] for span in spans] == ['first', 'second']
+    assert spans[0]['attributes'] == {'iri': NS + 'wp0'} and spans[0]['duration_ms'] >= 0
+    assert spans[0]['trace_id'] != spans[1]['trace_id']
+
+
+def test_dtp_api_methods_and_requests_are_traced(dtp_server):
+    tracer = Tracer(ListExporter())
+    with DTPApi(dtp_server.dtp_config, tracer=tracer) as dtp_api:
+        dtp_api.query_all_pages(dtp_api.fetch_element_nodes, 'ifc:Class', 'IfcWall')
+
+    spans = tracer.exporter.spans
+    by_id = {span.span_id: span for span in spans}
+    root = spans[-1]
+    assert root.name == 'query_all_pages' and root.parent_id is None
+    assert all(span.trace_id == root.trace_id for span in spans)
+    requests = [span for span in spans if span.name == 'http']
+    assert len(requests) == 6
+    assert all(span.attributes['status_code'] == 200 for span in requests)
+    for span in requests:
+        fetch = by_id[span.parent_id]
+        assert fetch.name == 'fetch_element_nodes'
+        assert by_id[fetch.parent_id].name == 'page' and by_id[fetch.parent_id].parent_id == root.span_id
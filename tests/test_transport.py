@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import time
+
+import pytest
+import requests
+
+from metrics import MetricsRegistry
+from transport import CircuitBreaker, CircuitOpenError, RetryPolicy, send_with_retry
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b'{}'
+    return response
+
+
+def make_request(method='POST'):
+    return requests.Request(method, 'http://127.0.0.1/avatars/find', data=b'{}').prepare()
+
+
+@pytest.mark.parametrize('method, api_name, status, expected', [
+    ('GET', None, 503, True),
+    ('PUT', 'update_set', 500, True),
+    ('POST', 'get_find_elements', 502, True),
+    ('POST', 'add_node', 503, False),
+    ('POST', 'add_node', 429, True),
+    ('POST', 'get_find_elements', 404, False),
+    ('POST', 'add_node', None, False),
+    ('POST', 'count_nodes', None, True),
+])
+def test_should_retry(method, api_name, status, expected):
+    response = make_response(status) if status is not None else None
+    assert RetryPolicy().should_retry(method, api_name, 0, response) is expected
+
+
+def test_should_retry_stops_after_max_retries():
+    retry_policy = RetryPolicy(max_retries=2)
+    assert retry_policy.should_retry('GET', None, 1, make_response(503))
+    assert not retry_policy.should_retry('GET', None, 2, make_response(503))
+
+
+def test_get_delay():
+    retry_policy = RetryPolicy(backoff_factor=0.5, max_backoff=3.0)
+    assert all(0 <= retry_policy.get_delay(2) <= 2.0 for _ in range(50))
+    assert all(retry_policy.get_delay(10) <= 3.0 for _ in range(50))
+    assert retry_policy.get_delay(0, make_response(429, {'Retry-After': '2'})) == 2.0
+    assert retry_policy.get_delay(0, make_response(429, {'Retry-After': '120'})) == 3.0
+    assert retry_policy.get_delay(0, make_response(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})) == 0.0
+
+
+def test_circuit_opens_after_the_threshold():
+    circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60.0, block=False)
+    circuit_breaker.record_failure()
+    circuit_breaker.before_request()
+    circuit_breaker.record_failure()
+
+    assert circuit_breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
+
+
+def test_circuit_lets_a_probe_through_after_the_timeout():
+    circuit_breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, block=False)
+    circuit_breaker.record_failure()
+    time.sleep(0.06)
+
+    circuit_breaker.before_request()
+    assert circuit_breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
+
+    circuit_breaker.record_failure()
+    assert circuit_breaker.state == 'open'
+    time.sleep(0.06)
+    circuit_breaker.before_request()
+    circuit_breaker.record_success()
+    assert circuit_breaker.state == 'closed'
+    circuit_breaker.before_request()
+
+
+def test_disabled_circuit_never_opens():
+    circuit_breaker = CircuitBreaker(failure_threshold=0, block=False)
+    for _ in range(5):
+        circuit_breaker.record_failure()
+    circuit_breaker.before_request()
+    assert circuit_breaker.state == 'closed'
+
+
+def test_send_with_retry_retries_the_idempotent_requests():
+    responses = [make_response(503), make_response(503), make_response(200)]
+    metrics = MetricsRegistry()
+
+    response = send_with_retry(lambda prepared: responses.pop(0), make_request(), 'get_find_elements',
+                               RetryPolicy(backoff_factor=0.0), CircuitBreaker(), metrics=metrics)
+
+    assert response.status_code == 200
+    assert metrics.to_dict()['apis']['get_find_elements']['retries'] == 2
+    assert metrics.to_dict()['apis']['get_find_elements']['requests'] == 3
+
+
+def test_send_with_retry_does_not_repeat_a_write():
+    calls = []
+
+    def send(prepared):
+        calls.append(prepared)
+        return make_response(503)
+
+    response = send_with_retry(send, make_request(), 'add_node', RetryPolicy(backoff_factor=0.0))
+
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+
+def test_send_with_retry_raises_the_last_connection_error():
+    calls = []
+
+    def send(prepared):
+        calls.append(prepared)
+        raise requests.exceptions.ConnectionError('refused')
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        send_with_retry(send, make_request('GET'), None, RetryPolicy(max_retries=2, backoff_factor=0.0))
+    assert len(calls) == 3
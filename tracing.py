@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# the prefixes of the DTPApi methods wrapped in a span by Tracer.instrument
+TRACED_METHOD_PREFIXES = ('fetch_', 'create_', 'link_', 'update_', 'revert_', 'query_all_pages', 'query_path')
+
+
+class Span:
+    """
+    The class is a timed operation of a trace. The spans of a trace form a tree through their parent_id.
+
+    Attributes
+    ----------
+    name : str
+        the name of the operation, e.g. update_operation_node or http
+    trace_id : str
+        the identifier shared by all the spans of a trace
+    span_id : str
+        the identifier of the span
+    parent_id : str
+        the identifier of the parent span, None for the root span of a trace
+    start_time : float
+        the start of the span in seconds since the epoch
+    duration : float
+        the duration of the span in seconds, None until the span ends
+    status : str
+        'ok' or 'error'
+    error : str
+        the exception which ended the span, None otherwise
+    attributes : dictionary
+        the attributes of the span, e.g. the page number or the batch size
+
+    Methods
+    -------
+    set_attribute(key, value)
+        None
+    to_dict()
+        returns dictionary
+    """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_time', 'duration', 'status', 'error',
+                 'attributes', 'thread', 'process', '_start')
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else '%032x' % random.getrandbits(128)
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_time = time.time()
+        self.duration = None
+        self.status = 'ok'
+        self.error = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.thread = threading.current_thread().name
+        self.process = os.getpid()
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.status = 'error'
+            self.error = type(error).__name__ + ': ' + str(error)
+
+    def to_dict(self):
+        return {'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id, 'name': self.name,
+                'start_time': self.start_time, 'duration_ms': self.duration * 1000 if self.duration is not None
+                else None, 'status': self.status, 'error': self.error, 'attributes': self.attributes,
+                'thread': self.thread, 'process': self.process}
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+
+# the span given by DTPApi.trace_span when tracing is disabled
+NULL_SPAN = _NullSpan()
+
+
+class JSONLinesExporter:
+    """
+    The class writes the ended spans to a file, one JSON object per line. The processes
+    of a pool can share the file, every span is written with a single call in the append mode.
+
+    Any object with the methods export(span) and close() can be used as an exporter of a Tracer.
+
+    Methods
+    -------
+    export(span)
+        None
+    close()
+        None
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str, obligatory
+            the path to the file, it does not need to exist
+        """
+
+        self.path = path
+        self.__file = open(path, 'a', encoding='utf-8')
+        self.__lock = threading.Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str) + '\n'
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+
+    def close(self):
+        with self.__lock:
+            self.__file.close()
+
+
+class Tracer:
+    """
+    The class records the spans of the operations of a DTPApi instance and passes them to an exporter.
+    The current span is kept per thread, the spans started in a thread are children of its current span.
+
+    Usage
+    -----
+    tracer = Tracer(JSONLinesExporter('spans.jsonl'))
+    dtp_api = DTPApi(dtp_config, tracer=tracer)
+    dtp_api.update_operation_node(oper_iri, action_iris, process_start, process_end, dump_dir)
+    # spans.jsonl: update_operation_node > fetch_node_with_iri > http, dump_write, http
+    tracer.close()
+
+    Attributes
+    ----------
+    exporter : object
+        the exporter of the ended spans, e.g. JSONLinesExporter
+
+    Methods
+    -------
+    span(name, **attributes)
+        returns a context manager yielding the new Span
+    current_span()
+        returns Span, None outside of a span
+    bind(function)
+        returns function, running function with the current span as the parent in any thread
+    instrument(obj, prefixes)
+        returns list, the names of the wrapped methods
+    close()
+        None
+    """
+
+    def __init__(self, exporter):
+        """
+        Parameters
+        ----------
+        exporter : object, obligatory
+            an object with the methods export(span) and close(), e.g. JSONLinesExporter
+        """
+
+        self.exporter = exporter
+        self.__local = threading.local()
+
+    def __stack(self):
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = []
+        return stack
+
+    def current_span(self):
+        stack = self.__stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        The method records the code run in its context as a span, a child of the current span of the thread.
+
+        Parameters
+        ----------
+        name : str, obligatory
+            the name of the span
+        attributes : dict, optional
+            the attributes of the span, more can be added with Span.set_attribute
+
+        Returns
+        ------
+        context manager
+            yields the Span, which is exported when the context is left
+        """
+
+        stack = self.__stack()
+        span = Span(name, stack[-1] if stack else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        else:
+            span.end()
+        finally:
+            stack.pop()
+            self.exporter.export(span)
+
+    def bind(self, function):
+        """
+        The method attaches the current span to a function, the spans started by the function
+        are its children even if the function runs in another thread, e.g. in a thread pool.
+
+        Parameters
+        ----------
+        function : function, obligatory
+            the function to be bound
+
+        Returns
+        ------
+        function
+            the bound function
+        """
+
+        parent = self.current_span()
+        if parent is None:
+            return function
+
+        @functools.wraps(function)
+        def bound(*args, **kwargs):
+            stack = self.__stack()
+            stack.append(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stack.pop()
+        return bound
+
+    def instrument(self, obj, prefixes=TRACED_METHOD_PREFIXES):
+        """
+        The method wraps the public methods of an object whose names start with one of the prefixes in a span.
+        The wrappers are set on the instance, so the calls between the methods produce nested spans.
+
+        Parameters
+        ----------
+        obj : object, obligatory
+            the object to be instrumented, e.g. a DTPApi instance
+        prefixes : tuple, optional
+            the prefixes of the names of the methods to be wrapped
+
+        Returns
+        ------
+        list
+            the names of the wrapped methods
+        """
+
+        wrapped = []
+        for name in dir(type(obj)):
+            if name.startswith('_') or not name.startswith(prefixes):
+                continue
+            method = getattr(obj, name)
+            if callable(method):
+                setattr(obj, name, self.__wrap(name, method))
+                wrapped.append(name)
+        return wrapped
+
+    def __wrap(self, name, method):
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            with self.span(name):
+                return method(*args, **kwargs)
+        return traced
+
+    def close(self):
+        self.exporter.close()
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-`
+
+#  Copyright (c) Centre Inria d'Université Côte d'Azur, University of Cambridge 2023.
+#  Authors: Kacper Pluta <kacper.pluta@inria.fr>, Alwyn Mathew <am3156@cam.ac.uk>
+#  This file cannot be used without a written permission from the author(s).
+
+"""
+The file contains the HTTP transport used by DTPApi to talk to the platform.
+"""
+
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from helpers import logger_global
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter keeping a pool of persistent connections per host.
+
+    Attributes
+    ----------
+    keep_alive : bool
+        if True, then connections are reused between requests and TCP keep-alive
+        probes are enabled on pooled sockets; otherwise each request closes its connection.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['keep_alive']
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+        """
+        Parameters
+        ----------
+        pool_connections : int, optional
+            the number of per-host connection pools to cache
+        pool_maxsize : int, optional
+            the maximum number of connections kept open to a single host
+        pool_block : bool, optional
+            if True, then a request waits for a free connection instead of
+            opening one above pool_maxsize, i.e. pool_maxsize is a hard per-host limit
+        keep_alive : bool, optional
+            if True, then connections are kept open and reused between requests
+        """
+
+        self.keep_alive = keep_alive
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block,
+                         max_retries=0)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.keep_alive:
+            pool_kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+    def add_headers(self, request, **kwargs):
+        if not self.keep_alive:
+            request.headers['Connection'] = 'close'
+
+
+def create_pooled_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+    """
+    The function creates a requests session reusing connections to the platform.
+
+    Parameters
+    ----------
+    pool_connections : int, optional
+        the number of per-host connection pools to cache
+    pool_maxsize : int, optional
+        the maximum number of connections kept open to a single host
+    pool_block : bool, optional
+        if True, then pool_maxsize is a hard per-host limit
+    keep_alive : bool, optional
+        if False, then every request asks the server to close the connection
+
+    Returns
+    ------
+    requests.Session
+        a session with pooled adapters mounted for HTTP and HTTPS
+    """
+
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                pool_block=pool_block, keep_alive=keep_alive)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class RetryPolicy:
+    """
+    The class decides which failed requests are sent again and how long to wait before.
+    The delays grow exponentially with full jitter, a Retry-After header sent by the platform takes precedence.
+
+    Idempotent requests, i.e. GET, PUT, DELETE and the POST queries of read_only_apis, are retried on
+    the retry_statuses and on connection errors. The other requests, e.g. creating nodes, are retried
+    only on the statuses telling that the request was not processed (429 by default).
+
+    Attributes
+    ----------
+    max_retries : int
+        the maximum number of retries of a request, 0 disables the retries
+    backoff_factor : float
+        the base of the delays in seconds, the n-th retry waits up to backoff_factor * 2 ** n
+    max_backoff : float
+        the maximum delay between two attempts in seconds, also the cap of Retry-After
+    retry_statuses : set
+        the status codes retried for the idempotent requests
+    unprocessed_statuses : set
+        the status codes retried for all the requests
+    read_only_apis : set
+        the names of the API sent with POST which do not change the database
+
+    Methods
+    -------
+    is_idempotent(method, api_name)
+        returns bool
+    should_retry(method, api_name, attempt, response)
+        returns bool
+    get_delay(attempt, response)
+        returns float, seconds
+    """
+
+    IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    def __init__(self, max_retries=5, backoff_factor=0.5, max_backoff=60.0, retry_statuses=(429, 500, 502, 503, 504),
+                 unprocessed_statuses=(429,), read_only_apis=('get_find_elements', 'count_nodes')):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = set(retry_statuses)
+        self.unprocessed_statuses = set(unprocessed_statuses)
+        self.read_only_apis = set(read_only_apis)
+
+    def is_idempotent(self, method, api_name):
+        return method in self.IDEMPOTENT_METHODS or (method == 'POST' and api_name in self.read_only_apis)
+
+    def should_retry(self, method, api_name, attempt, response=None):
+        """
+        The method tells if a failed attempt should be retried.
+
+        Parameters
+        ----------
+        method : str, obligatory
+            the HTTP method of the request
+        api_name : str, obligatory
+            the API type of the request, see DTPConfig.get_api_name, None if unknown
+        attempt : int, obligatory
+            the number of retries already made
+        response : requests.Response, optional
+            the response of the attempt, None if the attempt raised a connection error
+
+        Returns
+        ------
+        bool
+            True if the request should be sent again
+        """
+
+        if attempt >= self.max_retries:
+            return False
+        if response is None:
+            return self.is_idempotent(method, api_name)
+        if response.status_code in self.unprocessed_statuses:
+            return True
+        return response.status_code in self.retry_statuses and self.is_idempotent(method, api_name)
+
+    def get_delay(self, attempt, response=None):
+        """
+        The method returns the number of seconds to wait before the next attempt.
+
+        Parameters
+        ----------
+        attempt : int, obligatory
+            the number of retries already made
+        response : requests.Response, optional
+            the response of the failed attempt, its Retry-After header is honoured
+
+        Returns
+        ------
+        float
+            the delay in seconds
+        """
+
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    The class stops sending requests to a degraded platform. After failure_threshold consecutive failures
+    (connection errors, 5xx or 429 responses) the circuit opens and the requests wait recovery_timeout seconds.
+    Then a single probe request is let through: the circuit closes if it succeeds and opens again otherwise.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        the number of consecutive failures opening the circuit, 0 disables the breaker
+    recovery_timeout : float
+        the number of seconds the circuit stays open before a probe
+    block : bool
+        if True, then the requests wait for the circuit to close, otherwise they raise CircuitOpenError
+    state : str
+        'closed', 'open' or 'half_open'
+
+    Methods
+    -------
+    before_request()
+        None, waits while the circuit is open
+    record_success()
+        None
+    record_failure()
+        None
+    """
+
+    def __init__(self, failure_threshold=10, recovery_timeout=30.0, block=True):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.block = block
+        self.state = 'closed'
+        self.__failures = 0
+        self.__opened_at = 0.0
+        self.__probing = False
+        self.__probe_started = 0.0
+        self.__condition = threading.Condition()
+
+    def before_request(self):
+        """
+        The method returns when a request can be sent.
+
+        Raises
+        ------
+        CircuitOpenError if the circuit is open and block is False
+        """
+
+        if self.failure_threshold <= 0:
+            return
+        with self.__condition:
+            while True:
+                if self.state == 'closed':
+                    return
+                remaining = self.__opened_at + self.recovery_timeout - time.monotonic()
+                if self.state == 'open' and remaining <= 0:
+                    self.state = 'half_open'
+                    self.__probing = False
+                # a new probe is let through if the previous one has not reported back
+                if self.state == 'half_open' and (not self.__probing or
+                                                  time.monotonic() - self.__probe_started > self.recovery_timeout):
+                    self.__probing = True
+                    self.__probe_started = time.monotonic()
+                    return
+                if not self.block:
+                    raise CircuitOpenError("Sorry, the circuit is open, the platform seems to be degraded.")
+                self.__condition.wait(timeout=remaining if self.state == 'open' else self.recovery_timeout)
+
+    def record_success(self):
+        if self.failure_threshold <= 0:
+            return
+        with self.__condition:
+            if self.state != 'closed':
+                logger_global.warning('The circuit is closed, the platform responds again.')
+            self.state = 'closed'
+            self.__failures = 0
+            self.__probing = False
+            self.__condition.notify_all()
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self.__condition:
+            self.__failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.__failures >= self.failure_threshold):
+                logger_global.warning('The circuit is open after ' + str(self.__failures) +
+                                      ' consecutive failures, the requests wait ' + str(self.recovery_timeout) + ' s.')
+                self.state = 'open'
+                self.__opened_at = time.monotonic()
+                self.__probing = False
+                self.__condition.notify_all()
+
+
+def send_with_retry(send, prepared, api_name=None, retry_policy=None, circuit_breaker=None, rate_limiter=None,
+                    concurrency_controller=None, metrics=None):
+    """
+    The function sends a prepared request, retrying it according to the policy, waiting
+    while the circuit breaker is open and for the tokens of the rate limiter.
+
+    Parameters
+    ----------
+    send : function, obligatory
+        the function sending a prepared request, e.g. requests.Session.send
+    prepared : requests.PreparedRequest, obligatory
+        the request to be sent
+    api_name : str, optional
+        the API type of the request, see DTPConfig.get_api_name
+    retry_policy : RetryPolicy, optional
+        the retry policy, None for a single attempt
+    circuit_breaker : CircuitBreaker, optional
+        the circuit breaker, None to disable it
+    rate_limiter : RateLimiter, optional
+        the rate limiter, every attempt takes a token, None to disable it
+    concurrency_controller : AdaptiveConcurrencyController, optional
+        the controller of the number of requests in flight, every attempt takes a slot, None to disable it
+    metrics : MetricsRegistry, optional
+        the registry recording every attempt and retry, None to disable it
+
+    Returns
+    ------
+    requests.Response
+        the response of the last attempt
+    """
+
+    attempt = 0
+    while True:
+        if circuit_breaker is not None:
+            circuit_breaker.before_request()
+        if rate_limiter is not None:
+            rate_limiter.acquire(api_name)
+        if concurrency_controller is not None:
+            concurrency_controller.acquire()
+        start = time.monotonic()
+        try:
+            response = send(prepared)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            latency = time.monotonic() - start
+            if concurrency_controller is not None:
+                concurrency_controller.release(latency, failed=True, api_name=api_name)
+            if metrics is not None:
+                metrics.observe_error(api_name, latency, type(e).__name__)
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
+            if retry_policy is None or not retry_policy.should_retry(prepared.method, api_name, attempt):
+                raise
+            delay = retry_policy.get_delay(attempt)
+            logger_global.warning('Retrying ' + prepared.method + ' ' + prepared.url + ' in ' +
+                                  format(delay, '.2f') + ' s after: ' + str(e))
+        except BaseException:
+            if concurrency_controller is not None:
+                concurrency_controller.release(time.monotonic() - start, failed=False, api_name=api_name)
+            raise
+        else:
+            latency = time.monotonic() - start
+            overloaded = response.status_code >= 500 or response.status_code == 429
+            if concurrency_controller is not None:
+                concurrency_controller.release(latency, failed=overloaded, api_name=api_name)
+            if metrics is not None:
+                metrics.observe_request(api_name, latency, len(prepared.body or b''), len(response.content or b''),
+                                        response.status_code)
+            if circuit_breaker is not None:
+                if overloaded:
+                    circuit_breaker.record_failure()
+                else:
+                    circuit_breaker.record_success()
+            if retry_policy is None or not retry_policy.should_retry(prepared.method, api_name, attempt, response):
+                return response
+            delay = retry_policy.get_delay(attempt, response)
+            logger_global.warning('Retrying ' + prepared.method + ' ' + prepared.url + ' in ' +
+                                  format(delay, '.2f') + ' s after response code: ' + str(response.status_code))
+            response.close()
+        if metrics is not None:
+            metrics.observe_retry(api_name)
+        time.sleep(delay)
+        attempt += 1